@@ -0,0 +1,327 @@
+"""
+End-to-end benchmark of the scanning pipeline on a synthetic screenshot corpus.
+
+Usage:
+    python benchmarks/run_benchmarks.py [--runners 4] [--repeat 3] [--no-ocr] [--gpu]
+    python benchmarks/run_benchmarks.py --compare results/base.json results/new.json
+    python benchmarks/run_benchmarks.py --compare-backends
+
+Every stage is timed separately (decode, detect_active_tab, crop_rois,
+parse_rankings_by_color, OCR, detect_spark_zones, parse_sparks, star counting,
+_identify_portrait and update_all_runners). Results are written as JSON to benchmarks/results/, tagged with the
+current git commit so runs can be compared across commits.
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import platform
+import tempfile
+import subprocess
+from datetime import datetime
+from multiprocessing import cpu_count
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_ROOT = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, os.path.join(REPO_ROOT, "src"))
+
+import numpy as np
+import pandas as pd
+from PIL import Image
+
+from synthetic_screens import build_corpus, SCREEN_W
+from image_utils import load_image, select_layout, crop_rois, crop_box
+from tabs import detect_active_tab
+from rankings import parse_rankings_by_color
+import perf
+
+RESULTS_DIR = os.path.join(BENCH_DIR, "results")
+
+
+class StageTimer:
+    """Collects wall-clock samples per stage name."""
+    def __init__(self):
+        self.samples = {}
+
+    def run(self, stage, fn, *args, **kwargs):
+        start = time.perf_counter()
+        result = fn(*args, **kwargs)
+        self.samples.setdefault(stage, []).append(time.perf_counter() - start)
+        return result
+
+    def summary(self):
+        out = {}
+        for stage, values in self.samples.items():
+            arr = np.array(values) * 1000.0
+            out[stage] = {
+                "count": len(values),
+                "total_ms": round(float(arr.sum()), 3),
+                "mean_ms": round(float(arr.mean()), 3),
+                "p50_ms": round(float(np.percentile(arr, 50)), 3),
+                "p95_ms": round(float(np.percentile(arr, 95)), 3),
+                "min_ms": round(float(arr.min()), 3),
+            }
+        return out
+
+
+def _git_commit():
+    try:
+        commit = subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_ROOT, text=True).strip()
+        dirty = bool(subprocess.check_output(["git", "status", "--porcelain", "--untracked-files=no"], cwd=REPO_ROOT, text=True).strip())
+        return commit, dirty
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown", False
+
+
+def _truth_row(folder_name, truth, entry_id):
+    row = {"entry_id": str(entry_id), "last_updated": "2000-01-01 00:00:00",
+           "entry_hash": f"{folder_name}_{entry_id}", "name": truth["name"], "score": truth["score"]}
+    row.update(truth["stats"])
+    for sub in truth["rankings"].values():
+        row.update(sub)
+    row["gp1"], row["gp2"] = "", ""
+    row["skills"] = truth["skills"]
+    row["sparks"] = {t: [s["blue"], s["pink"]] + s["green"] + s["white"] for t, s in truth["sparks"].items()}
+    return row
+
+
+def bench_image_stages(timer, image_paths):
+    """Decode, tab detection, ROI cropping and ranking classification for every screenshot."""
+    for path in image_paths:
+        img = timer.run("decode", load_image, path)
+        timer.run("detect_active_tab", detect_active_tab, path)
+        layout = select_layout(img)
+        rois, _ = timer.run("crop_rois", crop_rois, img, layout)
+        if "rankings" in rois:
+            timer.run("parse_rankings_by_color", parse_rankings_by_color, rois["rankings"])
+
+
+def bench_ocr_stages(timer, reader, image_paths, truth, accuracy):
+    """OCR-bound stages plus accuracy against the ground truth."""
+    from umamusume_parser import parse_umamusume
+    from roi_detector import detect_spark_zones
+    from spark_parser import parse_sparks
+
+    skills_paths = [p for p in image_paths if "skills" in os.path.basename(p)]
+    insp_paths = [p for p in image_paths if "inspiration" in os.path.basename(p)]
+
+    # One context per folder, as main.process_folder uses, so the header skip and the
+    # scroll-offset skill crop are part of what is measured. Later screenshots may come
+    # back without a header, so the header fields are merged the same way main does.
+    folder_context = {}
+    name, score, stats = "", 0, None
+    found_skills = set()
+    for path in skills_paths:
+        result = timer.run("ocr_parse_umamusume", parse_umamusume, path, reader, folder_context)
+        if not result:
+            continue
+        name = name or result.name
+        score = score or result.score
+        if result.name:
+            stats = result.stats.__dict__
+        found_skills.update(result.skills)
+    accuracy["name"].append(name == truth["name"])
+    accuracy["score"].append(score == truth["score"])
+    accuracy["stats"].append(stats == truth["stats"])
+    accuracy["skills_recall"].append(len(found_skills & set(truth["skills"])) / len(truth["skills"]))
+
+    zones = timer.run("detect_spark_zones", detect_spark_zones, insp_paths, reader)
+    accuracy["zones_found"].append(len(zones) == 3)
+
+    expected = {(s["spark_name"], s["count"]) for s in
+                [truth["sparks"]["parent"]["blue"], truth["sparks"]["parent"]["pink"]]
+                + truth["sparks"]["parent"]["green"] + truth["sparks"]["parent"]["white"]}
+    for roi_idx, (image_index, box) in enumerate(zones):
+        crop = crop_box(load_image(insp_paths[image_index]), box)
+        sparks = timer.run("parse_sparks", parse_sparks, crop, reader)
+        if roi_idx == 0:
+            found = {(s["name"], s["count"]) for lst in sparks.values() for s in lst}
+            accuracy["parent_sparks_recall"].append(len(found & expected) / len(expected))
+
+
+def bench_star_counts(timer, image_paths, accuracy):
+    """
+    Times the zone-level star count against count_yellow_stars on every box and records
+    whether both give the same counts. Zones are cut at the positions the corpus draws them.
+    """
+    from spark_parser import detect_boxes, count_stars_by_box, count_yellow_stars
+    from synthetic_screens import SPARK_ROI
+
+    insp_paths = [p for p in image_paths if "inspiration" in os.path.basename(p)]
+    x1 = SPARK_ROI["OFFSET_FROM_SCREENSHOT_LEFT_EDGE"]
+    x2 = x1 + SPARK_ROI["FIXED_SPARK_AREA_WIDTH"]
+    for path, tops in zip(insp_paths, ((1300,), (1250, 1720))):
+        img = load_image(path)
+        for k, top in enumerate(tops):
+            y2 = tops[k + 1] + SPARK_ROI["ZONE_Y2_NEXT_SPARK_OFFSET"] if k + 1 < len(tops) else img.shape[0] + SPARK_ROI["ZONE_Y2_FALLBACK"]
+            zone = img[top + SPARK_ROI["ZONE_Y1_OFFSET"]:y2, x1:x2]
+            col_w = zone.shape[1] // 2
+            columns = [zone[:, :col_w], zone[:, col_w:]]
+            column_boxes = [detect_boxes(col) for col in columns]
+            by_zone = timer.run("count_stars_by_box", count_stars_by_box, zone, col_w, column_boxes)
+            by_box = [[timer.run("count_yellow_stars", count_yellow_stars, col[y1:y2_box, :]) for y1, y2_box in boxes]
+                      for col, boxes in zip(columns, column_boxes)]
+            accuracy["star_counts_match"].append([list(c) for c in by_zone] == by_box)
+
+
+def bench_portraits(timer, image_paths, truth, accuracy):
+    """Times _identify_portrait on the grandparent portraits pasted into the corpus."""
+    from main import _identify_portrait
+    from synthetic_screens import SPARK_ROI
+
+    insp_b = [p for p in image_paths if "inspiration" in os.path.basename(p)][-1]
+    img = Image.open(insp_b).convert("RGB")
+    x1 = SPARK_ROI["OFFSET_FROM_SCREENSHOT_LEFT_EDGE"]
+    for top, identifier in zip((1250, 1720), truth["gp_portraits"]):
+        if identifier is None:
+            continue
+        y1 = top + SPARK_ROI["ZONE_Y1_OFFSET"]
+        portrait = img.crop((x1 - 110, y1 + 9, x1 - 20, y1 + 125))
+        name = timer.run("identify_portrait", _identify_portrait, portrait, "benchmark.png")
+        accuracy["portrait"].append(name == identifier.replace("_", " "))
+
+
+def bench_update_all_runners(timer, ground_truth, existing_rows, repeat):
+    """Merges the corpus into an all_runners.json that already holds `existing_rows` entries."""
+    from data_updater import update_all_runners
+
+    existing = []
+    truths = list(ground_truth.items())
+    for i in range(existing_rows):
+        folder_name, truth = truths[i % len(truths)]
+        existing.append(_truth_row(f"existing_{folder_name}", truth, i + 1))
+    new_rows = [_truth_row(name, truth, existing_rows + i + 1) for i, (name, truth) in enumerate(truths)]
+
+    for _ in range(repeat):
+        data_dir = tempfile.mkdtemp(prefix="uma_bench_data_")
+        try:
+            with open(os.path.join(data_dir, "all_runners.json"), "w", encoding="utf-8") as f:
+                json.dump(existing, f)
+            timer.run("update_all_runners", update_all_runners, pd.DataFrame(new_rows), {}, {}, data_dir)
+        finally:
+            shutil.rmtree(data_dir, ignore_errors=True)
+
+
+def run(args):
+    corpus_dir = args.corpus_dir or tempfile.mkdtemp(prefix="uma_bench_corpus_")
+    timer = StageTimer()
+    perf.reset()
+    ground_truth = timer.run("build_corpus", build_corpus, corpus_dir, args.runners, args.seed)
+
+    reader = None
+    if not args.no_ocr:
+        from ocr_backends import create_reader, OCR_READER_CONFIG
+        from ocr_accounting import AccountingReader
+        reader_config = dict(OCR_READER_CONFIG, backend=args.backend, gpu=args.gpu)
+        reader = AccountingReader(timer.run("reader_init", create_reader, reader_config))
+
+    accuracy = {k: [] for k in ("name", "score", "stats", "skills_recall", "zones_found",
+                                "parent_sparks_recall", "portrait", "star_counts_match")}
+    for _ in range(args.repeat):
+        for folder_name, truth in ground_truth.items():
+            folder = os.path.join(corpus_dir, folder_name)
+            image_paths = sorted(os.path.join(folder, f) for f in os.listdir(folder))
+            bench_image_stages(timer, image_paths)
+            bench_portraits(timer, image_paths, truth, accuracy)
+            bench_star_counts(timer, image_paths, accuracy)
+            if reader is not None:
+                bench_ocr_stages(timer, reader, image_paths, truth, accuracy)
+    bench_update_all_runners(timer, ground_truth, args.existing_rows, args.repeat)
+
+    commit, dirty = _git_commit()
+    report = {
+        "meta": {
+            "commit": commit,
+            "dirty": dirty,
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": cpu_count(),
+            "gpu": args.gpu,
+            "ocr": reader is not None,
+            "backend": args.backend if reader is not None else None,
+            "runners": args.runners,
+            "repeat": args.repeat,
+            "screen_width": SCREEN_W,
+        },
+        "stages": timer.summary(),
+        "accuracy": {k: round(float(np.mean(v)), 4) for k, v in accuracy.items() if v},
+        "ocr_call_sites": reader.summary() if reader is not None else {},
+        # Work the pipeline skipped, e.g. header_ocr_skipped and skill_panel_rows_skipped.
+        "counters": perf.summary()["counters"],
+    }
+
+    if not args.corpus_dir:
+        shutil.rmtree(corpus_dir, ignore_errors=True)
+    return report
+
+
+def compare(base_path, new_path):
+    """Prints the p50 change of every stage between two reports."""
+    with open(base_path, "r", encoding="utf-8") as f:
+        base = json.load(f)
+    with open(new_path, "r", encoding="utf-8") as f:
+        new = json.load(f)
+    print(f"{'stage':<28}{'base p50 ms':>14}{'new p50 ms':>14}{'change':>10}")
+    for stage in sorted(set(base["stages"]) | set(new["stages"])):
+        b = base["stages"].get(stage, {}).get("p50_ms")
+        n = new["stages"].get(stage, {}).get("p50_ms")
+        change = f"{(n - b) / b * 100:+.1f}%" if b and n is not None else "n/a"
+        print(f"{stage:<28}{b if b is not None else '-':>14}{n if n is not None else '-':>14}{change:>10}")
+    for key in sorted(set(base.get("accuracy", {})) | set(new.get("accuracy", {}))):
+        print(f"accuracy.{key:<19}{base.get('accuracy', {}).get(key, '-'):>14}{new.get('accuracy', {}).get(key, '-'):>14}")
+
+
+def _write_report(report, output, suffix=""):
+    if not output:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        stamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        output = os.path.join(RESULTS_DIR, f"{stamp}_{report['meta']['commit']}{suffix}.json")
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+
+    for stage, s in report["stages"].items():
+        print(f"{stage:<28} n={s['count']:<5} p50={s['p50_ms']:>10.2f} ms  p95={s['p95_ms']:>10.2f} ms")
+    for key, value in report["accuracy"].items():
+        print(f"accuracy.{key:<19} {value:.2%}")
+    print(f"Report written to {output}")
+    return output
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the scanner on synthetic screenshots.")
+    parser.add_argument("--runners", type=int, default=4, help="Number of synthetic runners to render.")
+    parser.add_argument("--repeat", type=int, default=3, help="How many times each stage is run.")
+    parser.add_argument("--seed", type=int, default=1234)
+    parser.add_argument("--existing-rows", type=int, default=500, help="Size of all_runners.json for the merge stage.")
+    parser.add_argument("--corpus-dir", help="Keep the rendered corpus in this folder.")
+    parser.add_argument("--no-ocr", action="store_true", help="Skip stages that need an OCR reader.")
+    parser.add_argument("--gpu", action="store_true", help="Create the OCR reader with gpu=True.")
+    parser.add_argument("--backend", choices=["easyocr", "onnx"], default="easyocr", help="OCR backend to benchmark.")
+    parser.add_argument("--compare-backends", action="store_true",
+                        help="Run the OCR stages once per backend and compare speed and accuracy.")
+    parser.add_argument("--output", help="Report path (default: benchmarks/results/<timestamp>_<commit>.json).")
+    parser.add_argument("--compare", nargs=2, metavar=("BASE", "NEW"), help="Compare two reports and exit.")
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+        return
+
+    if args.compare_backends:
+        # Same corpus (same seed) through every backend, then the usual stage/accuracy diff.
+        from ocr_backends import BACKENDS
+        outputs = []
+        for backend in BACKENDS:
+            args.backend = backend
+            outputs.append(_write_report(run(args), None, suffix=f"_{backend}"))
+        compare(*outputs)
+        return
+
+    _write_report(run(args), args.output)
+
+
+if __name__ == "__main__":
+    main()
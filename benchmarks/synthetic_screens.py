@@ -0,0 +1,234 @@
+"""
+Renders synthetic 1080x2400 Umamusume screenshots with known ground truth.
+
+Skills screenshots follow the ROI_MOBILE layout in src/config.json (name, score, stats,
+rankings and skills panel). Inspiration screenshots contain three spark zones laid out the
+way roi_detector expects them: a blue spark title, 88 px spark boxes in two columns and
+yellow stars in the lower part of each box. Grandparent portraits are pasted from the
+bundled master images so _identify_portrait has something real to match against.
+"""
+import os
+import sys
+import json
+import random
+
+import cv2
+import numpy as np
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SRC_DIR = os.path.join(REPO_ROOT, "src")
+GAME_DATA_DIR = os.path.join(REPO_ROOT, "data", "game_data")
+PROFILE_IMAGES_DIR = os.path.join(REPO_ROOT, "assets", "profile_images")
+
+with open(os.path.join(SRC_DIR, "config.json"), "r") as f:
+    config = json.load(f)
+
+SCREEN_W, SCREEN_H = 1080, 2400
+ROI_MOBILE = config["ROI_MOBILE"]
+STAT_KEYS = config["STAT_KEYS"]
+SPARK_ROI = config["SPARK_ROI_DETECTION"]
+SPARK_BOX_HEIGHT = config["SPARK_BOX_HEIGHT"]
+
+BACKGROUND = (245, 245, 245)
+TEXT = (40, 40, 40)
+TAB_GREEN = (80, 200, 80)  # HSV ~ (60, 153, 200), inside detect_active_tab's green range.
+SPARK_BOX_BG = (190, 190, 190)  # Darker than 200 so detect_boxes finds the first box row.
+STAR_YELLOW = (0, 215, 255)  # HSV ~ (25, 255, 255), inside YELLOW_STAR_HSV range.
+FONT = cv2.FONT_HERSHEY_SIMPLEX
+
+RANKING_LABELS = [
+    ("track", "turf"), ("track", "dirt"), None, None,
+    ("distance", "sprint"), ("distance", "mile"), ("distance", "medium"), ("distance", "long"),
+    ("style", "front"), ("style", "pace"), ("style", "late"), ("style", "end"),
+]
+
+
+def _load_json(name):
+    with open(os.path.join(GAME_DATA_DIR, name), "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _ascii(text):
+    """cv2.putText can only draw ASCII; drop the rest so ground truth matches what is drawn."""
+    return "".join(c for c in text if 32 <= ord(c) < 127).strip()
+
+
+def _put_text(img, text, x, y, scale=1.0, thickness=2):
+    cv2.putText(img, text, (x, y), FONT, scale, TEXT, thickness, cv2.LINE_AA)
+
+
+def _grade_bgr(grade):
+    lo, hi = config["COLOR_TO_GRADE"][grade]
+    hsv = np.uint8([[[(l + h) // 2 for l, h in zip(lo, hi)]]])
+    return tuple(int(c) for c in cv2.cvtColor(hsv, cv2.COLOR_HSV2BGR)[0, 0])
+
+
+def _blank_screen(active_tab):
+    img = np.full((SCREEN_H, SCREEN_W, 3), BACKGROUND, dtype=np.uint8)
+    if active_tab == "skills":
+        cv2.rectangle(img, (260, 1060), (370, 1090), TAB_GREEN, -1)
+    else:
+        cv2.rectangle(img, (370, 1060), (450, 1090), TAB_GREEN, -1)
+    return img
+
+
+def _draw_header(img, truth):
+    y1, y2, x1, x2 = ROI_MOBILE["name"]
+    _put_text(img, truth["name"], x1 + 5, y2 - 20, 1.2, 2)
+    y1, y2, x1, x2 = ROI_MOBILE["score"]
+    _put_text(img, str(truth["score"]), x1 + 5, y2 - 4, 0.8, 2)
+    for k in STAT_KEYS:
+        y1, y2, x1, x2 = ROI_MOBILE[k]
+        _put_text(img, str(truth["stats"][k]), x1 + 5, y2 - 6, 0.9, 2)
+
+    y1, y2, x1, x2 = ROI_MOBILE["rankings"]
+    cell_h, cell_w = (y2 - y1) // 3, (x2 - x1) // 4
+    for i, label in enumerate(RANKING_LABELS):
+        if label is None:
+            continue
+        r, c = divmod(i, 4)
+        grade = truth["rankings"][label[0]][label[1]]
+        if grade == "G":
+            continue
+        cx1 = x1 + c * cell_w + int(cell_w * 0.7)
+        cy1 = y1 + r * cell_h + 10
+        cv2.rectangle(img, (cx1, cy1), (x1 + (c + 1) * cell_w - 10, y1 + (r + 1) * cell_h - 10), _grade_bgr(grade), -1)
+
+
+def _draw_skills(img, skills):
+    y1, y2, x1, x2 = ROI_MOBILE["skills"]
+    half = (x2 - x1) // 2
+    columns = [x1 + 20, x1 + half + 74 + 10]
+    row_h = 80
+    for i, skill in enumerate(skills):
+        row, col = divmod(i, 2)
+        y = y1 + 50 + row * row_h
+        if y > y2 - 20:
+            break
+        _put_text(img, skill, columns[col], y, 0.8, 2)
+
+
+def _draw_spark_zone(img, top, sparks, portrait=None):
+    """Draws one spark zone whose blue spark title starts at y=`top`."""
+    zone_x1 = SPARK_ROI["OFFSET_FROM_SCREENSHOT_LEFT_EDGE"]
+    col_w = SPARK_ROI["FIXED_SPARK_AREA_WIDTH"] // 2
+    box_top = top + SPARK_ROI["ZONE_Y1_OFFSET"] + 4
+
+    by_column = [[], []]
+    by_column[0].append(sparks["blue"])
+    by_column[1].append(sparks["pink"])
+    rest = [s for s in sparks["green"] + sparks["white"]]
+    for i, spark in enumerate(rest):
+        by_column[i % 2].append(spark)
+
+    for c, column in enumerate(by_column):
+        x = zone_x1 + c * col_w
+        for j, spark in enumerate(column):
+            y = box_top + j * SPARK_BOX_HEIGHT
+            cv2.rectangle(img, (x + 4, y + 2), (x + col_w - 4, y + SPARK_BOX_HEIGHT - 2), SPARK_BOX_BG, -1)
+            _put_text(img, spark["spark_name"], x + 14, y + 34, 0.75, 2)
+            for s in range(spark["count"]):
+                cv2.circle(img, (x + 70 + s * 30, y + 66), 8, STAR_YELLOW, -1)
+
+    if portrait is not None:
+        px1, py1 = zone_x1 - 110, top + SPARK_ROI["ZONE_Y1_OFFSET"] + 9
+        img[py1:py1 + portrait.shape[0], px1:px1 + portrait.shape[1]] = portrait
+
+
+def _portrait_from_master(identifier):
+    path = os.path.join(PROFILE_IMAGES_DIR, f"{identifier}.png")
+    master = cv2.imread(path, cv2.IMREAD_UNCHANGED)
+    if master is None:
+        return None
+    if master.shape[2] == 4:
+        alpha = master[:, :, 3:4].astype(np.float32) / 255.0
+        master = (master[:, :, :3] * alpha + 255 * (1 - alpha)).astype(np.uint8)
+    return cv2.resize(master, (90, 116), interpolation=cv2.INTER_AREA)
+
+
+def generate_runner(rng, runners, skills, sparks_data, masters):
+    """Returns the ground truth for one synthetic runner."""
+    name = rng.choice(runners)
+    white = sparks_data["white"]["race"] + sparks_data["white"]["skill"]
+
+    def spark_set():
+        return {
+            "blue": {"color": "blue", "spark_name": rng.choice(sparks_data["blue"]), "count": rng.randint(1, 3)},
+            "pink": {"color": "pink", "spark_name": rng.choice(sparks_data["pink"]), "count": rng.randint(1, 3)},
+            "green": [{"color": "green", "spark_name": _ascii(rng.choice(sparks_data["green"])), "count": rng.randint(1, 3)}],
+            "white": [{"color": "white", "spark_name": _ascii(s), "count": rng.randint(1, 3)}
+                      for s in rng.sample(white, 3)],
+        }
+
+    return {
+        "name": name,
+        "score": rng.randint(8000, 16000),
+        "stats": {k: rng.randint(300, 1200) for k in STAT_KEYS},
+        "rankings": {
+            "track": {"turf": rng.choice("SABCDEFG"), "dirt": rng.choice("SABCDEFG")},
+            "distance": {k: rng.choice("SABCDEFG") for k in ("sprint", "mile", "medium", "long")},
+            "style": {k: rng.choice("SABCDEFG") for k in ("front", "pace", "late", "end")},
+        },
+        "skills": [_ascii(s) for s in rng.sample(skills, 14)],
+        "sparks": {"parent": spark_set(), "gp1": spark_set(), "gp2": spark_set()},
+        # Master image identifiers whose portraits are pasted next to the gp1/gp2 zones.
+        "gp_portraits": [rng.choice(masters), rng.choice(masters)] if masters else [None, None],
+    }
+
+
+def render_runner(truth):
+    """Renders the skills and inspiration screenshots for one runner."""
+    skills_a = _blank_screen("skills")
+    _draw_header(skills_a, truth)
+    _draw_skills(skills_a, truth["skills"][:10])
+
+    # The second skills screenshot is scrolled: it shares its header with the first.
+    skills_b = _blank_screen("skills")
+    _draw_header(skills_b, truth)
+    _draw_skills(skills_b, truth["skills"][6:])
+
+    insp_a = _blank_screen("inspiration")
+    _draw_header(insp_a, truth)
+    _draw_spark_zone(insp_a, 1300, truth["sparks"]["parent"])
+
+    insp_b = _blank_screen("inspiration")
+    _draw_header(insp_b, truth)
+    gp1_master, gp2_master = truth["gp_portraits"]
+    _draw_spark_zone(insp_b, 1250, truth["sparks"]["gp1"], _portrait_from_master(gp1_master) if gp1_master else None)
+    _draw_spark_zone(insp_b, 1720, truth["sparks"]["gp2"], _portrait_from_master(gp2_master) if gp2_master else None)
+
+    return {"1_skills.png": skills_a, "2_skills.png": skills_b,
+            "3_inspiration.png": insp_a, "4_inspiration.png": insp_b}
+
+
+def build_corpus(out_dir, num_runners=4, seed=1234):
+    """
+    Writes `num_runners` folders of synthetic screenshots to `out_dir` and returns a dict
+    mapping folder name -> ground truth.
+    """
+    rng = random.Random(seed)
+    runners = _load_json("runners.json")
+    skills = [s for s in _load_json("skills.json").keys() if _ascii(s) == s]
+    sparks_data = _load_json("sparks.json")
+    masters = sorted(os.path.splitext(f)[0] for f in os.listdir(PROFILE_IMAGES_DIR) if f.endswith("_c.png"))
+
+    ground_truth = {}
+    for i in range(num_runners):
+        truth = generate_runner(rng, runners, skills, sparks_data, masters)
+        folder_name = f"synthetic_{i:03d}"
+        folder_path = os.path.join(out_dir, folder_name)
+        os.makedirs(folder_path, exist_ok=True)
+        for file_name, img in render_runner(truth).items():
+            cv2.imwrite(os.path.join(folder_path, file_name), img)
+        ground_truth[folder_name] = truth
+
+    with open(os.path.join(out_dir, "ground_truth.json"), "w", encoding="utf-8") as f:
+        json.dump(ground_truth, f, indent=2, ensure_ascii=False)
+    return ground_truth
+
+
+if __name__ == "__main__":
+    target = sys.argv[1] if len(sys.argv) > 1 else os.path.join(REPO_ROOT, "benchmarks", "corpus")
+    count = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+    build_corpus(target, count)
+    print(f"Wrote {count} synthetic runners to {target}")
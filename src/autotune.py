@@ -0,0 +1,200 @@
+import os
+import sys
+import json
+import time
+import random
+import string
+import platform
+import logging
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+import numpy as np
+import torch
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+logger = logging.getLogger(__name__)
+
+# Rough resident memory of one processing worker (screenshots, crops, OCR activations).
+MEMORY_PER_WORKER_MB = 600
+CALIBRATION_CROPS = 8
+WORKER_CANDIDATES = [1, 2, 3, 4, 6, 8, 12, 16]
+
+
+# ---------------- Helper: Hardware Probe ----------------
+def _available_memory_mb():
+    """Available physical memory in MB, or None when it cannot be determined."""
+    if psutil is not None:
+        return psutil.virtual_memory().available // (1024 * 1024)
+    if sys.platform == "win32":
+        import ctypes
+
+        class MEMORYSTATUSEX(ctypes.Structure):
+            _fields_ = [("dwLength", ctypes.c_ulong), ("dwMemoryLoad", ctypes.c_ulong),
+                        ("ullTotalPhys", ctypes.c_ulonglong), ("ullAvailPhys", ctypes.c_ulonglong),
+                        ("ullTotalPageFile", ctypes.c_ulonglong), ("ullAvailPageFile", ctypes.c_ulonglong),
+                        ("ullTotalVirtual", ctypes.c_ulonglong), ("ullAvailVirtual", ctypes.c_ulonglong),
+                        ("ullAvailExtendedVirtual", ctypes.c_ulonglong)]
+
+        status = MEMORYSTATUSEX()
+        status.dwLength = ctypes.sizeof(MEMORYSTATUSEX)
+        if ctypes.windll.kernel32.GlobalMemoryStatusEx(ctypes.byref(status)):
+            return status.ullAvailPhys // (1024 * 1024)
+        return None
+    try:
+        return os.sysconf("SC_AVPHYS_PAGES") * os.sysconf("SC_PAGE_SIZE") // (1024 * 1024)
+    except (ValueError, OSError, AttributeError):
+        return None
+
+
+def probe_hardware(use_gpu):
+    """Describes the machine; used both for tuning and to notice when the hardware changed."""
+    logical = os.cpu_count() or 1
+    physical = psutil.cpu_count(logical=False) if psutil is not None else None
+    gpu_name = torch.cuda.get_device_name(0) if use_gpu and torch.cuda.is_available() else None
+    return {
+        "platform": platform.platform(),
+        "logical_cpus": logical,
+        "physical_cpus": physical or logical,
+        "available_memory_mb": _available_memory_mb(),
+        "gpu": gpu_name,
+        "torch": torch.__version__,
+    }
+
+
+def _fingerprint(hardware):
+    # Available memory changes from run to run, so it is not part of the fingerprint.
+    return {k: v for k, v in hardware.items() if k != "available_memory_mb"}
+
+
+# ---------------- Helper: Calibration ----------------
+def _synthetic_crops(count, seed=0):
+    """Text crops about the size of a header or spark ROI, with random text."""
+    rng = random.Random(seed)
+    crops = []
+    for _ in range(count):
+        img = np.full((48, 360, 3), 245, dtype=np.uint8)
+        text = "".join(rng.choice(string.ascii_letters + "    ") for _ in range(16)).strip() or "Speed"
+        cv2.putText(img, text, (8, 34), cv2.FONT_HERSHEY_SIMPLEX, 0.9, (40, 40, 40), 2, cv2.LINE_AA)
+        crops.append(img)
+    return crops
+
+
+def _measure_throughput(reader, crops, num_workers, torch_threads):
+    """Crops per second when `num_workers` threads share the reader."""
+    torch.set_num_threads(torch_threads)
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=num_workers) as pool:
+        list(pool.map(reader.readtext, crops))
+    return len(crops) / (time.perf_counter() - start)
+
+
+def calibrate(reader, hardware):
+    """
+    Tries a few worker/torch-thread splits on synthetic crops and returns the fastest one.
+    Takes a few seconds on a typical CPU.
+    """
+    mode = "gpu" if hardware["gpu"] else "cpu"
+    cores = hardware["physical_cpus"]
+    max_workers = cores
+    if hardware["available_memory_mb"]:
+        max_workers = min(max_workers, max(1, hardware["available_memory_mb"] // MEMORY_PER_WORKER_MB))
+    if mode == "gpu":
+        # Workers only overlap CPU pre/post-processing with the single GPU.
+        max_workers = min(max_workers, 2)
+
+    crops = _synthetic_crops(CALIBRATION_CROPS * 2)
+    reader.readtext(crops[0])  # Warm-up: first call initialises kernels and caches.
+
+    throughput = {}
+    for num_workers in [w for w in WORKER_CANDIDATES if w <= max_workers]:
+        torch_threads = max(1, cores // num_workers)
+        throughput[(num_workers, torch_threads)] = _measure_throughput(
+            reader, crops[:max(CALIBRATION_CROPS, num_workers * 2)], num_workers, torch_threads)
+        logger.info(f"Calibration: {num_workers} worker(s) x {torch_threads} torch thread(s): "
+                    f"{throughput[(num_workers, torch_threads)]:.1f} crops/s")
+    num_workers, torch_threads = max(throughput, key=throughput.get)
+
+    return {
+        "mode": mode,
+        "num_workers": num_workers,
+        "torch_threads": torch_threads,
+        "crops_per_second": round(throughput[(num_workers, torch_threads)], 2),
+    }
+
+
+# ---------------- Public API ----------------
+def load_or_calibrate(reader, profile_path, autotune_config, use_gpu, retune=False):
+    """
+    Returns the tuning for this machine. A stored profile is reused as long as the hardware
+    fingerprint matches; otherwise (or with `retune`) calibration runs and the result is
+    saved to `profile_path`. Non-null NUM_WORKERS / TORCH_THREADS values in
+    `autotune_config` override the tuned values.
+    """
+    hardware = probe_hardware(use_gpu)
+    profile = None
+    if not retune and os.path.exists(profile_path):
+        try:
+            with open(profile_path, "r", encoding="utf-8") as f:
+                stored = json.load(f)
+            if stored.get("fingerprint") == _fingerprint(hardware):
+                profile = stored
+        except (IOError, OSError, json.JSONDecodeError) as e:
+            logger.warning(f"Could not read hardware profile {profile_path}: {e}")
+
+    if profile is None:
+        logger.info("Calibrating workers and OCR threads for this machine...")
+        profile = {
+            "fingerprint": _fingerprint(hardware),
+            "calibrated_at": datetime.now().isoformat(timespec="seconds"),
+            "tuning": calibrate(reader, hardware),
+        }
+        try:
+            os.makedirs(os.path.dirname(profile_path), exist_ok=True)
+            with open(profile_path, "w", encoding="utf-8") as f:
+                json.dump(profile, f, indent=2)
+        except (IOError, OSError) as e:
+            logger.warning(f"Could not save hardware profile {profile_path}: {e}")
+
+    return _apply_overrides(dict(profile["tuning"]), autotune_config)
+
+
+def default_tuning(requested_workers, autotune_config, use_gpu):
+    """
+    The tuning used when calibration is off: `requested_workers` capped by available RAM
+    (and to 2 in GPU mode, as calibration does), with torch's cores split evenly between
+    the workers so the threads don't oversubscribe the CPU. Costs only a hardware probe.
+    """
+    hardware = probe_hardware(use_gpu)
+    num_workers = max(1, requested_workers)
+    if hardware["available_memory_mb"]:
+        num_workers = min(num_workers, max(1, hardware["available_memory_mb"] // MEMORY_PER_WORKER_MB))
+    if hardware["gpu"]:
+        num_workers = min(num_workers, 2)
+    tuning = {
+        "mode": "gpu" if hardware["gpu"] else "cpu",
+        "num_workers": num_workers,
+        "torch_threads": max(1, hardware["physical_cpus"] // num_workers),
+    }
+    return _apply_overrides(tuning, autotune_config)
+
+
+def _apply_overrides(tuning, autotune_config):
+    """Non-null NUM_WORKERS / TORCH_THREADS values in `autotune_config` win over `tuning`."""
+    for key in ("num_workers", "torch_threads"):
+        override = autotune_config.get(key.upper())
+        if override:
+            tuning[key] = override
+    logger.info(f"Tuning: {tuning['num_workers']} worker(s), {tuning['torch_threads']} torch thread(s) "
+                f"({tuning['mode']} mode).")
+    return tuning
+
+
+def apply_tuning(tuning):
+    """Applies the process-wide part of the tuning (torch's intra-op thread pool)."""
+    torch.set_num_threads(tuning["torch_threads"])
@@ -145,8 +145,8 @@ def update_all_runners(
         print(f"Detected {len(conflicts)} conflicts. Writing to {conflicts_file}")
         with open(conflicts_file, 'w', encoding='utf-8') as f:
             json.dump(conflicts, f, indent=2)
-        new_runners_df = new_runners_df[~new_runners_df['entry_hash'].isin(hashes_with_conflicts)]
-        if new_runners_df.empty:
+        new_runners_df_filtered = new_runners_df[~new_runners_df['entry_hash'].isin(hashes_with_conflicts)]
+        if new_runners_df_filtered.empty:
             print("All new entries have conflicts. 'all_runners.json' will not be updated until resolved.")
             return
     else:
@@ -182,7 +182,13 @@ def update_all_runners(
         skill_order_map 
     )
     
-    with open(output_file, 'w', encoding='utf-8') as f:
+    # Write to a temporary file and swap it in, so an interrupted write never leaves a
+    # truncated all_runners.json behind.
+    tmp_file = output_file + ".tmp"
+    with open(tmp_file, 'w', encoding='utf-8') as f:
         f.write(formatted_json_string)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_file, output_file)
 
     print(f"Successfully updated {output_file} with {len(new_runners_df_filtered)} new/updated entries.")
\ No newline at end of file
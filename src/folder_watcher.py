@@ -0,0 +1,157 @@
+import os
+import time
+import threading
+import logging
+
+try:
+    # Native filesystem events (inotify on Linux, ReadDirectoryChangesW on Windows).
+    from watchdog.observers import Observer
+    from watchdog.events import FileSystemEventHandler
+except ImportError:
+    Observer = None
+    FileSystemEventHandler = object
+
+logger = logging.getLogger(__name__)
+
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg")
+LOOSE_GROUP = ""  # Key used for images sitting directly in the input folder.
+IDLE_RESCAN_SECONDS = 30
+
+
+class _WakeHandler(FileSystemEventHandler):
+    """Sets a threading.Event whenever anything changes below the watched folder."""
+    def __init__(self, wake_event):
+        super().__init__()
+        self.wake_event = wake_event
+
+    def on_any_event(self, event):
+        self.wake_event.set()
+
+
+class FolderWatcher:
+    """
+    Watches the input folder for new screenshots and reports groups of images that are
+    ready to be processed. A group is either a character subfolder or the set of loose
+    images in the input folder itself. A group becomes ready once its files have stopped
+    changing for `debounce_seconds`, so half-copied batches are never picked up.
+
+    Filesystem events are used to wake up early when watchdog is installed; otherwise the
+    folder is polled every `poll_interval` seconds.
+    """
+    def __init__(self, input_folder, debounce_seconds=5.0, poll_interval=2.0):
+        self.input_folder = input_folder
+        self.debounce_seconds = debounce_seconds
+        self.poll_interval = poll_interval
+        self.stop_event = threading.Event()
+        self._wake_event = threading.Event()
+        self._observer = None
+        # group -> (signature, time the signature was first seen)
+        self._pending = {}
+        # group -> signature that was last handed out as ready
+        self._handled = {}
+
+    def start(self):
+        if Observer is not None:
+            try:
+                self._observer = Observer()
+                self._observer.schedule(_WakeHandler(self._wake_event), self.input_folder, recursive=True)
+                self._observer.start()
+                logger.info(f"Watching {self.input_folder} using filesystem events.")
+                return
+            except Exception as e:
+                logger.warning(f"Filesystem events unavailable ({e}). Falling back to polling.")
+                self._observer = None
+        logger.info(f"Watching {self.input_folder} by polling every {self.poll_interval}s.")
+
+    def stop(self):
+        self.stop_event.set()
+        self._wake_event.set()
+        if self._observer is not None:
+            self._observer.stop()
+            self._observer.join()
+            self._observer = None
+
+    def _snapshot(self):
+        """Returns a dict mapping group -> signature of the image files it contains."""
+        groups = {}
+        try:
+            entries = list(os.scandir(self.input_folder))
+        except FileNotFoundError:
+            return groups
+
+        loose = []
+        for entry in entries:
+            try:
+                if entry.is_file() and entry.name.lower().endswith(IMAGE_EXTENSIONS):
+                    st = entry.stat()
+                    loose.append((entry.name, st.st_size, st.st_mtime_ns))
+                elif entry.is_dir():
+                    files = []
+                    for sub in os.scandir(entry.path):
+                        if sub.is_file() and sub.name.lower().endswith(IMAGE_EXTENSIONS):
+                            st = sub.stat()
+                            files.append((sub.name, st.st_size, st.st_mtime_ns))
+                    if files:
+                        groups[entry.name] = tuple(sorted(files))
+            except FileNotFoundError:
+                # The file or folder was moved away while we were looking at it.
+                continue
+        if loose:
+            groups[LOOSE_GROUP] = tuple(sorted(loose))
+        return groups
+
+    def poll(self):
+        """
+        Rescans the input folder once and returns the groups that have settled since
+        the last call. Loose images are reported with the key LOOSE_GROUP.
+        """
+        now = time.monotonic()
+        snapshot = self._snapshot()
+
+        # Forget groups that disappeared (e.g. moved to processed_images).
+        for group in list(self._pending):
+            if group not in snapshot:
+                del self._pending[group]
+        for group in list(self._handled):
+            if group not in snapshot:
+                del self._handled[group]
+
+        ready = []
+        for group, signature in snapshot.items():
+            if self._handled.get(group) == signature:
+                continue
+            pending = self._pending.get(group)
+            if pending is None or pending[0] != signature:
+                self._pending[group] = (signature, now)
+                continue
+            if now - pending[1] >= self.debounce_seconds:
+                ready.append(group)
+                self._handled[group] = signature
+                del self._pending[group]
+        return ready
+
+    def mark_handled(self, group):
+        """Records the current contents of a group as processed so it is not reported again."""
+        signature = self._snapshot().get(group)
+        if signature is not None:
+            self._handled[group] = signature
+        self._pending.pop(group, None)
+
+    def watch(self):
+        """Yields lists of ready groups until stop() is called."""
+        self.start()
+        try:
+            while not self.stop_event.is_set():
+                ready = self.poll()
+                if ready:
+                    yield ready
+                    continue
+                if self._observer is not None and not self._pending:
+                    # Nothing is settling, so sleep until the filesystem tells us otherwise.
+                    # The timeout is only a safety net for filesystems that drop events.
+                    self._wake_event.wait(IDLE_RESCAN_SECONDS)
+                else:
+                    self._wake_event.wait(self.poll_interval)
+                self._wake_event.clear()
+        finally:
+            self.stop()
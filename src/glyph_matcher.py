@@ -0,0 +1,189 @@
+import os
+import sys
+import json
+import threading
+import logging
+from difflib import get_close_matches
+
+import cv2
+import numpy as np
+
+import perf
+from data_loader import KNOWN_RUNNERS, KNOWN_SKILLS
+
+logger = logging.getLogger(__name__)
+
+# --- Load Configuration ---
+if getattr(sys, 'frozen', False):
+    BUNDLED_ROOT = sys._MEIPASS
+    CONFIG_PATH = os.path.join(BUNDLED_ROOT, 'src', 'config.json')
+    BASE_DIR = os.path.dirname(sys.executable)
+else:
+    CONFIG_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'config.json')
+    BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+with open(CONFIG_PATH, 'r') as f:
+    config = json.load(f)
+
+GLYPH_MATCHER_CONFIG = config["GLYPH_MATCHER"]
+TEMPLATE_DIR = os.path.join(BASE_DIR, "data", "glyph_templates")
+
+TEMPLATE_SIZE = (192, 24)  # (width, height) every label bitmap is normalized to
+TEMPLATE_VERSION = 2  # Version 1 files may hold skill rows paired with the wrong label
+MAX_ASPECT_RATIO_CHANGE = 1.25
+# A read is only harvested if no other vocabulary entry is this similar to it
+# (e.g. skills that differ only in a trailing symbol).
+MAX_RUNNER_UP_RATIO = 0.9
+
+
+# ---------------- Helper: Normalization ----------------
+def _normalize_label(crop):
+    """
+    Cuts a label crop down to its ink (dark text, Otsu threshold), resizes it to
+    TEMPLATE_SIZE and returns it as a zero-mean, unit-norm vector together with the ink's
+    aspect ratio. Returns (None, None) if the crop holds no ink.
+    """
+    if crop is None or crop.size == 0:
+        return None, None
+    gray = cv2.cvtColor(crop, cv2.COLOR_BGR2GRAY) if crop.ndim == 3 else crop
+    _, ink = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU)
+    ys, xs = np.nonzero(ink)
+    if ys.size == 0:
+        return None, None
+    y1, y2, x1, x2 = ys.min(), ys.max() + 1, xs.min(), xs.max() + 1
+    glyphs = cv2.resize(gray[y1:y2, x1:x2], TEMPLATE_SIZE, interpolation=cv2.INTER_AREA).astype(np.float32).ravel()
+    glyphs -= glyphs.mean()
+    norm = np.linalg.norm(glyphs)
+    if norm == 0:
+        return None, None
+    return glyphs / norm, (x2 - x1) / (y2 - y1)
+
+
+class GlyphMatcher:
+    """
+    Recognizes labels from a closed vocabulary rendered in the game font by comparing the
+    crop against reference bitmaps, one per label. References are harvested from crops that
+    the OCR read confidently, exactly and unambiguously as a vocabulary entry, and kept in
+    data/glyph_templates/<kind>.npz between runs. match() scores a crop against all
+    references at once (normalized cross-correlation as one matrix-vector product); below
+    GLYPH_MATCHER.THRESHOLD it returns None and the caller falls back to OCR.
+    """
+    def __init__(self, kind, vocabulary, threshold, harvest_min_confidence, template_dir=TEMPLATE_DIR):
+        self.kind = kind
+        self.vocabulary = set(vocabulary)
+        self._vocabulary_list = list(self.vocabulary)
+        self.threshold = threshold
+        self.harvest_min_confidence = harvest_min_confidence
+        self.path = os.path.join(template_dir, f"{kind}.npz")
+        self._lock = threading.Lock()
+        self._labels = []
+        self._templates = np.zeros((0, TEMPLATE_SIZE[0] * TEMPLATE_SIZE[1]), dtype=np.float32)
+        self._aspects = np.zeros(0, dtype=np.float32)
+        self._dirty = False
+        self._load()
+
+    def __len__(self):
+        return len(self._labels)
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            with np.load(self.path) as data:
+                if "version" not in data or int(data["version"]) != TEMPLATE_VERSION:
+                    logger.warning(f"Ignoring glyph templates {self.path} from an older version; they will be harvested again.")
+                    return
+                self._labels = [str(label) for label in data["labels"]]
+                self._templates = data["templates"].astype(np.float32)
+                self._aspects = data["aspects"].astype(np.float32)
+            logger.info(f"Loaded {len(self._labels)} {self.kind} glyph templates from {self.path}.")
+        except (IOError, OSError, KeyError, ValueError) as e:
+            logger.warning(f"Could not read glyph templates {self.path}: {e}")
+
+    def match(self, crop):
+        """Returns (label, score) of the best reference, or (None, score) below the threshold."""
+        vector, aspect = _normalize_label(crop)
+        with self._lock:
+            labels, templates, aspects = self._labels, self._templates, self._aspects
+        if vector is None or not labels:
+            return None, 0.0
+
+        scores = templates @ vector
+        # References whose ink is much wider or narrower than the crop's can't be the same label.
+        ratio = aspects / aspect
+        scores[(ratio > MAX_ASPECT_RATIO_CHANGE) | (ratio < 1 / MAX_ASPECT_RATIO_CHANGE)] = -1.0
+        best = int(np.argmax(scores))
+        score = float(scores[best])
+        if score < self.threshold:
+            perf.count(f"glyph_{self.kind}_misses")
+            return None, score
+        perf.count(f"glyph_{self.kind}_hits")
+        return labels[best], score
+
+    def harvest(self, crop, text, confidence):
+        """Stores `crop` as the reference of `text` if it is a confident, exact and unambiguous vocabulary read."""
+        text = text.strip()
+        if confidence < self.harvest_min_confidence or text not in self.vocabulary:
+            return
+        with self._lock:
+            if text in self._labels:
+                return
+        if not self._is_unambiguous(text):
+            return
+        vector, aspect = _normalize_label(crop)
+        if vector is None:
+            return
+        with self._lock:
+            if text in self._labels:
+                return
+            # New arrays rather than in-place growth, so concurrent match() calls keep a consistent snapshot.
+            self._labels = self._labels + [text]
+            self._templates = np.vstack([self._templates, vector[None, :]])
+            self._aspects = np.append(self._aspects, np.float32(aspect))
+            self._dirty = True
+
+    def _is_unambiguous(self, text):
+        """True if `text` is the only vocabulary entry the fuzzy match finds at MAX_RUNNER_UP_RATIO or above."""
+        matches = get_close_matches(text, self._vocabulary_list, n=2, cutoff=MAX_RUNNER_UP_RATIO)
+        return matches == [text]
+
+    def save(self):
+        with self._lock:
+            if not self._dirty:
+                return
+            labels, templates, aspects = self._labels, self._templates, self._aspects
+            self._dirty = False
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            tmp_path = self.path + ".tmp.npz"
+            np.savez_compressed(tmp_path, version=TEMPLATE_VERSION, labels=np.array(labels),
+                                templates=templates, aspects=aspects)
+            os.replace(tmp_path, self.path)
+            logger.info(f"Saved {len(labels)} {self.kind} glyph templates to {self.path}.")
+        except (IOError, OSError) as e:
+            logger.warning(f"Could not save glyph templates {self.path}: {e}")
+
+
+# ---------------- Public API ----------------
+_matchers = {}
+_matchers_lock = threading.Lock()
+
+
+def get_matcher(kind):
+    """Returns the shared GlyphMatcher for "names" or "skills", or None when GLYPH_MATCHER is disabled."""
+    if not GLYPH_MATCHER_CONFIG["ENABLED"]:
+        return None
+    with _matchers_lock:
+        if kind not in _matchers:
+            vocabulary = KNOWN_RUNNERS if kind == "names" else KNOWN_SKILLS
+            _matchers[kind] = GlyphMatcher(kind, vocabulary, GLYPH_MATCHER_CONFIG["THRESHOLD"],
+                                           GLYPH_MATCHER_CONFIG["HARVEST_MIN_CONFIDENCE"])
+        return _matchers[kind]
+
+
+def save_matchers():
+    """Writes newly harvested references of every matcher to disk."""
+    with _matchers_lock:
+        matchers = list(_matchers.values())
+    for matcher in matchers:
+        matcher.save()
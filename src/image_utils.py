@@ -1,8 +1,12 @@
 import cv2
+import numpy as np
 import json
 import os
 import logging
 import sys
+import threading
+from collections import OrderedDict
+from PIL import Image
 
 # --- Load Configuration ---
 if getattr(sys, 'frozen', False):
@@ -17,6 +21,7 @@ with open(CONFIG_PATH, 'r') as f:
 ROI_MOBILE = config["ROI_MOBILE"]
 MOBILE_SCREENSHOT_HEIGHT_THRESHOLD = config["MOBILE_SCREENSHOT_HEIGHT_THRESHOLD"]
 MOBILE_ROI_SHIFT = config["MOBILE_ROI_SHIFT"]
+LOW_MEMORY = config["LOW_MEMORY"]
 
 logger = logging.getLogger(__name__)
 
@@ -50,3 +55,119 @@ def crop_rois(img, layout):
                 y2 = max(y1, y2 - shift)
             rois[k] = img[y1:y2, x1:x2]
     return rois, img
+
+def stitch_images_bgr(image_paths):
+    """
+    Places screenshots side by side in a single preallocated BGR buffer.
+    Image sizes are read from the file headers first so the canvas can be allocated once,
+    then each screenshot is decoded and written into its own slice of it. Returns the
+    canvas and a list of per-screenshot views into it (no extra copies).
+    """
+    sizes = []
+    for p in image_paths:
+        with Image.open(p) as img:
+            sizes.append(img.size)
+    total_width = sum(w for w, _ in sizes)
+    max_height = max(h for _, h in sizes)
+
+    canvas = np.zeros((max_height, total_width, 3), dtype=np.uint8)
+    views = []
+    x_offset = 0
+    for p, (w, h) in zip(image_paths, sizes):
+        view = canvas[:h, x_offset:x_offset + w]
+        # Ignore EXIF orientation so the layout matches the raw pixel grid, as PIL does.
+        decoded = cv2.imread(p, cv2.IMREAD_COLOR | cv2.IMREAD_IGNORE_ORIENTATION)
+        if decoded is None:
+            logger.error(f"Could not read image: {p}")
+        else:
+            view[:decoded.shape[0], :decoded.shape[1]] = decoded[:h, :w]
+        views.append(view)
+        x_offset += w
+    return canvas, views
+
+def crop_box(img, box):
+    """
+    Crops an (x1, y1, x2, y2) box from an image array. Returns a view when the box lies
+    inside the image; boxes that cross the border are zero-padded like PIL's crop().
+    """
+    x1, y1, x2, y2 = (int(round(v)) for v in box)
+    h, w = img.shape[:2]
+    if 0 <= x1 <= x2 <= w and 0 <= y1 <= y2 <= h:
+        return img[y1:y2, x1:x2]
+
+    out = np.zeros((max(0, y2 - y1), max(0, x2 - x1)) + img.shape[2:], dtype=img.dtype)
+    sx1, sy1 = max(0, x1), max(0, y1)
+    sx2, sy2 = min(w, x2), min(h, y2)
+    if sx1 < sx2 and sy1 < sy2:
+        out[sy1 - y1:sy2 - y1, sx1 - x1:sx2 - x1] = img[sy1:sy2, sx1:sx2]
+    return out
+
+
+def image_nbytes(img):
+    """Approximate in-memory size of a NumPy array or PIL image."""
+    if isinstance(img, np.ndarray):
+        return img.nbytes
+    if isinstance(img, Image.Image):
+        return img.width * img.height * len(img.getbands())
+    return 0
+
+class ByteCappedCache:
+    """
+    Thread-safe LRU cache bounded by the total size of its values rather than their count.
+    Once more than `max_bytes` are held, the least recently used entries are dropped.
+    `max_bytes=None` means unbounded. `size_fn` returns the size of a value (images by
+    default); a value larger than the whole budget is simply not cached.
+    """
+    def __init__(self, max_bytes=None, size_fn=image_nbytes):
+        self.max_bytes = max_bytes
+        self.size_fn = size_fn
+        self.nbytes = 0
+        self._entries = OrderedDict()  # key -> (value, size)
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._entries
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return default
+            self._entries.move_to_end(key)
+            return entry[0]
+
+    def pop(self, key, default=None):
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is None:
+                return default
+            self.nbytes -= entry[1]
+            return entry[0]
+
+    def __setitem__(self, key, value):
+        size = self.size_fn(value)
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.nbytes -= old[1]
+            if self.max_bytes is not None and size > self.max_bytes:
+                return
+            self._entries[key] = (value, size)
+            self.nbytes += size
+            while self.max_bytes is not None and self.nbytes > self.max_bytes:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self.nbytes -= evicted_size
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.nbytes = 0
+
+def low_memory_cache_bytes():
+    """Byte budget for image caches when LOW_MEMORY is enabled in the config, else None."""
+    return LOW_MEMORY["IMAGE_CACHE_MB"] * 1024 * 1024 if LOW_MEMORY["ENABLED"] else None
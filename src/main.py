@@ -15,7 +15,6 @@ if getattr(sys, 'frozen', False) and len(sys.argv) > 1:
 
 import cv2
 import numpy as np
-import easyocr
 import pandas as pd
 import hashlib
 import shutil
@@ -25,24 +24,36 @@ import threading
 import logging
 import re
 import io
-from typing import Optional
+from typing import Optional, Dict
 import json
+import argparse
 from multiprocessing import cpu_count
 from datetime import datetime
 from tqdm import tqdm
-import subprocess
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
 import torch
 import warnings
 
 from schema import init_schema, CharacterData
 from umamusume_parser import parse_umamusume
 from spark_parser import parse_sparks
-from roi_selector_gui import get_entries, combine_images_horizontally
+from roi_selector_gui import get_entries, get_entry_images
 from roi_detector import detect_spark_zones
-from tabs import detect_active_tab
 from data_updater import update_all_runners
-from ocr_utils import normalize_name
-from image_utils import select_layout, crop_rois, load_image
+from ocr_utils import normalize_name, DIGIT_ALLOWLIST
+from image_utils import select_layout, crop_rois, load_image, crop_box, ByteCappedCache
+from result_stream import RunJournal
+from folder_watcher import FolderWatcher, LOOSE_GROUP
+from scan_server import serve
+import perf
+from ocr_accounting import AccountingReader
+from ocr_memo import MemoReader
+from ocr_backends import create_reader
+from glyph_matcher import save_matchers
+from roi_review import export_review, REVIEW_PATH
+from autotune import load_or_calibrate, default_tuning, apply_tuning
+from profiling import SamplingProfiler, write_profile
 
 # --- Path Configuration ---
 # Detects if running as a script or a frozen executable (.exe)
@@ -81,10 +92,19 @@ with open(CONFIG_PATH, 'r') as f:
 
 OCR_READER_CONFIG = config["OCR_READER_CONFIG"]
 DEFAULT_NUM_PROCESSES_OFFSET = config["DEFAULT_NUM_PROCESSES_OFFSET"]
+AUTOTUNE_CONFIG = config["AUTOTUNE"]
+LOW_MEMORY_CONFIG = config["LOW_MEMORY"]
 LOG_LEVEL = config["LOG_LEVEL"]
 LOG_FORMAT = config["LOG_FORMAT"]
+OCR_MEMO_MAX_ENTRIES = config["OCR_MEMO_MAX_ENTRIES"]
+PERF_TRACE = config["PERF_TRACE"]
+PROFILING_CONFIG = config["PROFILING"]
+SPARK_ROI_DETECTION_WORKERS = config["SPARK_ROI_DETECTION"]["MAX_WORKERS"]
 logger = logging.getLogger(__name__)
 
+# Worker thread count; capped by available RAM (or replaced by the calibrated value) at startup.
+NUM_WORKERS = max(1, cpu_count() - DEFAULT_NUM_PROCESSES_OFFSET)
+
 # --- Runner Skill Mapping ---
 # Loads a JSON file mapping in-game skills to specific runners. This map is
 # reversed to allow identifying a runner based on their unique green skill,
@@ -218,30 +238,46 @@ def _find_and_crop_match_from_master(master_img_gray: Image.Image, template_face
     return master_img_gray.crop((orig_x, orig_y, orig_x + orig_w, orig_y + orig_h))
 
 # --- Character Portrait Identification Engine ---
-MASTER_IMAGE_CACHE = {}
+# Grayscale master portraits by identifier. Every portrait lookup scans all masters in the
+# same order, so an LRU cap smaller than the whole set would evict each master right before
+# it is needed again; they are kept for the whole run, in low-memory mode too.
+MASTER_IMAGE_CACHE = ByteCappedCache()
+MASTER_IMAGE_PATHS = {}
 PROFILE_IMAGES_DIR = os.path.join(BASE_DIR, 'assets', 'profile_images')
 
+def _list_master_images():
+    """Finds the master portraits (*_c.png / *_c.jpg) once and returns identifier -> path."""
+    global MASTER_IMAGE_PATHS
+    if not MASTER_IMAGE_PATHS and os.path.isdir(PROFILE_IMAGES_DIR):
+        MASTER_IMAGE_PATHS = {
+            os.path.splitext(f)[0]: os.path.join(PROFILE_IMAGES_DIR, f)
+            for f in sorted(os.listdir(PROFILE_IMAGES_DIR)) if f.lower().endswith(('_c.png', '_c.jpg'))
+        }
+    return MASTER_IMAGE_PATHS
+
+def _iter_master_images():
+    """Yields (identifier, grayscale master) pairs, loading masters missing from the cache."""
+    for identifier, img_path in _list_master_images().items():
+        master_img_gray = MASTER_IMAGE_CACHE.get(identifier)
+        if master_img_gray is not None:
+            perf.count("portrait_master_cache_hits")
+        else:
+            perf.count("portrait_master_cache_misses")
+            try:
+                master_img_gray = _convert_to_grayscale_with_white_bg(Image.open(img_path))
+            except Exception as e:
+                logger.error(f"Could not load master image {os.path.basename(img_path)}: {e}")
+                continue
+            MASTER_IMAGE_CACHE[identifier] = master_img_gray
+        yield identifier, master_img_gray
+
 def _identify_portrait(screenshot_portrait_img: Image.Image, debug_filename: str) -> str:
     """
     Identifies a character by comparing a cropped portrait from a screenshot against a library of master images.
     It uses template matching and calculates the sum of squared differences to find the best match.
     """
-    global MASTER_IMAGE_CACHE
-
-    # Load master images into a cache on the first run.
-    if not MASTER_IMAGE_CACHE:
-        if os.path.isdir(PROFILE_IMAGES_DIR):
-            for f in os.listdir(PROFILE_IMAGES_DIR):
-                if f.lower().endswith(('_c.png', '_c.jpg')):
-                    identifier = os.path.splitext(f)[0]
-                    try:
-                        img_path = os.path.join(PROFILE_IMAGES_DIR, f)
-                        master_img = Image.open(img_path)
-                        MASTER_IMAGE_CACHE[identifier] = _convert_to_grayscale_with_white_bg(master_img)
-                    except Exception as e:
-                        logger.error(f"Could not load master image {f}: {e}")
-    if not MASTER_IMAGE_CACHE:
-        logger.error("Master image cache is empty."); return "Unknown"
+    if not _list_master_images():
+        logger.error("No master images found."); return "Unknown"
 
     best_match_identifier = "Unknown"
     lowest_diff = float('inf')
@@ -254,7 +290,7 @@ def _identify_portrait(screenshot_portrait_img: Image.Image, debug_filename: str
 
     #os.makedirs(DEBUG_MASTER_FACES_DIR, exist_ok=True)
     # Compare the target face against each master image.
-    for identifier, master_img_gray in MASTER_IMAGE_CACHE.items():
+    for identifier, master_img_gray in _iter_master_images():
         angles = [0]
 
         master_face_img = _find_and_crop_match_from_master(master_img_gray, target_face_img, angles)
@@ -283,13 +319,15 @@ def _identify_portrait(screenshot_portrait_img: Image.Image, debug_filename: str
     else:
         return "Unknown"
 
-def process_folder(folder_name, all_rois, reader) -> Optional[tuple[str, CharacterData]]:
+@perf.timed("process_folder")
+def process_folder(folder_name, all_rois, reader, input_folder=None) -> Optional[tuple[str, CharacterData]]:
     """
     Main processing function for a single character folder. It orchestrates OCR parsing for
-    stats and skills, identifies grandparents, and extracts spark data.
+    stats and skills, identifies grandparents, and extracts spark data. The folder is looked
+    up in `input_folder`, which defaults to the scanner's input_images directory.
     """
     logger.info(f"--- Starting to process folder: {folder_name} ---")
-    folder_path = os.path.join(INPUT_FOLDER, folder_name)
+    folder_path = os.path.join(input_folder or INPUT_FOLDER, folder_name)
     if not os.path.isdir(folder_path):
         return None
 
@@ -300,9 +338,11 @@ def process_folder(folder_name, all_rois, reader) -> Optional[tuple[str, Charact
     # --- Parser 1: Extract Main Stats and Skills ---
     # Iterates through all images in the folder to parse and aggregate character stats,
     # rankings, and skills using the `parse_umamusume` function.
+    folder_context = {}
     for img_path in image_paths:
         try:
-            result = parse_umamusume(img_path, reader)
+            with perf.span("parse_umamusume"):
+                result = parse_umamusume(img_path, reader, folder_context)
             if not result: continue
             if result.name and not character_data.name: character_data.name = result.name
             if result.score and not character_data.score: character_data.score = result.score
@@ -322,11 +362,15 @@ def process_folder(folder_name, all_rois, reader) -> Optional[tuple[str, Charact
     rois_list = all_rois.get(folder_name, [])
     if not rois_list: return folder_name, character_data
 
-    spark_image_paths = [p for p in image_paths if detect_active_tab(p) == "inspiration"]
-    if not spark_image_paths: return folder_name, character_data
+    # Zones are given per inspiration screenshot, so only one screenshot is held in memory
+    # at a time. The most recently used one is kept since consecutive zones often share it.
+    loaded_screenshot = {"path": None, "img": None}
+    def get_screenshot(path):
+        if loaded_screenshot["path"] != path:
+            loaded_screenshot["img"] = load_image(path)
+            loaded_screenshot["path"] = path
+        return loaded_screenshot["img"]
 
-    # Combines multiple inspiration screenshots into one wide image for easier processing.
-    combined_img = combine_images_horizontally(spark_image_paths)
     final_sparks_list = []
     roi_type_map = ["parent", "gp1", "gp2"]
     character_data.parent = character_data.name
@@ -337,15 +381,17 @@ def process_folder(folder_name, all_rois, reader) -> Optional[tuple[str, Charact
         if roi_idx >= len(roi_type_map): break
 
         current_roi_type = roi_type_map[roi_idx]
-        _, roi_box, _ = roi_data
-
-        roi_crop_pil = combined_img.crop(roi_box)
-        roi_cv_crop = cv2.cvtColor(np.array(roi_crop_pil), cv2.COLOR_RGB2BGR)
+        _, (image_index, roi_box), spark_image_paths = roi_data
         identified_name = "Unknown"
 
         try:
+            screenshot = get_screenshot(spark_image_paths[image_index])
+            if screenshot is None: continue
+            roi_cv_crop = crop_box(screenshot, roi_box)
+
             # Step 1: Always parse sparks from the ROI.
-            sparks_result = parse_sparks(roi_cv_crop, reader)
+            with perf.span("parse_sparks"):
+                sparks_result = parse_sparks(roi_cv_crop, reader)
             for color, sparks_list_data in sparks_result.items():
                 for spark in sparks_list_data:
                     logger.debug(f"Detected spark for {folder_name} ({current_roi_type}): Color='{color}', Name='{spark['name']}', Stars='{spark['count']}'")
@@ -366,9 +412,10 @@ def process_folder(folder_name, all_rois, reader) -> Optional[tuple[str, Charact
                     logger.info(f"Green Spark ID for {folder_name} failed for {current_roi_type}. Falling back to image comparison.")
                     x1, y1, x2, y2 = roi_box
                     portrait_box = (x1 - 110, y1 + 9, x1 - 20, y1 + 125)
-                    portrait_image = combined_img.crop(portrait_box)
+                    portrait_image = Image.fromarray(cv2.cvtColor(crop_box(screenshot, portrait_box), cv2.COLOR_BGR2RGB))
                     debug_filename = f"{folder_name}_{current_roi_type}.png"
-                    identified_name = _identify_portrait(portrait_image, debug_filename)
+                    with perf.span("identify_portrait"):
+                        identified_name = _identify_portrait(portrait_image, debug_filename)
 
             # Step 5: Store the final identified name.
             if current_roi_type == "gp1": character_data.gp1 = identified_name
@@ -401,44 +448,62 @@ def processing_worker(q, final_results, lock, reader):
             folder_name, rois = q.get()
             if folder_name is None: break
             single_folder_rois = {folder_name: rois}
-            _, character_data = process_folder(folder_name, single_folder_rois, reader)
+            result = process_folder(folder_name, single_folder_rois, reader)
+            if result is None:
+                # The folder was moved or deleted after it was queued (e.g. in watch mode).
+                logger.warning(f"Skipping {folder_name}: the folder no longer exists.")
+                continue
+            _, character_data = result
             if character_data:
                 with lock:
                     final_results[folder_name] = character_data
+        except Exception as e:
+            logger.error(f"Failed to process {folder_name}: {e}")
         finally:
             q.task_done()
 
 def _move_processed_folders(folder_names):
     """Moves successfully processed folders from the input directory to the completed directory."""
     logger.info(f"\n=== Step 3: Moving processed images to {COMPLETED_FOLDER} ===")
-    os.makedirs(COMPLETED_FOLDER, exist_ok=True)
     for folder_name in folder_names:
-        source_path = os.path.join(INPUT_FOLDER, folder_name)
-        if not os.path.isdir(source_path): continue
-        dest_path = os.path.join(COMPLETED_FOLDER, folder_name)
-        if os.path.exists(dest_path): shutil.rmtree(dest_path)
-        shutil.move(source_path, dest_path)
-        logger.info(f"Moved {folder_name} to {COMPLETED_FOLDER}")
+        _move_processed_folder(folder_name)
+
+def _move_processed_folder(folder_name):
+    """Moves a single processed folder from the input directory to the completed directory."""
+    os.makedirs(COMPLETED_FOLDER, exist_ok=True)
+    source_path = os.path.join(INPUT_FOLDER, folder_name)
+    if not os.path.isdir(source_path): return
+    dest_path = os.path.join(COMPLETED_FOLDER, folder_name)
+    if os.path.exists(dest_path): shutil.rmtree(dest_path)
+    shutil.move(source_path, dest_path)
+    logger.info(f"Moved {folder_name} to {COMPLETED_FOLDER}")
 
 # --- IN image_processor.py ---
 
-def _create_new_runners_dataframe(final_results):
+def _load_existing_runners_index():
+    """Reads the entry_id/entry_hash columns of the current all_runners.json."""
+    all_runners_output_file = os.path.join(BASE_DIR, "data", "all_runners.json")
+    try:
+        existing_all_runners_df = pd.read_json(all_runners_output_file, dtype={'entry_id': str, 'entry_hash': str})
+        if existing_all_runners_df.empty:
+            existing_all_runners_df = pd.DataFrame(columns=['entry_id', 'entry_hash'])
+    except (FileNotFoundError, ValueError):
+        existing_all_runners_df = pd.DataFrame(columns=['entry_id', 'entry_hash'])
+    return existing_all_runners_df
+
+def _create_new_runners_dataframe(final_results, existing_all_runners_df=None):
     """
     Transforms the processed character data into a pandas DataFrame, assigning new or
     existing entry IDs based on a hash of the folder and character name from all_runners.json.
+    A previously loaded `existing_all_runners_df` can be passed to skip re-reading the file.
     """
     logger.info("\n=== Step 4: Creating new runners DataFrame from JSON ===")
     if not final_results:
         logger.info("No new results to process.")
         return pd.DataFrame()
 
-    all_runners_output_file = os.path.join(BASE_DIR, "data", "all_runners.json")
-    try:
-        existing_all_runners_df = pd.read_json(all_runners_output_file, dtype={'entry_id': str, 'entry_hash': str})
-        if existing_all_runners_df.empty:
-            existing_all_runners_df = pd.DataFrame(columns=['entry_id', 'entry_hash'])
-    except (FileNotFoundError, ValueError):
-        existing_all_runners_df = pd.DataFrame(columns=['entry_id', 'entry_hash'])
+    if existing_all_runners_df is None:
+        existing_all_runners_df = _load_existing_runners_index()
 
     entry_hash_to_id = pd.Series(existing_all_runners_df.entry_id.values, index=existing_all_runners_df.entry_hash).to_dict()
     numeric_ids = pd.to_numeric(existing_all_runners_df['entry_id'], errors='coerce').dropna()
@@ -448,34 +513,51 @@ def _create_new_runners_dataframe(final_results):
     for folder_name, character_data in final_results.items():
         if not character_data.name: continue
 
-        current_entry_hash = hashlib.md5(f"{folder_name}_{character_data.name}".encode("utf-8")).hexdigest()
+        current_entry_hash = _entry_hash(folder_name, character_data)
         entry_id = entry_hash_to_id.get(current_entry_hash, str(next_entry_id))
         if entry_id == str(next_entry_id): next_entry_id += 1
 
-        row = {
-            "entry_id": entry_id,
-            "last_updated": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-            "entry_hash": current_entry_hash,
-            "name": character_data.name,
-            "score": character_data.score
-        }
-
-        for stat_name, value in character_data.stats.__dict__.items(): row[stat_name] = value
-        for category, sub in character_data.rankings.__dict__.items():
-            for subcat, grade in sub.items(): row[f"{subcat}"] = grade
-        row["gp1"] = character_data.gp1
-        row["gp2"] = character_data.gp2
-        row["skills"] = character_data.skills
-        row["sparks"] = character_data.sparks
-        new_runners_rows.append(row)
+        new_runners_rows.append(_build_runner_row(folder_name, character_data, entry_id))
 
     return pd.DataFrame(new_runners_rows)
 
+def _folder_fingerprint(folder_path):
+    """Hash of the names, sizes and modification times of a folder's files."""
+    digest = hashlib.md5()
+    for name in sorted(os.listdir(folder_path)):
+        stat = os.stat(os.path.join(folder_path, name))
+        digest.update(f"{name}:{stat.st_size}:{stat.st_mtime_ns};".encode("utf-8"))
+    return digest.hexdigest()
+
+def _entry_hash(folder_name, character_data):
+    """Stable identifier of a scanned runner, derived from its folder and character name."""
+    return hashlib.md5(f"{folder_name}_{character_data.name}".encode("utf-8")).hexdigest()
+
+def _build_runner_row(folder_name, character_data, entry_id=None):
+    """Flattens a CharacterData into the row layout used by all_runners.json."""
+    row = {
+        "entry_id": entry_id,
+        "last_updated": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "entry_hash": _entry_hash(folder_name, character_data),
+        "name": character_data.name,
+        "score": character_data.score
+    }
+
+    for stat_name, value in character_data.stats.__dict__.items(): row[stat_name] = value
+    for category, sub in character_data.rankings.__dict__.items():
+        for subcat, grade in sub.items(): row[f"{subcat}"] = grade
+    row["gp1"] = character_data.gp1
+    row["gp2"] = character_data.gp2
+    row["skills"] = character_data.skills
+    row["sparks"] = character_data.sparks
+    return row
+
 def _group_loose_images(reader):
     """
     Organizes individual image files in the input directory into subfolders. Images are
     grouped based on the character's name, score, and a hash of their stats to ensure
-    all screenshots for a single run are placed together.
+    all screenshots for a single run are placed together. Returns the names of the
+    folders that received images.
     """
     logger.info("\n=== Step 0: Organizing loose images ===")
     stat_keys = config["STAT_KEYS"]
@@ -486,7 +568,7 @@ def _group_loose_images(reader):
     ]
     if not all_images:
         logger.info("No loose images found in input_images. Skipping folder organization.")
-        return False
+        return []
 
     grouped_images = {}
     folder_name_counters = {}
@@ -497,8 +579,10 @@ def _group_loose_images(reader):
             if img is None: continue
             layout = select_layout(img)
             rois, _ = crop_rois(img, layout)
-            ocr_rois = [rois["name"], rois["score"]] + [rois[k] for k in stat_keys]
-            stacked_text = [" ".join(reader.readtext(roi, detail=0, paragraph=False)) for roi in ocr_rois]
+            numeric_rois = [rois["score"]] + [rois[k] for k in stat_keys]
+            stacked_text = [" ".join(reader.readtext(rois["name"], detail=0, paragraph=False))]
+            stacked_text += [" ".join(reader.readtext(roi, detail=0, paragraph=False, allowlist=DIGIT_ALLOWLIST))
+                             for roi in numeric_rois]
             logger.debug(f"Raw OCR text for {os.path.basename(img_path)}: Name='{stacked_text[0]}', Score='{stacked_text[1]}', Stats='{stacked_text[2:]}'")
             name = normalize_name(stacked_text[0]).strip().replace(" ", "_") if len(stacked_text) > 0 else None
             score = re.sub(r"[^0-9]", "", str(stacked_text[1])) if len(stacked_text) > 1 else ""
@@ -518,12 +602,14 @@ def _group_loose_images(reader):
             logger.error(f"Failed to parse {img_path}: {e}")
 
     # Move the grouped images into their respective new folders.
+    grouped_folder_names = []
     for (base_folder_name, stats_hash), img_list in grouped_images.items():
         count = folder_name_counters.get(base_folder_name, 1)
         folder_name = base_folder_name if count == 1 else f"{base_folder_name}_{count}"
         folder_name_counters[base_folder_name] = count + 1
         folder_path = os.path.join(INPUT_FOLDER, folder_name)
         os.makedirs(folder_path, exist_ok=True)
+        grouped_folder_names.append(folder_name)
         for img_path in img_list:
             dest_path = os.path.join(folder_path, os.path.basename(img_path))
             # Handle potential file name collisions.
@@ -535,15 +621,23 @@ def _group_loose_images(reader):
             shutil.move(img_path, dest_path)
 
     logger.info("Images grouped into folders by Name + Score + Stats.")
-    return True
+    return grouped_folder_names
+
+def _detect_folder_rois(folder_name, image_paths, reader):
+    """Detects the parent/grandparent ROIs across a folder's inspiration images."""
+    with perf.span("detect_spark_zones"):
+        detected_rois = detect_spark_zones(image_paths, reader, max_workers=SPARK_ROI_DETECTION_WORKERS)
+    return [(folder_name, roi, image_paths) for roi in detected_rois]
 
-def _run_roi_detection_automatically(processing_q, reader):
+def _run_roi_detection_automatically(processing_q, reader, entries=None):
     """
-    Scans input folders for inspiration images, combines them, detects the regions of
-    interest (ROIs) for parent/grandparents, and adds them to the processing queue.
+    Scans input folders for inspiration images, detects the regions of interest (ROIs)
+    for parent/grandparents in them, and adds them to the processing queue.
+    `entries` can be passed to restrict detection to a known set of folders.
     """
     logger.info("=== Step 1: Running automatic ROI detection ===")
-    entries = get_entries(INPUT_FOLDER)
+    if entries is None:
+        entries = get_entries(INPUT_FOLDER)
     if not entries:
         logger.error(f"No subfolders with inspiration images found in {INPUT_FOLDER}.")
         return []
@@ -553,10 +647,7 @@ def _run_roi_detection_automatically(processing_q, reader):
         image_paths = entries[folder_name]
         logger.info(f"Detecting ROIs for {folder_name}...")
         try:
-            img_original = combine_images_horizontally(image_paths)
-            img_cv = cv2.cvtColor(np.array(img_original), cv2.COLOR_RGB2BGR)
-            detected_rois = detect_spark_zones(img_cv, reader)
-            rois_for_queue = [(folder_name, roi, image_paths) for roi in detected_rois]
+            rois_for_queue = _detect_folder_rois(folder_name, image_paths, reader)
             processing_q.put((folder_name, rois_for_queue))
         except Exception as e:
             logger.error(f"Error processing {folder_name} for ROI detection: {e}")
@@ -565,10 +656,26 @@ def _run_roi_detection_automatically(processing_q, reader):
     logger.info("Automatic ROI detection complete.")
     return list(entries.keys())
 
-def main():
-    """
-    Main execution function that orchestrates the entire scanning and processing pipeline.
-    """
+def _start_workers(processing_q, final_results, results_lock, reader):
+    """Starts the pool of daemon threads that consume folders from the processing queue."""
+    num_workers = NUM_WORKERS
+    logger.info(f"Initializing {num_workers} worker threads for processing.")
+    workers = []
+    for _ in range(num_workers):
+        worker = threading.Thread(target=processing_worker, args=(processing_q, final_results, results_lock, reader))
+        worker.daemon = True
+        worker.start()
+        workers.append(worker)
+    return workers
+
+def _stop_workers(processing_q, workers):
+    """Sends one stop sentinel per worker and waits for all of them to exit."""
+    logger.info("Stopping worker threads...")
+    for _ in range(len(workers)): processing_q.put((None, None))
+    for worker in workers: worker.join()
+
+def _setup_logging():
+    """Configures the root logger to write to a timestamped file in data/logs."""
     logs_folder = os.path.join(DATA_FOLDER, "logs")
 
     os.makedirs(logs_folder, exist_ok=True)
@@ -577,14 +684,14 @@ def main():
     log_filename = f"app_{timestamp}.log"
     log_filepath = os.path.join(logs_folder, log_filename)
 
-    logger = logging.getLogger()
-    logger.setLevel(getattr(logging, LOG_LEVEL))
+    root_logger = logging.getLogger()
+    root_logger.setLevel(getattr(logging, LOG_LEVEL))
     formatter = logging.Formatter(LOG_FORMAT, datefmt="%H:%M:%S")
 
     # Create a handler to write to the log file (as before)
     file_handler = logging.FileHandler(log_filepath, mode='w', encoding='utf-8')
     file_handler.setFormatter(formatter)
-    logger.addHandler(file_handler)
+    root_logger.addHandler(file_handler)
     logging.getLogger("PIL").setLevel(logging.WARNING)
     # --- CONSOLE HANDLER REMOVED ---
     # The following handler is responsible for printing logs to the console.
@@ -593,57 +700,64 @@ def main():
     # 
     # tqdm_handler = TqdmLoggingHandler()
     # tqdm_handler.setFormatter(formatter)
-    # logger.addHandler(tqdm_handler)
-    
-    logger = logging.getLogger(__name__) # This line can remain
-
-    # Warn if GPU is configured but not available.
-    if OCR_READER_CONFIG.get("gpu") and not torch.cuda.is_available():
-        # This warning will now only appear in the log file, not the console.
-        warnings.warn("\n\GPU acceleration is enabled, but a compatible GPU/PyTorch was not found. \nCrashing Out\n")
-
-    logger.info("Starting Umamusume Scanner...")
-    # Clear any previous conflict resolution files.
-    conflicts_file = os.path.join(BASE_DIR, 'data', 'conflicts.json')
-    if os.path.exists(conflicts_file):
-        with open(conflicts_file, 'w') as f: json.dump([], f)
-
-    reader = easyocr.Reader(OCR_READER_CONFIG["languages"], gpu=OCR_READER_CONFIG["gpu"])
-
-    # Step 0: Organize loose images into folders.
-    _group_loose_images(reader)
-
-    # Initialize multithreading for parallel folder processing.
-    processing_q = queue.Queue()
-    final_results = {}
-    results_lock = threading.Lock()
-    num_workers = max(1, cpu_count() - DEFAULT_NUM_PROCESSES_OFFSET)
-    logger.info(f"Initializing {num_workers} worker threads for processing.")
-    workers = []
-    for _ in range(num_workers):
-        worker = threading.Thread(target=processing_worker, args=(processing_q, final_results, results_lock, reader))
-        worker.daemon = True
-        worker.start()
-        workers.append(worker)
+    # root_logger.addHandler(tqdm_handler)
+    return timestamp
 
+def _apply_autotune(raw_reader, calibrate=False, retune=False):
+    """
+    Sets the worker count and torch thread count. With `calibrate`, they come from the
+    hardware profile in data/hardware_profile.json (calibrated and saved if needed);
+    otherwise from a cheap default that caps NUM_WORKERS by available RAM and splits the
+    cores between the workers.
+    """
+    global NUM_WORKERS
+    profile_path = os.path.join(DATA_FOLDER, "hardware_profile.json")
+    with perf.span("autotune"):
+        use_gpu = OCR_READER_CONFIG["gpu"] and OCR_READER_CONFIG.get("backend", "easyocr") == "easyocr"
+        if calibrate:
+            tuning = load_or_calibrate(raw_reader, profile_path, AUTOTUNE_CONFIG, use_gpu, retune=retune)
+        else:
+            tuning = default_tuning(NUM_WORKERS, AUTOTUNE_CONFIG, use_gpu)
+    apply_tuning(tuning)
+    NUM_WORKERS = tuning["num_workers"]
+
+def _write_perf_report(timestamp, write_trace=False):
+    """
+    Logs the per-stage timing table and writes it as perf_<timestamp>.json next to the log
+    file. With `write_trace`, a Chrome trace of every span is saved as trace_<timestamp>.json.
+    """
+    logs_folder = os.path.join(DATA_FOLDER, "logs")
     try:
-        # Step 1: Detect ROIs and populate the processing queue.
-        processed_folder_names = _run_roi_detection_automatically(processing_q, reader)
-
-        # Wait for all folders in the queue to be processed.
-        logger.info(f"All {len(processed_folder_names)} folders have been queued. Waiting for workers to complete...")
-        processing_q.join()
-        logger.info("All tasks in the processing queue have been completed.")
-
-    finally:
-        # Stop worker threads.
-        logger.info("Stopping worker threads...")
-        for _ in range(num_workers): processing_q.put((None, None))
-        for worker in workers: worker.join()
+        report = perf.write_summary_json(os.path.join(logs_folder, f"perf_{timestamp}.json"))
+        logger.info("Run summary:\n" + perf.format_summary_table(report))
+        if write_trace:
+            trace_path = os.path.join(logs_folder, f"trace_{timestamp}.json")
+            perf.write_chrome_trace(trace_path)
+            logger.info(f"Chrome trace written to {trace_path}")
+    except (IOError, OSError) as e:
+        logger.warning(f"Could not write performance report: {e}")
+
+def _write_ocr_report(reader, timestamp):
+    """Logs where OCR time went, per call site, and saves it as ocr_<timestamp>.json."""
+    try:
+        logger.info("OCR calls by call site:\n" + reader.format_summary())
+        reader.dump(os.path.join(DATA_FOLDER, "logs", f"ocr_{timestamp}.json"))
+    except (IOError, OSError) as e:
+        logger.warning(f"Could not write OCR report: {e}")
 
-    logger.info(f"All background processing complete. Collected {len(final_results)} results.")
+def _log_and_reset_stats(label, accounting_reader):
+    """
+    Logs the timing table and the OCR calls per call site of everything measured since the
+    last reset and starts over, so long-running modes report per batch and don't keep
+    every span in memory.
+    """
+    report = perf.summary(reset=True)
+    ocr_report = accounting_reader.summary(reset=True)
+    logger.info(f"{label} summary:\n" + perf.format_summary_table(report))
+    logger.info(f"{label} OCR calls by call site:\n" + accounting_reader.format_summary(ocr_report))
 
-    # Load skill data needed for formatting BEFORE calling update_all_runners
+def _load_skill_formatting_data():
+    """Loads the skill order map and unique skills used to format all_runners.json."""
     skill_order_map: Dict[str, int] = {}
     runner_unique_skills: Dict[str, list] = {}
     try:
@@ -663,7 +777,10 @@ def main():
         logger.warning("Skill ordering files (skills.json/runner_skills.json) not found. Skills will not be sorted during update.")
     except Exception as e:
         logger.error(f"Failed to load skill data for formatting: {e}")
-        
+    return runner_unique_skills, skill_order_map
+
+def _save_results(final_results, processed_folder_names, runner_unique_skills, skill_order_map):
+    """Moves processed folders out of the input directory and merges results into all_runners.json."""
     # Step 3: Move processed folders to the completed directory.
     _move_processed_folders(processed_folder_names)
     # Step 4: Create a DataFrame from the results and update the main data file.
@@ -671,10 +788,8 @@ def main():
     if not new_runners_df.empty:
         update_all_runners(new_runners_df, runner_unique_skills, skill_order_map, DATA_FOLDER)
 
-    # If conflicts were detected during data updates, launch the conflict resolver tool.
-    conflicts_file = os.path.join(BASE_DIR, 'data', 'conflicts.json')
-
-    run_resolver = False
+def _has_unresolved_conflicts(conflicts_file):
+    """Returns True if the conflicts file exists and holds at least one conflict."""
     try:
         # Check if the file exists AND is not empty "[]"
         if os.path.exists(conflicts_file) and os.path.getsize(conflicts_file) > 2: # Check size > 2
@@ -685,60 +800,356 @@ def main():
                      try:
                          # Verify it's valid JSON and contains data
                          if json.loads(content):
-                              run_resolver = True
+                              return True
                      except json.JSONDecodeError:
                           logger.error(f"{os.path.basename(conflicts_file)} is corrupted.")
-                          run_resolver = False # Don't run if corrupted
+                          return False # Don't run if corrupted
 
     except IOError as e:
          logger.error(f"Error checking conflicts file: {e}")
     except Exception as e:
          logger.error(f"Unexpected error checking conflicts file status: {e}")
+    return False
+
+def run_watch_mode(reader, accounting_reader):
+    """
+    Long-running mode that keeps the OCR reader and game data loaded and processes
+    screenshots as they arrive in the input folder. Each settled folder is scanned and
+    merged into all_runners.json on its own, so results show up within seconds.
+    """
+    watch_config = config["WATCH_MODE"]
+    watcher = FolderWatcher(
+        INPUT_FOLDER,
+        debounce_seconds=watch_config["DEBOUNCE_SECONDS"],
+        poll_interval=watch_config["POLL_INTERVAL_SECONDS"]
+    )
+    runner_unique_skills, skill_order_map = _load_skill_formatting_data()
+    conflicts_file = os.path.join(BASE_DIR, 'data', 'conflicts.json')
 
+    processing_q = queue.Queue()
+    final_results = {}
+    results_lock = threading.Lock()
+    workers = _start_workers(processing_q, final_results, results_lock, reader)
+
+    logger.info(f"Watch mode started. Drop screenshots into {INPUT_FOLDER} (Ctrl+C to stop).")
+    try:
+        for ready_groups in watcher.watch():
+            folder_names = [g for g in ready_groups if g != LOOSE_GROUP]
+            if LOOSE_GROUP in ready_groups:
+                # Newly grouped folders are processed right away instead of waiting
+                # for them to settle a second time.
+                for folder_name in _group_loose_images(reader):
+                    if folder_name not in folder_names:
+                        folder_names.append(folder_name)
+
+            entries = {}
+            for folder_name in folder_names:
+                image_paths = get_entry_images(os.path.join(INPUT_FOLDER, folder_name))
+                if image_paths:
+                    entries[folder_name] = image_paths
+                else:
+                    logger.info(f"Skipping {folder_name}: no inspiration screenshots yet.")
+                watcher.mark_handled(folder_name)
+            if not entries:
+                continue
+
+            final_results.clear()
+            processed_folder_names = _run_roi_detection_automatically(processing_q, reader, entries)
+            processing_q.join()
+            logger.info(f"Processed {len(final_results)} new folder(s): {', '.join(processed_folder_names)}")
+
+            _save_results(dict(final_results), processed_folder_names, runner_unique_skills, skill_order_map)
+            if _has_unresolved_conflicts(conflicts_file):
+                logger.warning(f"Conflicts are waiting in {conflicts_file}. Run a normal scan to resolve them.")
+            logger.info(f"Updated all_runners.json with {len(final_results)} runner(s).")
+            _log_and_reset_stats(f"Batch of {len(entries)} folder(s)", accounting_reader)
+    except KeyboardInterrupt:
+        logger.info("Watch mode interrupted by user.")
+    finally:
+        watcher.stop()
+        _stop_workers(processing_q, workers)
+    logger.info("Watch mode stopped.")
+
+def _scan_job_folder(folder_path, reader):
+    """
+    Scans a single folder of screenshots submitted to the scan server and returns the
+    runner row for it. The folder does not have to live inside input_images.
+    """
+    folder_name = os.path.basename(os.path.normpath(folder_path))
+    input_folder = os.path.dirname(os.path.normpath(folder_path))
+    image_paths = get_entry_images(folder_path)
+    rois = _detect_folder_rois(folder_name, image_paths, reader) if image_paths else []
+    result = process_folder(folder_name, {folder_name: rois}, reader, input_folder=input_folder)
+    if result is None:
+        raise ValueError(f"Job folder {folder_path} could not be read.")
+    _, character_data = result
+    if not character_data.name:
+        raise ValueError("No runner name could be read from the submitted screenshots.")
+    return _build_runner_row(folder_name, character_data)
+
+def run_server_mode(reader, accounting_reader, host=None, port=None):
+    """
+    Runs the local HTTP scanning service until interrupted. The timing and OCR stats are
+    process-wide, so they are only logged and reset when no job is running: with
+    REPORT_JOB_STATS, jobs run one at a time and every job gets its own report; otherwise
+    NUM_WORKERS jobs run at once and one report covers all jobs since the server was last idle.
+    """
+    server_config = config["SCAN_SERVER"]
+    num_workers = server_config["NUM_WORKERS"]
+    if server_config["REPORT_JOB_STATS"] and num_workers > 1:
+        logger.warning(f"SCAN_SERVER.REPORT_JOB_STATS is on, so jobs run one at a time instead of on {num_workers} workers.")
+        num_workers = 1
+
+    def report_stats(job_ids):
+        label = f"Job {job_ids[0]}" if len(job_ids) == 1 else f"{len(job_ids)} jobs"
+        _log_and_reset_stats(label, accounting_reader)
+
+    serve(
+        lambda folder_path: _scan_job_folder(folder_path, reader),
+        host=host or server_config["HOST"],
+        port=port or server_config["PORT"],
+        jobs_folder=os.path.join(DATA_FOLDER, "server_jobs"),
+        queue_size=server_config["QUEUE_SIZE"],
+        num_workers=num_workers,
+        max_upload_bytes=server_config["MAX_UPLOAD_MB"] * 1024 * 1024,
+        max_finished_jobs=server_config["MAX_FINISHED_JOBS"],
+        on_idle=report_stats
+    )
 
-    if run_resolver:
-        logger.info("Conflicts detected. Launching conflict resolver GUI...")
+def run_export_review_mode(reader):
+    """
+    Headless ROI review export: groups loose screenshots, then detects the spark zones of
+    every input folder in parallel and writes them, with thumbnails, to data/roi_review.json.
+    The ROI selector loads that file and only runs OCR for folders missing from it.
+    """
+    _group_loose_images(reader)
+    entries = get_entries(INPUT_FOLDER)
+    if not entries:
+        logger.error(f"No subfolders with inspiration images found in {INPUT_FOLDER}.")
+        return
+    logger.info(f"Precomputing spark zones of {len(entries)} folders with {NUM_WORKERS} workers...")
+    export_review(entries, reader, REVIEW_PATH, max_workers=NUM_WORKERS)
+
+def _parse_args():
+    """Parses command line options. The frozen GPU build passes the torch path as the first argument."""
+    parser = argparse.ArgumentParser(description="Scan Umamusume screenshots into all_runners.json.")
+    parser.add_argument("torch_path", nargs="?", help=argparse.SUPPRESS)
+    parser.add_argument("--watch", action="store_true",
+                        help="Keep running and process screenshots as they are added to the input folder.")
+    parser.add_argument("--serve", action="store_true",
+                        help="Run a local HTTP scanning service that accepts screenshot uploads.")
+    parser.add_argument("--host", help="Address for --serve to bind to (default from SCAN_SERVER.HOST).")
+    parser.add_argument("--port", type=int, help="Port for --serve to listen on (default from SCAN_SERVER.PORT).")
+    parser.add_argument("--trace", action="store_true",
+                        help="Also write a Chrome trace (chrome://tracing, Perfetto) of every timed stage to data/logs.")
+    parser.add_argument("--low-memory", action="store_true",
+                        help="Keep finished runners only in the run journal on disk (for very large batches).")
+    parser.add_argument("--retune", action="store_true",
+                        help="Run the hardware calibration (even if AUTOTUNE is disabled) instead of using data/hardware_profile.json.")
+    parser.add_argument("--profile", action="store_true",
+                        help="Sample all threads during the run and write a flamegraph-compatible profile to data/logs.")
+    parser.add_argument("--export-review", action="store_true",
+                        help="Detect spark zones of all input folders in parallel and write them to data/roi_review.json for the ROI selector.")
+    args, _ = parser.parse_known_args()
+    return args
+
+async def _run_conflict_resolver(conflicts_file):
+    """Launches the conflict resolver GUI without blocking the event loop and tidies up afterwards."""
+    logger.info("Conflicts detected. Launching conflict resolver GUI...")
+    try:
+        process = await asyncio.create_subprocess_exec(sys.executable, RESOLVER_SCRIPT_PATH, DATA_FOLDER) # Pass DATA_FOLDER as an argument
+        returncode = await process.wait()
+        if returncode != 0:
+            logger.error(f"Conflict resolver script failed with exit code {returncode}.")
+            return
+        logger.info("Conflict resolver finished.")
+
+        # --- ADDED: Clean up conflicts.json IF resolver emptied it ---
         try:
-            subprocess.run([sys.executable, RESOLVER_SCRIPT_PATH, DATA_FOLDER], check=True) # Pass DATA_FOLDER as an argument
-            logger.info("Conflict resolver finished.")
+            if os.path.exists(conflicts_file):
+                with open(conflicts_file, 'r', encoding='utf-8') as f:
+                    content_after = f.read().strip()
+                # If resolver left it empty, remove it
+                if content_after == '[]':
+                    os.remove(conflicts_file)
+                    logger.info(f"Removed empty {os.path.basename(conflicts_file)} after resolution.")
+        except (IOError, OSError, json.JSONDecodeError) as e:
+             logger.warning(f"Could not check or remove empty conflicts file after resolution: {e}")
+        # --- END ADDED ---
+
+    except FileNotFoundError:
+         logger.error("Conflict resolver script not found.")
+    except Exception as e:
+         logger.error(f"Error running conflict resolver: {e}")
+
+def _remove_empty_conflicts_file(conflicts_file):
+    """Removes conflicts.json when it only holds an empty list."""
+    # --- ADDED: Ensure empty file is removed if no resolver was needed ---
+    try:
+         # Check if the file exists (it might not if data_updater found no conflicts)
+         if os.path.exists(conflicts_file):
+             with open(conflicts_file, 'r', encoding='utf-8') as f:
+                  content = f.read().strip()
+             # If it exists but is empty, remove it
+             if content == '[]':
+                  os.remove(conflicts_file)
+                  logger.info(f"Removed empty {os.path.basename(conflicts_file)} as no conflicts were found.")
+    except (IOError, OSError, json.JSONDecodeError) as e:
+         logger.warning(f"Could not check or remove empty conflicts file when no conflicts were found: {e}")
+    # --- END ADDED ---
+
+async def _run_batch_async(reader, conflicts_file, low_memory=False):
+    """
+    Asyncio orchestration of a one-shot scan. OCR-heavy work (grouping, ROI detection and
+    folder parsing) runs on a thread pool, while filesystem scans, JSON reads/writes and the
+    conflict resolver subprocess run concurrently on the event loop. Each folder is moved
+    to processed_images as soon as it has been parsed rather than in one block at the end.
+
+    Every parsed folder is checkpointed in data/run_journal.jsonl before it is moved. If an
+    earlier run was killed, its journaled folders are not scanned again and their results
+    are merged together with this run's; the journal is cleared after a successful merge.
+    With `low_memory`, results are only kept in the journal and read back from it for the
+    merge instead of also being held in memory. The merge itself still builds one DataFrame
+    of all new runners.
+    """
+    loop = asyncio.get_running_loop()
+    num_workers = NUM_WORKERS
+    logger.info(f"Initializing {num_workers} worker threads for processing.")
+    ocr_executor = ThreadPoolExecutor(max_workers=num_workers, thread_name_prefix="processing_worker")
+
+    # JSON reads that are only needed at the end are started right away.
+    skill_data_task = asyncio.create_task(asyncio.to_thread(_load_skill_formatting_data))
+    existing_index_task = asyncio.create_task(asyncio.to_thread(_load_existing_runners_index))
+
+    journal = RunJournal(os.path.join(DATA_FOLDER, "run_journal.jsonl"))
+    journaled = journal.completed()
+    if journaled:
+        logger.info(f"Resuming an interrupted run: {len(journaled)} folder(s) were already scanned.")
+    final_results = journal if low_memory else dict(journal.items())
+    move_tasks = []
 
-            # --- ADDED: Clean up conflicts.json IF resolver emptied it ---
+    async def scan_folder(folder_name, image_paths):
+        try:
+            fingerprint = await asyncio.to_thread(_folder_fingerprint, os.path.join(INPUT_FOLDER, folder_name))
+            if journaled.get(folder_name) == fingerprint:
+                logger.info(f"Skipping {folder_name}: already scanned before the previous run was interrupted.")
+                return
+            logger.info(f"Detecting ROIs for {folder_name}...")
             try:
-                if os.path.exists(conflicts_file):
-                    with open(conflicts_file, 'r', encoding='utf-8') as f:
-                        content_after = f.read().strip()
-                    # If resolver left it empty, remove it
-                    if content_after == '[]':
-                        os.remove(conflicts_file)
-                        logger.info(f"Removed empty {os.path.basename(conflicts_file)} after resolution.")
-            except (IOError, OSError, json.JSONDecodeError) as e:
-                 logger.warning(f"Could not check or remove empty conflicts file after resolution: {e}")
-            # --- END ADDED ---
-
-        except subprocess.CalledProcessError as e:
-            logger.error(f"Conflict resolver script failed with exit code {e.returncode}.")
-        except FileNotFoundError:
-             logger.error("Conflict resolver script not found.")
+                rois = await loop.run_in_executor(ocr_executor, _detect_folder_rois, folder_name, image_paths, reader)
+            except Exception as e:
+                logger.error(f"Error processing {folder_name} for ROI detection: {e}")
+                rois = []
+            result = await loop.run_in_executor(ocr_executor, process_folder, folder_name, {folder_name: rois}, reader)
+            if result and result[1]:
+                # Checkpoint before the folder is moved, so a crash never loses a moved folder.
+                await asyncio.to_thread(journal.record, folder_name, fingerprint, result[1])
+                if not low_memory:
+                    final_results[folder_name] = result[1]
         except Exception as e:
-             logger.error(f"Error running conflict resolver: {e}")
+            logger.error(f"[ERROR] Processing failed for {folder_name}: {e}")
+        finally:
+            # Hand the folder off to the completed directory while other folders keep scanning.
+            move_tasks.append(asyncio.create_task(asyncio.to_thread(_move_processed_folder, folder_name)))
+
+    try:
+        # Step 0: Organize loose images into folders.
+        await loop.run_in_executor(ocr_executor, _group_loose_images, reader)
+
+        # Step 1: Detect ROIs and parse every folder concurrently.
+        logger.info("=== Step 1: Running automatic ROI detection ===")
+        entries = await asyncio.to_thread(get_entries, INPUT_FOLDER)
+        if not entries:
+            logger.error(f"No subfolders with inspiration images found in {INPUT_FOLDER}.")
+        logger.info(f"All {len(entries)} folders have been queued. Waiting for workers to complete...")
+
+        folder_tasks = [asyncio.create_task(scan_folder(name, paths)) for name, paths in entries.items()]
+        for task in tqdm(asyncio.as_completed(folder_tasks), total=len(folder_tasks), desc="Scanning Umas", ncols=120):
+            await task
+        logger.info("All tasks in the processing queue have been completed.")
+    finally:
+        ocr_executor.shutdown(wait=True)
+        for result in await asyncio.gather(*move_tasks, return_exceptions=True):
+            if isinstance(result, Exception):
+                logger.error(f"Failed to move a processed folder: {result}")
+
+    logger.info(f"All background processing complete. Collected {len(final_results)} results.")
+
+    # Load skill data needed for formatting BEFORE calling update_all_runners
+    runner_unique_skills, skill_order_map = await skill_data_task
+    existing_index = await existing_index_task
+
+    # Step 4: Create a DataFrame from the results and update the main data file.
+    new_runners_df = _create_new_runners_dataframe(final_results, existing_index)
+    if not new_runners_df.empty:
+        await asyncio.to_thread(update_all_runners, new_runners_df, runner_unique_skills, skill_order_map, DATA_FOLDER)
+    # Only reached when the merge succeeded; otherwise the journal is kept for the next run.
+    journal.clear()
+
+    # If conflicts were detected during data updates, launch the conflict resolver tool.
+    if await asyncio.to_thread(_has_unresolved_conflicts, conflicts_file):
+        await _run_conflict_resolver(conflicts_file)
     else:
         # --- This 'else' block runs if no resolver was needed ---
         logger.info("No unresolved conflicts found.")
-        # --- ADDED: Ensure empty file is removed if no resolver was needed ---
-        try:
-             # Check if the file exists (it might not if data_updater found no conflicts)
-             if os.path.exists(conflicts_file):
-                 with open(conflicts_file, 'r', encoding='utf-8') as f:
-                      content = f.read().strip()
-                 # If it exists but is empty, remove it
-                 if content == '[]':
-                      os.remove(conflicts_file)
-                      logger.info(f"Removed empty {os.path.basename(conflicts_file)} as no conflicts were found.")
-        except (IOError, OSError, json.JSONDecodeError) as e:
-             logger.warning(f"Could not check or remove empty conflicts file when no conflicts were found: {e}")
-        # --- END ADDED ---
+        await asyncio.to_thread(_remove_empty_conflicts_file, conflicts_file)
 
-    logger.info("Processing finished successfully!")
+def main():
+    """
+    Main execution function that orchestrates the entire scanning and processing pipeline.
+    """
+    args = _parse_args()
+    run_timestamp = _setup_logging()
+
+    profiler = None
+    if args.profile or PROFILING_CONFIG["ENABLED"]:
+        profiler = SamplingProfiler(interval=PROFILING_CONFIG["INTERVAL_MS"] / 1000)
+        profiler.start()
+        logger.info(f"Sampling profiler started ({PROFILING_CONFIG['INTERVAL_MS']} ms interval).")
+
+    # Warn if GPU is configured but not available.
+    if OCR_READER_CONFIG.get("gpu") and OCR_READER_CONFIG.get("backend", "easyocr") == "easyocr" and not torch.cuda.is_available():
+        # This warning will now only appear in the log file, not the console.
+        warnings.warn("\n\GPU acceleration is enabled, but a compatible GPU/PyTorch was not found. \nCrashing Out\n")
+
+    logger.info("Starting Umamusume Scanner...")
+    # Clear any previous conflict resolution files.
+    conflicts_file = os.path.join(BASE_DIR, 'data', 'conflicts.json')
+    if os.path.exists(conflicts_file):
+        with open(conflicts_file, 'w') as f: json.dump([], f)
+
+    with perf.span("reader_init"):
+        raw_reader = create_reader(OCR_READER_CONFIG)
+    _apply_autotune(raw_reader, calibrate=AUTOTUNE_CONFIG["ENABLED"] or args.retune, retune=args.retune)
+
+    accounting_reader = AccountingReader(raw_reader)
+    # The memo sits in front of the accounting proxy so the OCR report only counts real OCR calls.
+    reader = MemoReader(accounting_reader, OCR_MEMO_MAX_ENTRIES) if OCR_MEMO_MAX_ENTRIES > 0 else accounting_reader
+
+    low_memory = args.low_memory or LOW_MEMORY_CONFIG["ENABLED"]
+    if low_memory:
+        logger.info("Low-memory mode: streaming results to disk.")
+
+    try:
+        if args.serve:
+            run_server_mode(reader, accounting_reader, args.host, args.port)
+            return
+        if args.watch:
+            run_watch_mode(reader, accounting_reader)
+            return
+        if args.export_review:
+            run_export_review_mode(reader)
+            return
+
+        asyncio.run(_run_batch_async(reader, conflicts_file, low_memory=low_memory))
+
+        logger.info("Processing finished successfully!")
+    finally:
+        _write_perf_report(run_timestamp, write_trace=args.trace or PERF_TRACE)
+        _write_ocr_report(accounting_reader, run_timestamp)
+        save_matchers()
+        if profiler:
+            write_profile(profiler, os.path.join(DATA_FOLDER, "logs"), run_timestamp)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,145 @@
+import os
+import sys
+import json
+import time
+import bisect
+import threading
+import logging
+
+import perf
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds of the histogram buckets; the last bucket is open-ended.
+LATENCY_BUCKETS_MS = [5, 10, 25, 50, 100, 250, 500, 1000, 2500]
+CONFIDENCE_BUCKETS = [0.1, 0.2, 0.3, 0.4, 0.5, 0.6, 0.7, 0.8, 0.9]
+LOW_CONFIDENCE = 0.5
+
+# Modules whose frames are skipped when looking for the caller, so wrappers stacked on top
+# of AccountingReader still attribute calls to the parser that made them.
+_PROXY_MODULES = {__name__}
+
+
+def register_proxy_module(module_name):
+    """Marks another reader wrapper module as transparent for call-site attribution."""
+    _PROXY_MODULES.add(module_name)
+
+
+def _call_site():
+    """Returns 'module.function' of the first frame outside the reader proxies."""
+    frame = sys._getframe(1)
+    while frame is not None and frame.f_globals.get("__name__") in _PROXY_MODULES:
+        frame = frame.f_back
+    if frame is None:
+        return "unknown"
+    return f"{frame.f_globals.get('__name__', '?')}.{frame.f_code.co_name}"
+
+
+def _bucket_labels(bounds, fmt):
+    labels = [f"<={fmt(b)}" for b in bounds]
+    labels.append(f">{fmt(bounds[-1])}")
+    return labels
+
+
+class _SiteStats:
+    def __init__(self):
+        self.calls = 0
+        self.pixels = 0
+        self.seconds = 0.0
+        self.results = 0
+        self.low_confidence = 0
+        self.latency_hist = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+        self.confidence_hist = [0] * (len(CONFIDENCE_BUCKETS) + 1)
+
+    def to_dict(self):
+        return {
+            "calls": self.calls,
+            "pixels": self.pixels,
+            "mean_pixels": round(self.pixels / self.calls) if self.calls else 0,
+            "total_ms": round(self.seconds * 1000, 3),
+            "mean_ms": round(self.seconds * 1000 / self.calls, 3) if self.calls else 0.0,
+            "results": self.results,
+            "low_confidence_results": self.low_confidence,
+            "latency_histogram_ms": dict(zip(_bucket_labels(LATENCY_BUCKETS_MS, str), self.latency_hist)),
+            "confidence_histogram": dict(zip(_bucket_labels(CONFIDENCE_BUCKETS, lambda b: f"{b:.1f}"), self.confidence_hist)),
+        }
+
+
+class AccountingReader:
+    """
+    Proxy around an easyocr.Reader that records, per call site, how often OCR is called, how
+    many pixels go in, how long each call takes and how confident the results are. Any
+    attribute that is not an OCR entry point is forwarded to the wrapped reader.
+    """
+    def __init__(self, reader):
+        self._reader = reader
+        self._lock = threading.Lock()
+        self._sites = {}
+
+    def __getattr__(self, name):
+        return getattr(self._reader, name)
+
+    def readtext(self, image, *args, **kwargs):
+        return self._account("readtext", self._reader.readtext, image, args, kwargs)
+
+    def recognize(self, image, *args, **kwargs):
+        return self._account("recognize", self._reader.recognize, image, args, kwargs)
+
+    def _account(self, method, fn, image, args, kwargs):
+        site = f"{_call_site()}:{method}"
+        start = time.perf_counter()
+        with perf.span(f"ocr.{method}"):
+            results = fn(image, *args, **kwargs)
+        elapsed = time.perf_counter() - start
+
+        shape = getattr(image, "shape", None)
+        pixels = int(shape[0]) * int(shape[1]) if shape is not None and len(shape) >= 2 else 0
+        confidences = [r[-1] for r in results or [] if isinstance(r, (tuple, list)) and len(r) == 3
+                       and isinstance(r[-1], (int, float))]
+
+        perf.count("ocr_calls")
+        perf.count("ocr_pixels", pixels)
+        with self._lock:
+            stats = self._sites.get(site)
+            if stats is None:
+                stats = self._sites[site] = _SiteStats()
+            stats.calls += 1
+            stats.pixels += pixels
+            stats.seconds += elapsed
+            stats.results += len(results or [])
+            stats.latency_hist[bisect.bisect_left(LATENCY_BUCKETS_MS, elapsed * 1000)] += 1
+            for confidence in confidences:
+                stats.confidence_hist[bisect.bisect_left(CONFIDENCE_BUCKETS, confidence)] += 1
+                if confidence < LOW_CONFIDENCE:
+                    stats.low_confidence += 1
+        return results
+
+    def summary(self, reset=False):
+        """
+        Returns {call_site: stats} ordered by total OCR time, most expensive first. With
+        `reset`, the stats are cleared in the same step.
+        """
+        with self._lock:
+            sites = {site: stats.to_dict() for site, stats in self._sites.items()}
+            if reset:
+                self._sites.clear()
+        return dict(sorted(sites.items(), key=lambda item: -item[1]["total_ms"]))
+
+    def reset(self):
+        with self._lock:
+            self._sites.clear()
+
+    def format_summary(self, report=None):
+        """Renders a summary() report (the current one by default) as a fixed-width table for the log."""
+        report = self.summary() if report is None else report
+        lines = [f"{'call site':<60}{'calls':>8}{'Mpx':>9}{'total s':>10}{'mean ms':>10}{'low conf':>10}"]
+        for site, s in report.items():
+            lines.append(f"{site:<60}{s['calls']:>8}{s['pixels'] / 1e6:>9.1f}{s['total_ms'] / 1000:>10.2f}"
+                         f"{s['mean_ms']:>10.1f}{s['low_confidence_results']:>10}")
+        return "\n".join(lines)
+
+    def dump(self, path):
+        """Writes summary() as JSON."""
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.summary(), f, indent=2)
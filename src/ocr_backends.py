@@ -0,0 +1,126 @@
+import os
+import sys
+import json
+import logging
+
+import numpy as np
+import torch
+import easyocr
+
+try:
+    import onnxruntime
+    from onnxruntime.quantization import quantize_dynamic, QuantType
+except ImportError:
+    onnxruntime = None
+
+logger = logging.getLogger(__name__)
+
+# --- Load Configuration ---
+if getattr(sys, 'frozen', False):
+    BUNDLED_ROOT = sys._MEIPASS
+    CONFIG_PATH = os.path.join(BUNDLED_ROOT, 'src', 'config.json')
+    BASE_DIR = os.path.dirname(sys.executable)
+else:
+    CONFIG_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'config.json')
+    BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+with open(CONFIG_PATH, 'r') as f:
+    config = json.load(f)
+
+OCR_READER_CONFIG = config["OCR_READER_CONFIG"]
+ONNX_MODEL_DIR = os.path.join(BASE_DIR, "data", "onnx_models")
+
+BACKENDS = ("easyocr", "onnx")
+
+
+# ---------------- ONNX Export ----------------
+class _RecognizerImageOnly(torch.nn.Module):
+    """The recognizer takes (image, text) but ignores text at inference; export image only."""
+    def __init__(self, model):
+        super().__init__()
+        self.model = model
+
+    def forward(self, image):
+        return self.model(image, None)
+
+
+def _export_quantized(module, dummy_input, input_names, output_names, dynamic_axes, path):
+    """Exports `module` to ONNX and writes a dynamically int8-quantized copy to `path`."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fp32_path = path.replace(".int8.onnx", ".fp32.onnx")
+    module.eval()
+    with torch.no_grad():
+        torch.onnx.export(module, dummy_input, fp32_path, input_names=input_names, output_names=output_names,
+                          dynamic_axes=dynamic_axes, opset_version=17)
+    quantize_dynamic(fp32_path, path, weight_type=QuantType.QInt8)
+    os.remove(fp32_path)
+    logger.info(f"Exported quantized ONNX model to {path}")
+
+
+class _OnnxModule:
+    """
+    Stands in for EasyOCR's torch detector or recognizer: it is called with torch tensors
+    and returns torch tensors, so EasyOCR's own pre- and post-processing keep working.
+    """
+    def __init__(self, session):
+        self.session = session
+        self.input_name = session.get_inputs()[0].name
+
+    def eval(self):
+        return self
+
+    def __call__(self, image, *unused):
+        outputs = self.session.run(None, {self.input_name: image.cpu().numpy().astype(np.float32)})
+        tensors = tuple(torch.from_numpy(o) for o in outputs)
+        return tensors if len(tensors) > 1 else tensors[0]
+
+
+def _session(path):
+    options = onnxruntime.SessionOptions()
+    options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+    return onnxruntime.InferenceSession(path, options, providers=["CPUExecutionProvider"])
+
+
+def _create_onnx_reader(languages, model_dir=ONNX_MODEL_DIR):
+    """
+    An easyocr.Reader whose detector and recognizer run as int8-quantized ONNX models on
+    onnxruntime (CPU). The models are exported from EasyOCR's own weights on first use and
+    cached in `model_dir`. EasyOCR quantizes in torch by default on CPU, which cannot be
+    exported, so the base reader is created with quantize=False.
+    """
+    if onnxruntime is None:
+        raise ImportError("The 'onnx' OCR backend needs onnxruntime (pip install onnxruntime onnx).")
+
+    reader = easyocr.Reader(languages, gpu=False, quantize=False)
+    detector_path = os.path.join(model_dir, "craft_detector.int8.onnx")
+    recognizer_path = os.path.join(model_dir, f"{'_'.join(languages)}_recognizer.int8.onnx")
+
+    if not os.path.exists(detector_path):
+        _export_quantized(reader.detector, torch.randn(1, 3, 640, 640), ["image"], ["score_map", "feature"],
+                          {"image": {0: "batch", 2: "height", 3: "width"}}, detector_path)
+    if not os.path.exists(recognizer_path):
+        _export_quantized(_RecognizerImageOnly(reader.recognizer), torch.randn(1, 1, 64, 256), ["image"], ["preds"],
+                          {"image": {0: "batch", 3: "width"}, "preds": {0: "batch", 1: "steps"}}, recognizer_path)
+
+    reader.detector = _OnnxModule(_session(detector_path))
+    reader.recognizer = _OnnxModule(_session(recognizer_path))
+    return reader
+
+
+# ---------------- Public API ----------------
+def create_reader(reader_config=None):
+    """
+    Creates the OCR reader selected by reader_config["backend"] (OCR_READER_CONFIG from
+    config.json by default): "easyocr" for EasyOCR's PyTorch models, or "onnx" for the
+    same models quantized to int8 on onnxruntime. Both expose readtext() and recognize().
+    """
+    reader_config = reader_config or OCR_READER_CONFIG
+    backend = reader_config.get("backend", "easyocr")
+    languages = reader_config["languages"]
+    if backend == "easyocr":
+        return easyocr.Reader(languages, gpu=reader_config.get("gpu", False))
+    if backend == "onnx":
+        if reader_config.get("gpu"):
+            logger.warning("The 'onnx' OCR backend runs on the CPU; the gpu setting is ignored.")
+        return _create_onnx_reader(languages)
+    raise ValueError(f"Unknown OCR backend '{backend}'; expected one of {', '.join(BACKENDS)}.")
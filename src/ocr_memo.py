@@ -0,0 +1,72 @@
+import hashlib
+import threading
+import logging
+from collections import OrderedDict
+
+import numpy as np
+
+import perf
+from ocr_accounting import register_proxy_module
+
+logger = logging.getLogger(__name__)
+
+register_proxy_module(__name__)
+
+
+class MemoReader:
+    """
+    Content-addressed memo in front of an OCR reader. Results are keyed by a blake2b hash of
+    the crop's pixel buffer, its shape and dtype and the call arguments, so pixel-identical
+    crops (the name, score and stat ROIs repeated on every screenshot of a runner) are only
+    OCR'd once. The memo holds at most `max_entries` results and evicts the least recently
+    used one. Calls with anything other than a NumPy array go straight to the reader.
+    """
+    def __init__(self, reader, max_entries=512):
+        self._reader = reader
+        self.max_entries = max_entries
+        self._memo = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __getattr__(self, name):
+        return getattr(self._reader, name)
+
+    def readtext(self, image, *args, **kwargs):
+        return self._memoized("readtext", self._reader.readtext, image, args, kwargs)
+
+    def recognize(self, image, *args, **kwargs):
+        return self._memoized("recognize", self._reader.recognize, image, args, kwargs)
+
+    def clear(self):
+        with self._lock:
+            self._memo.clear()
+
+    def _memoized(self, method, fn, image, args, kwargs):
+        if not isinstance(image, np.ndarray):
+            return fn(image, *args, **kwargs)
+
+        key = _memo_key(method, image, args, kwargs)
+        with self._lock:
+            cached = self._memo.get(key)
+            if cached is not None:
+                self._memo.move_to_end(key)
+                self.hits += 1
+        if cached is not None:
+            perf.count("ocr_memo_hits")
+            return list(cached)
+
+        results = fn(image, *args, **kwargs)
+        perf.count("ocr_memo_misses")
+        with self._lock:
+            self.misses += 1
+            self._memo[key] = list(results)
+            while len(self._memo) > self.max_entries:
+                self._memo.popitem(last=False)
+        return results
+
+
+def _memo_key(method, image, args, kwargs):
+    digest = hashlib.blake2b(np.ascontiguousarray(image).data, digest_size=16)
+    digest.update(repr((method, image.shape, image.dtype.str, args, sorted(kwargs.items()))).encode("utf-8"))
+    return digest.digest()
@@ -1,6 +1,87 @@
+import os
+import sys
 import re
+import json
+import cv2
 from difflib import get_close_matches
 from data_loader import KNOWN_RUNNERS, KNOWN_SKILLS
+from ocr_accounting import register_proxy_module
+import perf
+
+# --- Load Configuration ---
+if getattr(sys, 'frozen', False):
+    BUNDLED_ROOT = sys._MEIPASS
+    CONFIG_PATH = os.path.join(BUNDLED_ROOT, 'src', 'config.json')
+else:
+    CONFIG_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'config.json')
+
+with open(CONFIG_PATH, 'r') as f:
+    config = json.load(f)
+
+OCR_RETRY_LADDER = config["OCR_RETRY_LADDER"]
+
+# OCR calls made by the retry ladder are attributed to the parser that asked for them.
+register_proxy_module(__name__)
+
+# Charset for ROIs that can only hold digits (score and stats).
+DIGIT_ALLOWLIST = "0123456789"
+
+# ---------------- Confidence-Gated Retry Ladder ----------------
+def _result_confidence(results):
+    """Lowest confidence of the results with text; 0 when nothing was read."""
+    confidences = [conf for (_, text, conf) in results if text.strip()]
+    return min(confidences) if confidences else 0.0
+
+def _recognize_line(reader, gray, line_box, scale=1.0, binarize=None, **ocr_kwargs):
+    """
+    Recognizer-only pass over one text line of `gray`, optionally upscaled by `scale` and
+    binarized ("otsu" or "adaptive") first. Result boxes are mapped back to `gray`.
+    """
+    x1, x2, y1, y2 = line_box
+    if scale != 1.0:
+        gray = cv2.resize(gray, None, fx=scale, fy=scale, interpolation=cv2.INTER_CUBIC)
+        x1, x2, y1, y2 = [int(round(v * scale)) for v in line_box]
+    if binarize == "otsu":
+        _, gray = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+    elif binarize == "adaptive":
+        gray = cv2.adaptiveThreshold(gray, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY, 31, 10)
+    results = reader.recognize(gray, horizontal_list=[[x1, x2, y1, y2]], free_list=[], detail=1, **ocr_kwargs)
+    return [([[x / scale, y / scale] for x, y in bbox], text, conf) for (bbox, text, conf) in results]
+
+def read_with_retry(reader, roi, line_box=None, **ocr_kwargs):
+    """
+    Reads a single-line text ROI, starting with the cheapest OCR pass and escalating only
+    while the lowest result confidence stays under OCR_RETRY_LADDER["MIN_CONFIDENCE"]:
+    recognizer only on `line_box` (x1, x2, y1, y2; the whole ROI by default), then on the
+    upscaled line, then on Otsu and adaptive binarizations of it, and finally the full
+    detector + recognizer (readtext). `ocr_kwargs` (e.g. allowlist) go to every OCR call.
+    Returns the most confident readtext-style result list.
+    """
+    if not OCR_RETRY_LADDER["ENABLED"] or roi.size == 0:
+        return reader.readtext(roi, **ocr_kwargs)
+
+    h, w = roi.shape[:2]
+    gray = cv2.cvtColor(roi, cv2.COLOR_BGR2GRAY) if roi.ndim == 3 else roi
+    line_box = line_box or [0, w, 0, h]
+    scale = OCR_RETRY_LADDER["UPSCALE"]
+    steps = {
+        "recognize": lambda: _recognize_line(reader, gray, line_box, **ocr_kwargs),
+        "upscale": lambda: _recognize_line(reader, gray, line_box, scale, **ocr_kwargs),
+        "otsu": lambda: _recognize_line(reader, gray, line_box, scale, binarize="otsu", **ocr_kwargs),
+        "adaptive": lambda: _recognize_line(reader, gray, line_box, scale, binarize="adaptive", **ocr_kwargs),
+        "readtext": lambda: reader.readtext(roi, **ocr_kwargs),
+    }
+
+    best, best_confidence = [], -1.0
+    for step in OCR_RETRY_LADDER["STEPS"]:
+        perf.count(f"ocr_ladder.{step}")
+        results = [r for r in steps[step]() if r[1].strip()]
+        confidence = _result_confidence(results)
+        if confidence > best_confidence:
+            best, best_confidence = results, confidence
+        if confidence >= OCR_RETRY_LADDER["MIN_CONFIDENCE"]:
+            break
+    return best
 
 def fuzzy_match(text, candidates, cutoff=0.6):
     """Fuzzy match OCR text against known candidates."""
@@ -0,0 +1,180 @@
+import os
+import sys
+import json
+import time
+import threading
+import logging
+from contextlib import contextmanager
+from functools import wraps
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# --- Collected Measurements ---
+# Spans and counters are shared by every worker thread, so all writes go through _lock.
+_lock = threading.Lock()
+_spans = []  # (name, start, duration, thread_id)
+_thread_names = {}
+_counters = {}
+_origin = time.perf_counter()
+
+
+def _clear():
+    global _origin
+    _spans.clear()
+    _thread_names.clear()
+    _counters.clear()
+    _origin = time.perf_counter()
+
+
+def reset():
+    """Drops everything collected so far (used between watch-mode batches and scan-server jobs)."""
+    with _lock:
+        _clear()
+
+
+@contextmanager
+def span(name):
+    """Times the enclosed block and records it under `name`."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        duration = time.perf_counter() - start
+        thread = threading.current_thread()
+        with _lock:
+            _spans.append((name, start, duration, thread.ident))
+            _thread_names[thread.ident] = thread.name
+
+
+def timed(name):
+    """Decorator form of span()."""
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def count(name, value=1):
+    """Adds `value` to the counter `name`."""
+    with _lock:
+        _counters[name] = _counters.get(name, 0) + value
+
+
+def peak_memory_mb():
+    """Peak resident memory of this process in MB (the high-water mark), or None if unknown."""
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # ru_maxrss is in kilobytes on Linux and in bytes on macOS.
+        return round(peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024, 1)
+    except ImportError:
+        pass
+    if sys.platform == "win32":
+        import ctypes
+        from ctypes import wintypes
+
+        class PROCESS_MEMORY_COUNTERS(ctypes.Structure):
+            _fields_ = [("cb", wintypes.DWORD), ("PageFaultCount", wintypes.DWORD),
+                        ("PeakWorkingSetSize", ctypes.c_size_t), ("WorkingSetSize", ctypes.c_size_t),
+                        ("QuotaPeakPagedPoolUsage", ctypes.c_size_t), ("QuotaPagedPoolUsage", ctypes.c_size_t),
+                        ("QuotaPeakNonPagedPoolUsage", ctypes.c_size_t), ("QuotaNonPagedPoolUsage", ctypes.c_size_t),
+                        ("PagefileUsage", ctypes.c_size_t), ("PeakPagefileUsage", ctypes.c_size_t)]
+
+        counters = PROCESS_MEMORY_COUNTERS()
+        counters.cb = ctypes.sizeof(PROCESS_MEMORY_COUNTERS)
+        get_process_memory_info = ctypes.windll.psapi.GetProcessMemoryInfo
+        get_process_memory_info.argtypes = [wintypes.HANDLE, ctypes.POINTER(PROCESS_MEMORY_COUNTERS), wintypes.DWORD]
+        if get_process_memory_info(ctypes.windll.kernel32.GetCurrentProcess(), ctypes.byref(counters), counters.cb):
+            return round(counters.PeakWorkingSetSize / (1024 * 1024), 1)
+    return None
+
+
+def summary(reset=False):
+    """
+    Returns per-stage statistics (count, total, p50, p95, max in ms), all counters and peak
+    memory. With `reset`, the measurements are dropped in the same step, so spans recorded
+    by other threads in between are neither lost nor reported twice.
+    """
+    with _lock:
+        spans = list(_spans)
+        counters = dict(_counters)
+        if reset:
+            _clear()
+
+    durations = {}
+    for name, _, duration, _ in spans:
+        durations.setdefault(name, []).append(duration * 1000.0)
+
+    stages = {}
+    for name, values in durations.items():
+        arr = np.array(values)
+        stages[name] = {
+            "count": len(values),
+            "total_ms": round(float(arr.sum()), 3),
+            "p50_ms": round(float(np.percentile(arr, 50)), 3),
+            "p95_ms": round(float(np.percentile(arr, 95)), 3),
+            "max_ms": round(float(arr.max()), 3),
+        }
+    return {"stages": stages, "counters": counters, "peak_memory_mb": peak_memory_mb()}
+
+
+def format_summary_table(report):
+    """Renders a summary() report as a fixed-width text table for the log."""
+    lines = [f"{'stage':<40}{'count':>8}{'total s':>11}{'p50 ms':>11}{'p95 ms':>11}{'max ms':>11}"]
+    for name, s in sorted(report["stages"].items(), key=lambda item: -item[1]["total_ms"]):
+        lines.append(f"{name:<40}{s['count']:>8}{s['total_ms'] / 1000:>11.2f}{s['p50_ms']:>11.1f}{s['p95_ms']:>11.1f}{s['max_ms']:>11.1f}")
+    if report["counters"]:
+        lines.append("")
+        for name, value in sorted(report["counters"].items()):
+            lines.append(f"{name:<40}{value:>12}")
+    if report.get("peak_memory_mb") is not None:
+        lines.append("")
+        lines.append(f"{'peak memory (MB)':<40}{report['peak_memory_mb']:>12}")
+    return "\n".join(lines)
+
+
+def write_summary_json(path, extra=None):
+    """Writes the summary() report, plus any `extra` fields, as JSON."""
+    report = summary()
+    if extra:
+        report.update(extra)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    return report
+
+
+def write_chrome_trace(path):
+    """
+    Exports all spans in Chrome's trace event format. Open the file in chrome://tracing or
+    https://ui.perfetto.dev to see what each worker thread was doing over time.
+    """
+    with _lock:
+        spans = list(_spans)
+        thread_names = dict(_thread_names)
+        origin = _origin
+
+    pid = os.getpid()
+    events = [
+        {"name": "thread_name", "ph": "M", "pid": pid, "tid": tid, "args": {"name": name}}
+        for tid, name in thread_names.items()
+    ]
+    for name, start, duration, tid in spans:
+        events.append({
+            "name": name,
+            "cat": name.split(".")[0],
+            "ph": "X",
+            "ts": round((start - origin) * 1e6, 1),
+            "dur": round(duration * 1e6, 1),
+            "pid": pid,
+            "tid": tid,
+        })
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
+
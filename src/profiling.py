@@ -0,0 +1,114 @@
+import os
+import sys
+import json
+import time
+import threading
+import logging
+from collections import Counter
+
+logger = logging.getLogger(__name__)
+
+
+class SamplingProfiler:
+    """
+    Low-overhead sampling profiler that sees every thread. A daemon thread wakes up every
+    `interval` seconds, grabs the current stack of all other threads through
+    sys._current_frames() and counts identical stacks per thread name. Unlike cProfile,
+    this covers the worker threads and does not slow down the OCR calls being measured.
+    """
+    def __init__(self, interval=0.005):
+        self.interval = interval
+        self.samples = Counter()  # (thread_name, stack tuple) -> sample count
+        self.sample_rounds = 0
+        self.started = None
+        self.elapsed = 0.0
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self.started = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, name="sampling_profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        if self._thread is None:
+            return
+        self._stop_event.set()
+        self._thread.join()
+        self._thread = None
+        self.elapsed = time.perf_counter() - self.started
+
+    def _run(self):
+        own_ident = threading.get_ident()
+        while not self._stop_event.wait(self.interval):
+            thread_names = {t.ident: t.name for t in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == own_ident:
+                    continue
+                self.samples[(thread_names.get(ident, f"thread-{ident}"), _frame_stack(frame))] += 1
+            self.sample_rounds += 1
+
+    def write_folded(self, path):
+        """
+        Writes the samples as folded stacks ("thread;outer;...;inner count" per line), the input
+        format of flamegraph.pl, speedscope and inferno. The thread name is the root frame.
+        """
+        with open(path, "w", encoding="utf-8") as f:
+            for (thread_name, stack), n in sorted(self.samples.items()):
+                f.write(";".join((thread_name,) + stack) + f" {n}\n")
+
+    def thread_summary(self, top=15):
+        """Per-thread sample counts, estimated time and the hottest functions (self and total)."""
+        threads = {}
+        for (thread_name, stack), n in self.samples.items():
+            entry = threads.setdefault(thread_name, {"samples": 0, "self": Counter(), "total": Counter()})
+            entry["samples"] += n
+            if stack:
+                entry["self"][stack[-1]] += n
+            for frame in set(stack):
+                entry["total"][frame] += n
+
+        summary = {}
+        for thread_name, entry in sorted(threads.items()):
+            summary[thread_name] = {
+                "samples": entry["samples"],
+                "estimated_seconds": round(entry["samples"] * self.interval, 3),
+                "top_self": [{"frame": fr, "samples": n} for fr, n in entry["self"].most_common(top)],
+                "top_total": [{"frame": fr, "samples": n} for fr, n in entry["total"].most_common(top)],
+            }
+        return summary
+
+    def write_summary(self, path):
+        report = {
+            "interval_ms": self.interval * 1000,
+            "sample_rounds": self.sample_rounds,
+            "wall_seconds": round(self.elapsed, 3),
+            "threads": self.thread_summary(),
+        }
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+
+def _frame_stack(frame):
+    """Returns the stack of `frame` outermost first, as 'function (file:line)' labels."""
+    stack = []
+    while frame is not None:
+        code = frame.f_code
+        stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+        frame = frame.f_back
+    stack.reverse()
+    return tuple(stack)
+
+
+def write_profile(profiler, logs_folder, timestamp):
+    """Stops `profiler` and writes profile_<timestamp>.folded and profile_<timestamp>.json."""
+    profiler.stop()
+    folded_path = os.path.join(logs_folder, f"profile_{timestamp}.folded")
+    summary_path = os.path.join(logs_folder, f"profile_{timestamp}.json")
+    try:
+        os.makedirs(logs_folder, exist_ok=True)
+        profiler.write_folded(folded_path)
+        profiler.write_summary(summary_path)
+        logger.info(f"Profile written to {folded_path} ({profiler.sample_rounds} sample rounds).")
+    except (IOError, OSError) as e:
+        logger.warning(f"Could not write profile: {e}")
@@ -0,0 +1,134 @@
+import os
+import json
+import threading
+import logging
+from dataclasses import asdict
+
+from schema import CharacterData, Stats, Rankings
+
+logger = logging.getLogger(__name__)
+
+
+def character_data_to_dict(character_data):
+    return asdict(character_data)
+
+
+def character_data_from_dict(data):
+    data = dict(data)
+    data["stats"] = Stats(**data.get("stats", {}))
+    data["rankings"] = Rankings(**data.get("rankings", {}))
+    return CharacterData(**data)
+
+
+class ResultStream:
+    """
+    Append-only JSON Lines file of finished runners, one `{"folder": ..., "data": ...}`
+    object per line. It stands in for the in-memory `final_results` dict: assigning a result
+    writes it to disk straight away, and items() reads the results back one at a time, so
+    a batch of thousands of runners never has to be held in memory.
+    """
+    def __init__(self, path, truncate=True):
+        self.path = path
+        self._lock = threading.Lock()
+        self._count = 0
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        if truncate:
+            open(self.path, "w", encoding="utf-8").close()
+
+    def __setitem__(self, folder_name, character_data):
+        self._append({"folder": folder_name, "data": character_data_to_dict(character_data)})
+        with self._lock:
+            self._count += 1
+
+    def __len__(self):
+        return self._count
+
+    def _append(self, record, sync=False):
+        line = json.dumps(record, ensure_ascii=False)
+        with self._lock:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+                if sync:
+                    f.flush()
+                    os.fsync(f.fileno())
+
+    def _records(self):
+        """Yields (line_number, record) for every readable line; a torn last line is skipped."""
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line_number, line in enumerate(f, 1):
+                if not line.strip():
+                    continue
+                try:
+                    record = json.loads(line)
+                    record["folder"]
+                except (json.JSONDecodeError, KeyError, TypeError) as e:
+                    logger.error(f"Skipping unreadable line {line_number} in {self.path}: {e}")
+                    continue
+                yield line_number, record
+
+    def items(self):
+        """
+        Yields (folder_name, CharacterData) in the order the results were written. If a folder
+        was written more than once, only its last result is returned.
+        """
+        last_line = {record["folder"]: n for n, record in self._records()}
+        for n, record in self._records():
+            if last_line.get(record["folder"]) != n:
+                continue
+            try:
+                yield record["folder"], character_data_from_dict(record["data"])
+            except (KeyError, TypeError) as e:
+                logger.error(f"Skipping unreadable result for {record['folder']} in {self.path}: {e}")
+
+    def remove(self):
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+
+
+class RunJournal(ResultStream):
+    """
+    Checkpoint journal of a batch run. Every scanned folder is recorded together with a
+    fingerprint of its screenshots and fsync'ed before the folder is moved, so a run that is
+    killed half-way can be resumed: folders whose fingerprint is already journaled are not
+    OCR'd again, and their results are merged together with the new ones. The journal is
+    kept across runs until clear() is called after a successful merge.
+    """
+    def __init__(self, path):
+        super().__init__(path, truncate=False)
+        self._terminate_torn_line()
+        self._fingerprints = {record["folder"]: record.get("fingerprint") for _, record in self._records()}
+
+    def __len__(self):
+        return len(self._fingerprints)
+
+    def __setitem__(self, folder_name, character_data):
+        self.record(folder_name, None, character_data)
+
+    def _terminate_torn_line(self):
+        """A crash mid-write can leave a last line without newline; close it so appends stay separate."""
+        if not os.path.exists(self.path) or os.path.getsize(self.path) == 0:
+            return
+        with open(self.path, "rb+") as f:
+            f.seek(-1, os.SEEK_END)
+            if f.read(1) != b"\n":
+                f.write(b"\n")
+
+    def record(self, folder_name, fingerprint, character_data):
+        self._append({"folder": folder_name, "fingerprint": fingerprint,
+                      "data": character_data_to_dict(character_data)}, sync=True)
+        with self._lock:
+            self._fingerprints[folder_name] = fingerprint
+
+    def completed(self):
+        """Returns {folder_name: fingerprint} of every journaled folder."""
+        with self._lock:
+            return dict(self._fingerprints)
+
+    def clear(self):
+        self.remove()
+        with self._lock:
+            self._fingerprints.clear()
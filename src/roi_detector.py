@@ -2,12 +2,15 @@ import cv2
 import numpy as np
 import sys
 from skimage.metrics import structural_similarity
-import easyocr
 import json
 import os
 from difflib import get_close_matches
-import re
+import math
+import bisect
 import logging
+from concurrent.futures import ThreadPoolExecutor
+import perf
+from spark_parser import detect_boxes
 
 # --- Load Configuration ---
 if getattr(sys, 'frozen', False):
@@ -20,7 +23,6 @@ with open(CONFIG_PATH, 'r') as f:
     config = json.load(f)
     
 SPARK_ROI_CONFIG = config["SPARK_ROI_DETECTION"]
-SPARK_BOX_HEIGHT = config["SPARK_BOX_HEIGHT"] # New config load
 
 
 def load_spark_info():
@@ -39,10 +41,15 @@ def load_spark_info():
 spark_info = load_spark_info()
 BLUE_SPARK_KEYWORDS = spark_info['blue']
 
+# Lower-cased blue keywords for the exact-match fast path, and bucketed by length for the
+# fuzzy fallback: a difflib ratio >= 0.8 is only possible when the shorter string is at
+# least 2/3 as long as the longer one.
+BLUE_KEYWORD_LOOKUP = {keyword.lower(): keyword for keyword in BLUE_SPARK_KEYWORDS}
+BLUE_KEYWORDS_BY_LENGTH = {}
+for _keyword in BLUE_KEYWORD_LOOKUP:
+    BLUE_KEYWORDS_BY_LENGTH.setdefault(len(_keyword), []).append(_keyword)
 
-def get_screenshot_width(image_width):
-    # Assuming a fixed width for a single screenshot based on observations
-    return 540 # Approximate width of a single screenshot
+IGNORE_KEYWORDS = {"sparks", "legacy origin", "rank", "3", "4", "3.", "4."}
 
 
 def are_rois_similar(roi1, roi2, threshold=0.9):
@@ -62,29 +69,43 @@ def are_rois_similar(roi1, roi2, threshold=0.9):
     return score > threshold
 
 
-# ---------------- Helper: Detect Boxes (from spark_parser.py) ----------------
-def _detect_boxes(column_img):
-    """Detects horizontal boxes in a spark column image."""
-    h, w = column_img.shape[:2]
-    if h == 0 or w == 0:
+# ---------------- Helper: Blue Keyword Match ----------------
+def _match_blue_keyword(text):
+    """Returns the blue spark keyword `text` reads as, or None."""
+    word = text.lower()
+    keyword = BLUE_KEYWORD_LOOKUP.get(word)
+    if keyword is not None:
+        return keyword
+    for length in range(math.ceil(len(word) * 2 / 3), len(word) * 3 // 2 + 1):
+        for candidate in BLUE_KEYWORDS_BY_LENGTH.get(length, ()):
+            if get_close_matches(candidate, [word], n=1, cutoff=0.8):
+                return BLUE_KEYWORD_LOOKUP[candidate]
+    return None
+
+
+# ---------------- Helper: Zone Deduplication ----------------
+def _suppress_duplicate_zones(zones, iou_threshold=0.5):
+    """
+    Drops every zone whose IoU with an earlier kept zone exceeds `iou_threshold`, keeping
+    the original order. The IoU of each kept zone against all remaining ones is computed
+    in one NumPy pass.
+    """
+    if not zones:
         return []
-    
-    gray = cv2.cvtColor(column_img, cv2.COLOR_BGR2GRAY)
-    mid_x = w // 2
-
-    # Find first non-white-ish pixel starting from the top
-    y_start = next((y for y in range(h) if gray[y, mid_x] < 200), 0)
-
-    boxes = []
-    y = y_start
-
-    while y + SPARK_BOX_HEIGHT <= h:
-        boxes.append((y, y + SPARK_BOX_HEIGHT))
-        y += SPARK_BOX_HEIGHT
-
-    if h - y >= 40:  # only add if at least 40 pixels tall
-        boxes.append((y, h))
-    return boxes
+    boxes = np.array(zones, dtype=np.float64)
+    areas = (boxes[:, 2] - boxes[:, 0]) * (boxes[:, 3] - boxes[:, 1])
+    order = np.arange(len(zones))
+    kept = []
+    while order.size:
+        i, rest = order[0], order[1:]
+        kept.append(zones[i])
+        x_overlap = np.clip(np.minimum(boxes[i, 2], boxes[rest, 2]) - np.maximum(boxes[i, 0], boxes[rest, 0]), 0, None)
+        y_overlap = np.clip(np.minimum(boxes[i, 3], boxes[rest, 3]) - np.maximum(boxes[i, 1], boxes[rest, 1]), 0, None)
+        intersection = x_overlap * y_overlap
+        union = areas[i] + areas[rest] - intersection
+        iou = np.divide(intersection, union, out=np.zeros_like(union), where=union > 0)
+        order = rest[iou <= iou_threshold]
+    return kept
 
 
 # ---------------- Helper: Get Average OCR Confidence ----------------
@@ -103,210 +124,207 @@ def _get_avg_confidence(roi, reader):
         return 0.0 # Error during OCR
 
 
-def detect_spark_zones(image, reader, debug_image_path=None):
-    """Detect spark zones based on blue spark keywords and other heuristics."""
+def _load_screenshot(image):
+    """Accepts either a BGR array or an image path and returns the BGR array."""
+    if isinstance(image, str):
+        # Ignore EXIF orientation so sizes match the image headers, as stitch_images_bgr does.
+        img = cv2.imread(image, cv2.IMREAD_COLOR | cv2.IMREAD_IGNORE_ORIENTATION)
+        if img is None:
+            raise ValueError(f"Could not read image: {image}")
+        return img
+    return image
 
+
+def _find_candidate_zones(image, reader):
+    """
+    Finds candidate spark zones in a single screenshot. Returns a list of dicts holding the
+    zone box in screenshot coordinates and small copies of the first blue/pink spark boxes,
+    which are all that is needed later to judge the zone without keeping the screenshot.
+    """
     h, w, _ = image.shape
-    debug_image = image.copy()
     logger = logging.getLogger(__name__)
 
     # Use a fixed ratio of the height to determine the starting point.
     start_y = int(h * 0.48)
 
-    # Perform OCR on the entire image once.
+    # Perform OCR on the screenshot once.
     ocr_results = reader.readtext(image, detail='word')
 
     # Filter OCR results to only include items below the starting threshold.
     filtered_ocr_results = [res for res in ocr_results if res[0][0][1] > start_y]
 
-    if debug_image_path:
-        cv2.line(debug_image, (0, start_y), (w, start_y), (255, 0, 0), 3) # Draw crop line
-        for (bbox, text, _) in filtered_ocr_results: # Draw only filtered results
-            tl, _, br, _ = bbox
-            tl = (int(tl[0]), int(tl[1]))
-            br = (int(br[0]), int(br[1]))
-            cv2.rectangle(debug_image, tl, br, (0, 255, 0), 2)
-            cv2.putText(debug_image, text, (tl[0], tl[1] - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 0, 255), 2)
-        #cv2.imwrite(debug_image_path, debug_image)
-
-    single_screenshot_width = get_screenshot_width(w)
-    potential_zones = []
     blue_spark_detections = []
 
-    IGNORE_KEYWORDS = ["sparks", "legacy origin", "rank", "3", "4", "3.", "4."]
+    # One detection per OCR word that reads as a blue spark keyword.
+    for (bbox, text, _) in filtered_ocr_results:
+        if text.lower() in IGNORE_KEYWORDS:
+            continue
+        keyword = _match_blue_keyword(text)
+        if keyword is None:
+            continue
+
+        tl, _, br, _ = bbox
+        x1_text, y1_text = int(tl[0]), int(tl[1])
+        blue_spark_detections.append({
+            'keyword': keyword,
+            'bbox': bbox,
+            'x1_text': x1_text,
+            'y1_text': y1_text
+        })
+
+    # Sorted title rows, to look up the "next" blue spark by bisection
+    rows = sorted(detection['y1_text'] for detection in blue_spark_detections)
+
+    # `image` is always a single screenshot, so every zone starts at the same fixed offset
+    # from its left edge, whatever the screenshot's width.
+    zone_x1 = SPARK_ROI_CONFIG["OFFSET_FROM_SCREENSHOT_LEFT_EDGE"]
+    zone_x2 = zone_x1 + SPARK_ROI_CONFIG["FIXED_SPARK_AREA_WIDTH"]
 
-    for keyword in BLUE_SPARK_KEYWORDS:
-        for (bbox, text, _) in filtered_ocr_results:
-            if text.lower() in IGNORE_KEYWORDS:
-                continue
+    potential_zones = []
+    for y1_text in rows:
+        zone_y1 = y1_text + SPARK_ROI_CONFIG["ZONE_Y1_OFFSET"]
 
-            tl, _, br, _ = bbox
-            x1_text, y1_text = int(tl[0]), int(tl[1])
-            
-            matches = get_close_matches(keyword.lower(), [text.lower()], n=1, cutoff=0.8)
-            if matches:
-                blue_spark_detections.append({
-                    'keyword': keyword,
-                    'bbox': bbox,
-                    'x1_text': x1_text,
-                    'y1_text': y1_text,
-                    'screenshot_index': x1_text // single_screenshot_width
-                })
-    
-    # Sort detections by y-coordinate to easily find the "next" blue spark
-    blue_spark_detections.sort(key=lambda d: d['y1_text'])
+        # The bottom of the zone is the top of the next blue spark title, or the
+        # fallback near the bottom of the screenshot.
+        next_index = bisect.bisect_right(rows, y1_text)
+        if next_index < len(rows):
+            zone_y2 = rows[next_index] + SPARK_ROI_CONFIG["ZONE_Y2_NEXT_SPARK_OFFSET"]
+        else:
+            zone_y2 = h + SPARK_ROI_CONFIG["ZONE_Y2_FALLBACK"]
 
-    for i, current_spark in enumerate(blue_spark_detections):
-        screenshot_index = current_spark['screenshot_index']
-        x1_text = current_spark['x1_text']
-        y1_text = current_spark['y1_text']
+        potential_zones.append((zone_x1, zone_y1, zone_x2, zone_y2))
 
-        # Fixed offset from the left edge of a single screenshot
-        offset_from_screenshot_left_edge = SPARK_ROI_CONFIG["OFFSET_FROM_SCREENSHOT_LEFT_EDGE"]
-        fixed_spark_area_width = SPARK_ROI_CONFIG["FIXED_SPARK_AREA_WIDTH"]
+    # Keep zones top to bottom so deduplication keeps the same zone as before
+    potential_zones.sort(key=lambda zone: zone[1])
+    deduplicated_zones = _suppress_duplicate_zones(potential_zones)
+
+    candidates = []
+    for zone in deduplicated_zones:
+        x1, y1, x2, y2 = [int(v) for v in zone]
+        zone_crop = image[max(0, y1):max(0, y2), max(0, x1):max(0, x2)]
+        zone_h, zone_w = zone_crop.shape[:2]
+        blue_roi = pink_roi = None
+
+        if zone_h > 0 and zone_w > 0:
+            # Split zone into columns
+            col_w = zone_w // 2
+            left_col = zone_crop[:, :col_w]
+            right_col = zone_crop[:, col_w:]
+
+            # Find boxes in each column
+            left_boxes = detect_boxes(left_col)
+            right_boxes = detect_boxes(right_col)
+
+            # "Blue" spark area is the left column's first box, "pink" the right column's.
+            # Note: This logic assumes pink is *always* 1st in right col,
+            # which matches the parser's 'hint' logic.
+            if left_boxes:
+                y1_b, y2_b = left_boxes[0]
+                blue_roi = left_col[y1_b:y2_b, :].copy()
+            if right_boxes:
+                y1_p, y2_p = right_boxes[0]
+                pink_roi = right_col[y1_p:y2_p, :].copy()
+
+        candidates.append({'box': zone, 'blue_roi': blue_roi, 'pink_roi': pink_roi})
+
+    logger.debug(f"Found {len(candidates)} candidate spark zones in screenshot of width {w}.")
+    return candidates, (w, h)
+
+
+def detect_spark_zones(images, reader, max_workers=1):
+    """
+    Detect spark zones based on blue spark keywords and other heuristics.
+
+    `images` is the list of inspiration screenshots of one entry, given either as BGR
+    arrays or as file paths (loaded one at a time). Every screenshot is searched on its own,
+    optionally in parallel, so no stitched image is ever needed. Returns up to three
+    `(image_index, (x1, y1, x2, y2))` tuples with boxes in that screenshot's coordinates,
+    ordered left to right as they appear across the screenshots.
+    """
+    logger = logging.getLogger(__name__)
 
-        zone_x1 = screenshot_index * single_screenshot_width + offset_from_screenshot_left_edge
-        zone_x2 = zone_x1 + fixed_spark_area_width
-        
-        zone_y1 = y1_text + SPARK_ROI_CONFIG["ZONE_Y1_OFFSET"]
+    def scan(image):
+        with perf.span("detect_spark_zones.scan_screenshot"):
+            return _find_candidate_zones(_load_screenshot(image), reader)
 
-        # Determine zone_y2 dynamically
-        zone_y2 = h + SPARK_ROI_CONFIG["ZONE_Y2_FALLBACK"]
+    if max_workers > 1 and len(images) > 1:
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(images))) as pool:
+            per_screenshot = list(pool.map(scan, images))
+    else:
+        per_screenshot = [scan(image) for image in images]
 
-        # Find the next blue spark in the same screenshot column
-        for next_spark in blue_spark_detections[i+1:]:
-            if next_spark['screenshot_index'] == screenshot_index:
-                # The bottom of the current zone is the top of the next zone's title
-                zone_y2 = next_spark['y1_text'] + SPARK_ROI_CONFIG["ZONE_Y2_NEXT_SPARK_OFFSET"]
-                break
-        
-        potential_zones.append((zone_x1, zone_y1, zone_x2, zone_y2))
+    # Offsets of each screenshot as if they were laid out side by side; used for ordering
+    # and for the distance-to-center heuristic, exactly like the old stitched layout.
+    offsets = []
+    total_width, max_height = 0, 0
+    for _, (w, h) in per_screenshot:
+        offsets.append(total_width)
+        total_width += w
+        max_height = max(max_height, h)
 
-    # Deduplicate zones using IoU
     deduplicated_zones = []
-    for zone in potential_zones:
-        is_duplicate = False
-        for existing_zone in deduplicated_zones:
-            # Calculate intersection over union (IoU)
-            x_overlap = max(0, min(zone[2], existing_zone[2]) - max(zone[0], existing_zone[0]))
-            y_overlap = max(0, min(zone[3], existing_zone[3]) - max(zone[1], existing_zone[1]))
-            
-            intersection_area = x_overlap * y_overlap
-            
-            zone_area = (zone[2] - zone[0]) * (zone[3] - zone[1])
-            existing_zone_area = (existing_zone[2] - existing_zone[0]) * (existing_zone[3] - existing_zone[1])
-            
-            union_area = float(zone_area + existing_zone_area - intersection_area)
-            
-            if union_area > 0 and (intersection_area / union_area) > 0.5: # If IoU > 0.5, consider it a duplicate
-                is_duplicate = True
-                break
-        if not is_duplicate:
-            deduplicated_zones.append(zone)
+    for image_index, (candidates, _) in enumerate(per_screenshot):
+        for candidate in candidates:
+            deduplicated_zones.append((image_index, candidate))
+
+    def layout_key(item):
+        image_index, candidate = item
+        x1, y1 = candidate['box'][0], candidate['box'][1]
+        return (offsets[image_index] + x1, y1)
 
     # --- New Selection Logic ---
     final_selected_zones = []
 
     # Sort by x1 ascending, then y1 ascending for consistent selection
-    deduplicated_zones.sort(key=lambda z: (z[0], z[1]))
+    deduplicated_zones.sort(key=layout_key)
 
-    top_leftmost_zone = None
-    bottom_rightmost_zone = None
-    
     if len(deduplicated_zones) > 0:
         top_leftmost_zone = deduplicated_zones[0]
         final_selected_zones.append(top_leftmost_zone)
 
-    if len(deduplicated_zones) > 0:
         # Find bottom-rightmost zone (largest x, then largest y)
-        deduplicated_zones.sort(key=lambda z: (z[0], z[1]), reverse=True) # Sort by x1 descending, then y1 descending
-        bottom_rightmost_zone = deduplicated_zones[0]
-        if bottom_rightmost_zone not in final_selected_zones:
+        bottom_rightmost_zone = deduplicated_zones[-1]
+        if bottom_rightmost_zone is not top_leftmost_zone:
             final_selected_zones.append(bottom_rightmost_zone)
 
     # Middle zone logic
     if len(final_selected_zones) < 3:
-        middle_zone_to_add = None
-        remaining_zones = [z for z in deduplicated_zones if z not in final_selected_zones]
+        remaining_zones = [z for z in deduplicated_zones if not any(z is f for f in final_selected_zones)]
 
-        # Calculate image center for distance sorting
-        image_center_x = w / 2
-        image_center_y = h / 2
+        # Calculate layout center for distance sorting
+        image_center_x = total_width / 2
+        image_center_y = max_height / 2
         
         surviving_zones_with_dist = []
+        for image_index, candidate in remaining_zones:
+            zone = candidate['box']
+            if candidate['blue_roi'] is None and candidate['pink_roi'] is None:
+                continue
 
-        if remaining_zones:
-            for zone in remaining_zones:
-                x1, y1, x2, y2 = [int(v) for v in zone]
-                
-                # Crop the zone from the original image
-                zone_crop = image[y1:y2, x1:x2]
-                zone_h, zone_w, _ = zone_crop.shape
-
-                if zone_h == 0 or zone_w == 0:
-                    continue
-
-                # Split zone into columns
-                col_w = zone_w // 2
-                left_col = zone_crop[:, :col_w]
-                right_col = zone_crop[:, col_w:]
-
-                # Find boxes in each column
-                left_boxes = _detect_boxes(left_col)
-                right_boxes = _detect_boxes(right_col)
-
-                blue_conf = 0.0
-                pink_conf = 0.0
-
-                # Check confidence of "blue" spark area (left col, 1st box)
-                if left_boxes:
-                    y1_b, y2_b = left_boxes[0]
-                    blue_roi = left_col[y1_b:y2_b, :]
-                    blue_conf = _get_avg_confidence(blue_roi, reader)
-
-                # Check confidence of "pink" spark area (right col, 1st box)
-                # Note: This logic assumes pink is *always* 1st in right col,
-                # which matches the parser's 'hint' logic.
-                if right_boxes:
-                    y1_p, y2_p = right_boxes[0]
-                    pink_roi = right_col[y1_p:y2_p, :]
-                    pink_conf = _get_avg_confidence(pink_roi, reader)
-
-                logger.debug(f"Zone {zone} confs: Blue={blue_conf:.2f}, Pink={pink_conf:.2f}")
-
-                # Filter: Disregard if either blue or pink conf is < 0.3
-                if blue_conf < 0.3 or pink_conf < 0.3:
-                    logger.debug(f"  -> REJECTED zone {zone} due to low confidence.")
-                    continue
-                
-                # If it survives, calculate its distance to center
-                center_x = (x1 + x2) / 2
-                center_y = (y1 + y2) / 2
-                dist_sq = (center_x - image_center_x)**2 + (center_y - image_center_y)**2
-                surviving_zones_with_dist.append((dist_sq, zone))
-
-            # Sort surviving zones by distance to image center
-            if surviving_zones_with_dist:
-                surviving_zones_with_dist.sort(key=lambda x: x[0])
-                middle_zone_to_add = surviving_zones_with_dist[0][1]
-
-
-        if middle_zone_to_add and middle_zone_to_add not in final_selected_zones:
-            final_selected_zones.append(middle_zone_to_add)
+            with perf.span("detect_spark_zones.confidence_check"):
+                blue_conf = _get_avg_confidence(candidate['blue_roi'], reader) if candidate['blue_roi'] is not None else 0.0
+                pink_conf = _get_avg_confidence(candidate['pink_roi'], reader) if candidate['pink_roi'] is not None else 0.0
 
-    # Sort the final selected zones for consistent output (e.g., left to right, top to bottom)
-    final_selected_zones.sort(key=lambda z: (z[0], z[1]))
+            logger.debug(f"Zone {zone} in screenshot {image_index} confs: Blue={blue_conf:.2f}, Pink={pink_conf:.2f}")
 
-#    if debug_image_path:
-#        # Draw the final zones on the debug image
-#        zone_debug_image = image.copy() # Use a fresh copy of the original image
-#        for (x1, y1, x2, y2) in final_selected_zones:
-#            cv2.rectangle(zone_debug_image, (x1, y1), (x2, y2), (0, 0, 255), 3) # Red rectangle for final zones
-        
-#        dir_name = os.path.dirname(debug_image_path)
-#        base_name = os.path.basename(debug_image_path)
-#        name, ext = os.path.splitext(base_name)
-#        new_debug_path = os.path.join(dir_name, f"{name}_zones{ext}")
-#        cv2.imwrite(new_debug_path, zone_debug_image)
+            # Filter: Disregard if either blue or pink conf is < 0.3
+            if blue_conf < 0.3 or pink_conf < 0.3:
+                logger.debug(f"  -> REJECTED zone {zone} due to low confidence.")
+                continue
+            
+            # If it survives, calculate its distance to center
+            x1, y1, x2, y2 = zone
+            center_x = offsets[image_index] + (x1 + x2) / 2
+            center_y = (y1 + y2) / 2
+            dist_sq = (center_x - image_center_x)**2 + (center_y - image_center_y)**2
+            surviving_zones_with_dist.append((dist_sq, (image_index, candidate)))
+
+        # Sort surviving zones by distance to layout center
+        if surviving_zones_with_dist:
+            surviving_zones_with_dist.sort(key=lambda x: x[0])
+            final_selected_zones.append(surviving_zones_with_dist[0][1])
+
+    # Sort the final selected zones for consistent output (e.g., left to right, top to bottom)
+    final_selected_zones.sort(key=layout_key)
 
-    return final_selected_zones[:3]
\ No newline at end of file
+    return [(image_index, candidate['box']) for image_index, candidate in final_selected_zones[:3]]
@@ -0,0 +1,167 @@
+import os
+import sys
+import json
+import base64
+import itertools
+import logging
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import cv2
+import numpy as np
+from PIL import Image
+
+import perf
+from roi_detector import detect_spark_zones
+
+logger = logging.getLogger(__name__)
+
+# --- Load Configuration ---
+if getattr(sys, 'frozen', False):
+    BUNDLED_ROOT = sys._MEIPASS
+    CONFIG_PATH = os.path.join(BUNDLED_ROOT, 'src', 'config.json')
+    BASE_DIR = os.path.dirname(sys.executable)
+else:
+    CONFIG_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'config.json')
+    BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+with open(CONFIG_PATH, 'r') as f:
+    config = json.load(f)
+
+ROI_REVIEW_CONFIG = config["ROI_REVIEW"]
+REVIEW_PATH = os.path.join(BASE_DIR, "data", "roi_review.json")
+REVIEW_VERSION = 2
+# cv2 can decode JPEGs at 1/2, 1/4 or 1/8 size directly, which is much cheaper than a full decode.
+_REDUCED_DECODE_FLAGS = ((8, cv2.IMREAD_REDUCED_COLOR_8), (4, cv2.IMREAD_REDUCED_COLOR_4), (2, cv2.IMREAD_REDUCED_COLOR_2))
+
+
+# ---------------- Helper: Thumbnails ----------------
+def _decode_reduced(path, scale):
+    """Decodes a screenshot at the smallest size cv2 supports that is still at least `scale`."""
+    flags = cv2.IMREAD_COLOR
+    for factor, reduced_flag in _REDUCED_DECODE_FLAGS:
+        if 1 / factor >= scale:
+            flags = reduced_flag
+            break
+    return cv2.imread(path, flags | cv2.IMREAD_IGNORE_ORIENTATION)
+
+
+def _encode_thumbnail(image_paths, sizes):
+    """
+    Lays the screenshots side by side at THUMBNAIL_SCALE and returns the result as a base64
+    JPEG. Each screenshot is decoded at reduced size on its own; the full-size stitched
+    image is never built.
+    """
+    scale = ROI_REVIEW_CONFIG["THUMBNAIL_SCALE"]
+    thumb_sizes = [(max(1, int(w * scale)), max(1, int(h * scale))) for w, h in sizes]
+    thumb = np.zeros((max(h for _, h in thumb_sizes), sum(w for w, _ in thumb_sizes), 3), dtype=np.uint8)
+    x_offset = 0
+    for path, (w, h) in zip(image_paths, thumb_sizes):
+        decoded = _decode_reduced(path, scale)
+        if decoded is not None:
+            thumb[:h, x_offset:x_offset + w] = cv2.resize(decoded, (w, h), interpolation=cv2.INTER_AREA)
+        x_offset += w
+    ok, buf = cv2.imencode(".jpg", thumb, [cv2.IMWRITE_JPEG_QUALITY, ROI_REVIEW_CONFIG["JPEG_QUALITY"]])
+    if not ok:
+        return None
+    return base64.b64encode(buf.tobytes()).decode("ascii")
+
+
+def decode_thumbnail(review_entry):
+    """Returns the entry's thumbnail as an RGB PIL image scaled back up to the stitched size."""
+    buf = np.frombuffer(base64.b64decode(review_entry["thumbnail"]), dtype=np.uint8)
+    thumb = cv2.imdecode(buf, cv2.IMREAD_COLOR)
+    width, height = review_entry["size"]
+    return Image.fromarray(cv2.cvtColor(thumb, cv2.COLOR_BGR2RGB)).resize((width, height))
+
+
+# ---------------- Helper: Change Detection ----------------
+def _file_signature(path):
+    """[size in bytes, modification time in ns] of a screenshot."""
+    stat = os.stat(path)
+    return [stat.st_size, stat.st_mtime_ns]
+
+
+def is_current(review_entry, image_paths):
+    """True if the review entry was built from exactly these screenshots and none changed since."""
+    if review_entry.get("image_paths") != list(image_paths):
+        return False
+    try:
+        return review_entry.get("files") == [_file_signature(p) for p in image_paths]
+    except OSError:
+        return False
+
+
+# ---------------- Review Export ----------------
+def build_review_entry(image_paths, reader):
+    """
+    Detects the spark zones of one entry and returns its review record: the screenshots with
+    their size and mtime, their x offsets in the side-by-side image, the zones as
+    (image_index, box) in screenshot coordinates, the stitched size and a downscaled base64
+    JPEG thumbnail. Offsets come from the image headers and each screenshot is searched on
+    its own, so no stitched image is built.
+    """
+    with perf.span("roi_review.build_entry"):
+        files = [_file_signature(p) for p in image_paths]
+        sizes = []
+        for p in image_paths:
+            with Image.open(p) as img:
+                sizes.append(img.size)
+        offsets = list(itertools.accumulate([0] + [w for w, _ in sizes[:-1]]))
+        zones = detect_spark_zones(list(image_paths), reader)
+        thumbnail = _encode_thumbnail(image_paths, sizes)
+    return {
+        "image_paths": list(image_paths),
+        "files": files,
+        "offsets": offsets,
+        "zones": [[int(image_index), [int(v) for v in box]] for image_index, box in zones],
+        "size": [sum(w for w, _ in sizes), max(h for _, h in sizes)],
+        "thumbnail": thumbnail,
+    }
+
+
+def export_review(entries, reader, path=REVIEW_PATH, max_workers=1):
+    """
+    Precomputes the spark zones of every entry ({folder_name: image_paths}) in parallel and
+    writes them, with thumbnails, to the review file at `path`. Entries that fail are
+    logged and left out; the GUI detects those itself. Returns the number of entries written.
+    """
+    review = {}
+    with ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix="review_worker") as pool:
+        futures = {pool.submit(build_review_entry, image_paths, reader): folder_name
+                   for folder_name, image_paths in entries.items()}
+        for future in as_completed(futures):
+            folder_name = futures[future]
+            try:
+                review[folder_name] = future.result()
+            except Exception as e:
+                logger.error(f"Could not precompute spark zones for {folder_name}: {e}")
+
+    data = {
+        "version": REVIEW_VERSION,
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "entries": {name: review[name] for name in entries if name in review},
+    }
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f)
+    os.replace(tmp_path, path)
+    logger.info(f"Wrote spark zones of {len(data['entries'])}/{len(entries)} entries to {path}.")
+    return len(data["entries"])
+
+
+def load_review(path=REVIEW_PATH):
+    """Returns {folder_name: review entry} from a review file, or {} if it is missing or unreadable."""
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (IOError, OSError, json.JSONDecodeError) as e:
+        logger.warning(f"Could not read review file {path}: {e}")
+        return {}
+    if data.get("version") != REVIEW_VERSION:
+        logger.warning(f"Ignoring review file {path} with unsupported version {data.get('version')}.")
+        return {}
+    return data.get("entries", {})
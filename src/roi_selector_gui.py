@@ -1,13 +1,16 @@
 import os
 import glob
+import bisect
+import itertools
 import cv2
-import numpy as np
 import threading
 from tkinter import Tk, Canvas, Button, Frame, BOTH, font as tkFont, ttk
 from PIL import Image, ImageTk
 from roi_detector import detect_spark_zones
 from tabs import detect_active_tab
-import easyocr
+from image_utils import stitch_images_bgr, ByteCappedCache, image_nbytes, low_memory_cache_bytes
+from ocr_backends import create_reader
+from roi_review import decode_thumbnail, is_current, load_review
 
 # --- Umamusume Themed Colors (from uma_analyzer_themed.py) ---
 UMA_LIGHT_BG = "#FFF8E1"
@@ -28,36 +31,69 @@ def get_entries(input_folder):
         folder_path = os.path.join(input_folder, folder_name)
         if not os.path.isdir(folder_path):
             continue
-        image_paths = sorted(glob.glob(os.path.join(folder_path, "*.*")))
-        non_insp_images = []
-        for img_path in image_paths:
-            if detect_active_tab(img_path) == "inspiration":
-                non_insp_images.append(img_path)
+        non_insp_images = get_entry_images(folder_path)
         if non_insp_images:
             entries[folder_name] = non_insp_images
     return entries
 
-def combine_images_horizontally(image_paths):
-    images = [Image.open(p).convert("RGB") for p in image_paths]
-    total_width = sum(img.width for img in images)
-    max_height = max(img.height for img in images)
-    combined = Image.new("RGB", (total_width, max_height), (0, 0, 0))
-    x_offset = 0
-    for img in images:
-        combined.paste(img, (x_offset, 0))
-        x_offset += img.width
-    return combined
+def get_entry_images(folder_path):
+    """Return the sorted inspiration image paths inside a single entry folder."""
+    image_paths = sorted(glob.glob(os.path.join(folder_path, "*.*")))
+    return [p for p in image_paths if detect_active_tab(p) == "inspiration"]
+
+def zone_to_combined_box(zone, offsets):
+    """Converts an (image_index, box) spark zone into a box on the side-by-side display image."""
+    image_index, (x1, y1, x2, y2) = zone
+    offset = offsets[image_index]
+    return (x1 + offset, y1, x2 + offset, y2)
+
+def combined_box_to_zone(box, offsets):
+    """Maps a box on the side-by-side display image back to the screenshot its left edge is in."""
+    x1, y1, x2, y2 = box
+    image_index = max(0, bisect.bisect_right(offsets, x1) - 1)
+    offset = offsets[image_index]
+    return image_index, (x1 - offset, y1, x2 - offset, y2)
+
+def load_entry_for_review(image_paths, reader):
+    """
+    Stitches an entry's screenshots for display and detects its spark zones.
+    Returns the RGB PIL image, the zones as boxes on that image, and the x offset of
+    each screenshot within it.
+    """
+    img_cv, views = stitch_images_bgr(image_paths)
+    offsets = list(itertools.accumulate([0] + [v.shape[1] for v in views[:-1]]))
+    detected_zones = detect_spark_zones(views, reader)
+    img_original = Image.fromarray(cv2.cvtColor(img_cv, cv2.COLOR_BGR2RGB))
+    return img_original, [zone_to_combined_box(z, offsets) for z in detected_zones], offsets
+
+def load_reviewed_entry(review_entry, image_paths):
+    """
+    Same result as load_entry_for_review, but with the spark zones taken from a review
+    file written by --export-review, so no OCR runs. The screenshots are stitched again for
+    a sharp display; if they can't be read, the review thumbnail is shown instead.
+    """
+    offsets = review_entry["offsets"]
+    boxes = [zone_to_combined_box((image_index, tuple(box)), offsets) for image_index, box in review_entry["zones"]]
+    try:
+        img_cv, _ = stitch_images_bgr(image_paths)
+        img_original = Image.fromarray(cv2.cvtColor(img_cv, cv2.COLOR_BGR2RGB))
+    except (IOError, OSError, ValueError):
+        img_original = decode_thumbnail(review_entry)
+    return img_original, boxes, offsets
 
 # ---------------- ROI Selector ----------------
 class ROISelector:
     HANDLE_SIZE = 8
 
-    def __init__(self, master, entries_dict, processing_q):
+    def __init__(self, master, entries_dict, processing_q, review=None):
         self.master = master
         self.master.configure(bg=UMA_LIGHT_BG)
         self.processing_queue = processing_q
 
-        self.reader = easyocr.Reader(['en'])
+        # Zones precomputed by --export-review; only entries missing from it need the OCR reader.
+        self.review = load_review() if review is None else review
+        self._reader = None
+        self._reader_lock = threading.Lock()
 
         self.entries = list(entries_dict.items())
         self.entry_index = 0
@@ -74,7 +110,8 @@ class ROISelector:
         self.undo_stack = []
         self.redo_stack = []
 
-        self.preloaded_data = {}
+        # Preloaded entries hold a whole stitched image, so their size is capped in low-memory mode.
+        self.preloaded_data = ByteCappedCache(low_memory_cache_bytes(), size_fn=lambda entry: image_nbytes(entry[1]))
         self.preloader_thread = None
 
         main_frame = Frame(master, bg=UMA_LIGHT_BG)
@@ -151,14 +188,25 @@ class ROISelector:
         thread.daemon = True
         thread.start()
 
+    @property
+    def reader(self):
+        with self._reader_lock:
+            if self._reader is None:
+                self._reader = create_reader()
+            return self._reader
+
+    def _load_entry(self, entry_name, image_paths):
+        reviewed = self.review.get(entry_name)
+        if reviewed is not None and is_current(reviewed, image_paths):
+            return load_reviewed_entry(reviewed, image_paths)
+        return load_entry_for_review(image_paths, self.reader)
+
     def _load_image_worker(self, index):
         entry_name, image_paths = self.entries[index]
         try:
-            img_original = combine_images_horizontally(image_paths)
-            img_cv = cv2.cvtColor(np.array(img_original), cv2.COLOR_RGB2BGR)
-            detected_rois = detect_spark_zones(img_cv, self.reader)
+            img_original, detected_rois, offsets = self._load_entry(entry_name, image_paths)
             rois = [(entry_name, roi, image_paths) for roi in detected_rois]
-            self.master.after(0, self.on_load_complete, entry_name, img_original, rois)
+            self.master.after(0, self.on_load_complete, entry_name, img_original, rois, offsets)
         except Exception as e:
             print(f"Error processing {entry_name}: {e}")
             self.master.after(0, self.on_load_error)
@@ -177,11 +225,9 @@ class ROISelector:
     def _preloader_worker(self, target_index):
         entry_name, image_paths = self.entries[target_index]
         try:
-            img_original = combine_images_horizontally(image_paths)
-            img_cv = cv2.cvtColor(np.array(img_original), cv2.COLOR_RGB2BGR)
-            detected_rois = detect_spark_zones(img_cv, self.reader)
+            img_original, detected_rois, offsets = self._load_entry(entry_name, image_paths)
             rois = [(entry_name, roi, image_paths) for roi in detected_rois]
-            self.preloaded_data[target_index] = (entry_name, img_original, rois)
+            self.preloaded_data[target_index] = (entry_name, img_original, rois, offsets)
         except Exception as e:
             print(f"Error pre-loading {entry_name}: {e}")
 
@@ -189,10 +235,11 @@ class ROISelector:
         self.show_loading(False)
         self.next_entry()
 
-    def on_load_complete(self, entry_name, img_original, rois):
+    def on_load_complete(self, entry_name, img_original, rois, offsets):
         self.show_loading(False)
         self.entry_name = entry_name
         self.img_original = img_original
+        self.screenshot_offsets = offsets
         self.rois = rois
         self.undo_stack = [list(self.rois)]
         self.redo_stack.clear()
@@ -217,8 +264,10 @@ class ROISelector:
 
     def next_entry(self):
         if hasattr(self, 'entry_name'):
-            # Add a copy of the completed entry to the processing queue
-            self.processing_queue.put((self.entry_name, self.rois.copy()))
+            # Add the completed entry to the processing queue, with boxes mapped back
+            # to the screenshot each one belongs to.
+            zones = [(name, combined_box_to_zone(box, self.screenshot_offsets), paths) for name, box, paths in self.rois]
+            self.processing_queue.put((self.entry_name, zones))
 
         self.rois.clear()
         self.undo_stack.clear()
@@ -230,9 +279,10 @@ class ROISelector:
             self.master.quit()
             return
 
-        if self.entry_index in self.preloaded_data:
-            entry_name, img_original, rois = self.preloaded_data.pop(self.entry_index)
-            self.on_load_complete(entry_name, img_original, rois)
+        # The preloader may evict the entry at any time, so pop once and check the result.
+        preloaded = self.preloaded_data.pop(self.entry_index)
+        if preloaded is not None:
+            self.on_load_complete(*preloaded)
         else:
             self.load_next_image_threaded()
 
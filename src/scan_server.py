@@ -0,0 +1,321 @@
+import os
+import sys
+import json
+import time
+import uuid
+import queue
+import base64
+import shutil
+import logging
+import threading
+import urllib.request
+import urllib.error
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+logger = logging.getLogger(__name__)
+
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg")
+
+
+class QueueFullError(Exception):
+    """Raised when a job is submitted while the job queue is at capacity."""
+
+
+class ScanJob:
+    def __init__(self, job_id, folder_path, file_count):
+        self.job_id = job_id
+        self.folder_path = folder_path
+        self.file_count = file_count
+        self.status = "queued"
+        self.created = time.time()
+        self.finished = None
+        self.result = None
+        self.error = None
+
+    def to_dict(self):
+        return {
+            "job_id": self.job_id,
+            "status": self.status,
+            "files": self.file_count,
+            "created": self.created,
+            "finished": self.finished,
+            "error": self.error,
+        }
+
+
+class ScanService:
+    """
+    Bounded job queue in front of a fixed pool of OCR workers. `process_fn` receives the
+    path of a folder holding the job's screenshots and returns the runner dict. `on_idle`,
+    if given, is called with the ids of the jobs finished since the last call whenever no
+    job is left running; no job can start while it runs.
+    """
+    def __init__(self, process_fn, jobs_folder, queue_size=16, num_workers=1, max_finished_jobs=256, on_idle=None):
+        self.process_fn = process_fn
+        self.jobs_folder = jobs_folder
+        self.num_workers = max(1, num_workers)
+        self.max_finished_jobs = max_finished_jobs
+        self.on_idle = on_idle
+        self.job_queue = queue.Queue(maxsize=queue_size)
+        self.jobs = OrderedDict()
+        self.lock = threading.Lock()
+        self.workers = []
+        # Jobs inside process_fn, and ids of the jobs finished since the service was last idle.
+        self._activity_lock = threading.Lock()
+        self._running = 0
+        self._finished_since_idle = []
+
+    def start(self):
+        os.makedirs(self.jobs_folder, exist_ok=True)
+        for i in range(self.num_workers):
+            worker = threading.Thread(target=self._worker, name=f"scan_worker-{i}", daemon=True)
+            worker.start()
+            self.workers.append(worker)
+
+    def stop(self):
+        for _ in self.workers: self.job_queue.put(None)
+        for worker in self.workers: worker.join()
+        self.workers = []
+
+    def submit(self, files):
+        """
+        Stores the uploaded files in a new job folder and queues the job.
+        `files` maps file names to raw image bytes. Raises QueueFullError when busy.
+        """
+        job_id = uuid.uuid4().hex
+        folder_path = os.path.join(self.jobs_folder, job_id)
+        os.makedirs(folder_path)
+        for name, data in files.items():
+            with open(os.path.join(folder_path, name), "wb") as f:
+                f.write(data)
+
+        job = ScanJob(job_id, folder_path, len(files))
+        with self.lock:
+            self.jobs[job_id] = job
+        try:
+            self.job_queue.put_nowait(job)
+        except queue.Full:
+            with self.lock:
+                del self.jobs[job_id]
+            shutil.rmtree(folder_path, ignore_errors=True)
+            raise QueueFullError()
+        logger.info(f"Queued scan job {job_id} with {len(files)} file(s).")
+        return job
+
+    def get(self, job_id):
+        with self.lock:
+            return self.jobs.get(job_id)
+
+    def snapshot(self, job_id):
+        """Returns (status dict, result) of a job read under the lock, or None for unknown jobs."""
+        with self.lock:
+            job = self.jobs.get(job_id)
+            if job is None:
+                return None
+            return job.to_dict(), job.result
+
+    def stats(self):
+        with self.lock:
+            counts = {}
+            for job in self.jobs.values():
+                counts[job.status] = counts.get(job.status, 0) + 1
+        return {"queued": self.job_queue.qsize(), "capacity": self.job_queue.maxsize,
+                "workers": self.num_workers, "jobs": counts}
+
+    def _worker(self):
+        while True:
+            job = self.job_queue.get()
+            try:
+                if job is None: break
+                with self._activity_lock:
+                    self._running += 1
+                with self.lock:
+                    job.status = "running"
+                # Status, result and error only change under the lock, so request handlers
+                # never see a job marked done without its result.
+                try:
+                    result = self.process_fn(job.folder_path)
+                    with self.lock:
+                        job.result = result
+                        job.finished = time.time()
+                        job.status = "done"
+                except Exception as e:
+                    logger.error(f"Scan job {job.job_id} failed: {e}")
+                    with self.lock:
+                        job.error = str(e)
+                        job.finished = time.time()
+                        job.status = "failed"
+                finally:
+                    shutil.rmtree(job.folder_path, ignore_errors=True)
+                    self._evict_finished_jobs()
+                    self._job_finished(job)
+            finally:
+                self.job_queue.task_done()
+
+    def _job_finished(self, job):
+        with self._activity_lock:
+            self._running -= 1
+            self._finished_since_idle.append(job.job_id)
+            if self._running > 0 or self.on_idle is None:
+                return
+            job_ids, self._finished_since_idle = self._finished_since_idle, []
+            try:
+                self.on_idle(job_ids)
+            except Exception as e:
+                logger.error(f"Idle callback failed: {e}")
+
+    def _evict_finished_jobs(self):
+        """Drops the oldest finished jobs so the job table does not grow forever."""
+        with self.lock:
+            finished = [jid for jid, j in self.jobs.items() if j.status in ("done", "failed")]
+            for jid in finished[:max(0, len(finished) - self.max_finished_jobs)]:
+                del self.jobs[jid]
+
+
+def _make_handler(service, max_upload_bytes):
+    class ScanRequestHandler(BaseHTTPRequestHandler):
+        """
+        POST /jobs                 {"files": {"name.png": "<base64>", ...}} -> 202 job status
+        GET  /jobs/<id>            job status
+        GET  /jobs/<id>/result     runner JSON once the job is done
+        GET  /health               queue and worker status
+        """
+        def _send_json(self, code, payload, headers=None):
+            body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+            self.send_response(code)
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            for key, value in (headers or {}).items():
+                self.send_header(key, value)
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            logger.debug(f"{self.address_string()} - {format % args}")
+
+        def do_GET(self):
+            parts = [p for p in self.path.split("?")[0].split("/") if p]
+            if parts == ["health"]:
+                return self._send_json(200, service.stats())
+            if len(parts) in (2, 3) and parts[0] == "jobs":
+                snapshot = service.snapshot(parts[1])
+                if snapshot is None:
+                    return self._send_json(404, {"error": "Unknown job."})
+                status, result = snapshot
+                if len(parts) == 2:
+                    return self._send_json(200, status)
+                if parts[2] == "result":
+                    if status["status"] == "done":
+                        return self._send_json(200, result)
+                    if status["status"] == "failed":
+                        return self._send_json(500, status)
+                    return self._send_json(409, status)
+            self._send_json(404, {"error": "Not found."})
+
+        def do_POST(self):
+            if self.path.split("?")[0].rstrip("/") != "/jobs":
+                return self._send_json(404, {"error": "Not found."})
+            length = int(self.headers.get("Content-Length") or 0)
+            if length <= 0:
+                return self._send_json(400, {"error": "Empty request body."})
+            if length > max_upload_bytes:
+                return self._send_json(413, {"error": f"Upload larger than {max_upload_bytes} bytes."})
+
+            try:
+                payload = json.loads(self.rfile.read(length))
+                files = {}
+                for name, encoded in payload["files"].items():
+                    safe_name = os.path.basename(name)
+                    if not safe_name.lower().endswith(IMAGE_EXTENSIONS):
+                        raise ValueError(f"Unsupported file type: {name}")
+                    files[safe_name] = base64.b64decode(encoded, validate=True)
+                if not files:
+                    raise ValueError("No files submitted.")
+            except (ValueError, KeyError, TypeError, AttributeError) as e:
+                return self._send_json(400, {"error": f"Invalid job payload: {e}"})
+
+            try:
+                job = service.submit(files)
+            except QueueFullError:
+                # Back-pressure: tell the client to come back later instead of buffering.
+                return self._send_json(503, {"error": "Job queue is full."}, headers={"Retry-After": "5"})
+            self._send_json(202, job.to_dict(), headers={"Location": f"/jobs/{job.job_id}"})
+
+    return ScanRequestHandler
+
+
+def create_server(process_fn, host, port, jobs_folder, queue_size=16, num_workers=1,
+                  max_upload_bytes=64 * 1024 * 1024, max_finished_jobs=256, on_idle=None):
+    """Creates the HTTP server and its job service without starting either."""
+    service = ScanService(process_fn, jobs_folder, queue_size, num_workers, max_finished_jobs, on_idle)
+    httpd = ThreadingHTTPServer((host, port), _make_handler(service, max_upload_bytes))
+    httpd.daemon_threads = True
+    return httpd, service
+
+
+def serve(process_fn, host, port, jobs_folder, **kwargs):
+    """Runs the scan server in the foreground until interrupted."""
+    httpd, service = create_server(process_fn, host, port, jobs_folder, **kwargs)
+    service.start()
+    bound_host, bound_port = httpd.server_address[:2]
+    logger.info(f"Scan server listening on http://{bound_host}:{bound_port}. Press Ctrl+C to stop.")
+    try:
+        httpd.serve_forever()
+    except KeyboardInterrupt:
+        logger.info("Scan server interrupted by user.")
+    finally:
+        httpd.server_close()
+        service.stop()
+    logger.info("Scan server stopped.")
+
+
+# ---------------- Client Helpers ----------------
+def _request_json(url, data=None):
+    request = urllib.request.Request(url, data=data, headers={"Content-Type": "application/json"})
+    try:
+        with urllib.request.urlopen(request) as response:
+            return response.status, json.loads(response.read())
+    except urllib.error.HTTPError as e:
+        return e.code, json.loads(e.read() or b"{}")
+
+
+def submit_folder(server_url, folder_path, retries=12):
+    """Uploads every screenshot in a folder as one job and returns the job id."""
+    files = {}
+    for name in sorted(os.listdir(folder_path)):
+        if name.lower().endswith(IMAGE_EXTENSIONS):
+            with open(os.path.join(folder_path, name), "rb") as f:
+                files[name] = base64.b64encode(f.read()).decode("ascii")
+    body = json.dumps({"files": files}).encode("utf-8")
+
+    for _ in range(retries):
+        status, payload = _request_json(f"{server_url.rstrip('/')}/jobs", data=body)
+        if status == 202:
+            return payload["job_id"]
+        if status != 503:
+            raise RuntimeError(f"Job submission failed ({status}): {payload.get('error')}")
+        time.sleep(5)
+    raise RuntimeError("Scan server queue stayed full; giving up.")
+
+
+def wait_for_result(server_url, job_id, poll_interval=1.0, timeout=600):
+    """Polls a job until it finishes and returns the runner JSON."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        status, payload = _request_json(f"{server_url.rstrip('/')}/jobs/{job_id}/result")
+        if status == 200:
+            return payload
+        if status != 409:
+            raise RuntimeError(f"Job {job_id} failed ({status}): {payload.get('error')}")
+        time.sleep(poll_interval)
+    raise TimeoutError(f"Job {job_id} did not finish within {timeout}s.")
+
+
+if __name__ == "__main__":
+    # Minimal client: python scan_server.py http://host:8765 path/to/screenshot_folder
+    if len(sys.argv) != 3:
+        print("Usage: python scan_server.py <server_url> <screenshot_folder>", file=sys.stderr)
+        sys.exit(1)
+    job = submit_folder(sys.argv[1], sys.argv[2])
+    print(json.dumps(wait_for_result(sys.argv[1], job), indent=2, ensure_ascii=False))
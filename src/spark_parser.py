@@ -7,6 +7,8 @@ from data_loader import SPARKS_BY_COLOR, SPARK_CORRECTION_RULES # New import
 import json
 import logging # New import
 import sys
+import perf
+from ocr_utils import read_with_retry
 
 # --- Load Configuration ---
 if getattr(sys, 'frozen', False):
@@ -23,6 +25,7 @@ YELLOW_STAR_HSV_LOWER = np.array(config["YELLOW_STAR_HSV_LOWER"])
 YELLOW_STAR_HSV_UPPER = np.array(config["YELLOW_STAR_HSV_UPPER"])
 STAR_AREA_MIN = config["STAR_AREA_MIN"]
 STAR_AREA_MAX = config["STAR_AREA_MAX"]
+SPARK_BOX_FILTER = config["SPARK_BOX_FILTER"]
 
 logger = logging.getLogger(__name__)
 
@@ -90,13 +93,37 @@ def normalize_spark(name, components=None, color_hint=None):
 
 
 
+# ---------------- Helper: Blank Box Check ----------------
+def _is_blank_box(roi):
+    """
+    Cheap check whether a spark box can hold a spark name, done before paying for OCR.
+    The text band (above the star strip, right of the icon border) is blank when its
+    grayscale is near uniform or has almost no Canny edges.
+    """
+    h = roi.shape[0]
+    text_band = roi[:int(h * 3 / 5), 40:]
+    if text_band.size == 0:
+        return True
+    gray = cv2.cvtColor(text_band, cv2.COLOR_BGR2GRAY)
+    if gray.std() < SPARK_BOX_FILTER["MIN_STD"]:
+        return True
+    edges = cv2.Canny(gray, 50, 150)
+    return np.count_nonzero(edges) / edges.size < SPARK_BOX_FILTER["MIN_EDGE_DENSITY"]
+
+
 # ---------------- Main Parsing ----------------
-def _process_spark_roi(roi, reader, color_hint=None):
-    """Helper to parse a single spark ROI, check confidence, and return results."""
+def _process_spark_roi(roi, reader, color_hint=None, stars=None):
+    """
+    Helper to parse a single spark ROI, check confidence, and return results. `stars` is
+    the box's star count if it has already been counted for the whole zone.
+    """
     if roi.size == 0:
         return None, None, 0, 0
 
-    text_results = reader.readtext(roi)
+    # The spark name sits above the star strip in the lower 2/5 of the box.
+    h, w = roi.shape[:2]
+    with perf.span("parse_sparks.ocr_box"):
+        text_results = read_with_retry(reader, roi, line_box=[0, w, 0, int(h * 3 / 5)])
     if not text_results:
         return None, None, 0, 0
 
@@ -123,7 +150,8 @@ def _process_spark_roi(roi, reader, color_hint=None):
     if not spark_name:
         return None, None, 0, 0
 
-    stars = count_yellow_stars(roi)
+    if stars is None:
+        stars = count_yellow_stars(roi)
     return color, spark_name, stars, y_pos
 
 def parse_sparks(img, reader, debug_prefix=""):
@@ -138,9 +166,16 @@ def parse_sparks(img, reader, debug_prefix=""):
 
         sparks = {c: [] for c in ["blue", "pink", "green", "white"]}
 
+        columns = [left_col, right_col]
+        with perf.span("parse_sparks.detect_boxes"):
+            column_boxes = [detect_boxes(col_img) for col_img in columns]
+        # Stars of every box are counted in one pass over the whole zone.
+        with perf.span("parse_sparks.count_stars"):
+            star_counts = count_stars_by_box(img, col_w, column_boxes)
+
         # ---- Process both columns ----
-        for i, col_img in enumerate([left_col, right_col]):
-            row_boxes = detect_boxes(col_img)
+        for i, col_img in enumerate(columns):
+            row_boxes = column_boxes[i]
 
 #            if debug_prefix:
 #                debug_col_img = col_img.copy()
@@ -150,10 +185,16 @@ def parse_sparks(img, reader, debug_prefix=""):
 
             for j, (y1, y2) in enumerate(row_boxes):
                 roi = col_img[y1:y2, :]
-                
+                stars = int(star_counts[i][j])
+
+                # A box without stars is dropped after OCR anyway, so don't OCR it.
+                if stars == 0 or _is_blank_box(roi):
+                    perf.count("spark_boxes_skipped")
+                    continue
+
                 hint = "pink" if i == 1 and j == 0 else None
 
-                color, spark_name, stars, y_pos_rel = _process_spark_roi(roi, reader, color_hint=hint)
+                color, spark_name, stars, y_pos_rel = _process_spark_roi(roi, reader, color_hint=hint, stars=stars)
 
                 if color and spark_name and stars > 0:
                     y_pos_abs = y1 + y_pos_rel
@@ -204,22 +245,56 @@ def parse_sparks(img, reader, debug_prefix=""):
 
 
 # ---------------- Helper: Detect Boxes ----------------
+BOX_BACKGROUND_MIN = 200  # Grayscale value from which a pixel counts as the white gap around boxes
+BOX_PROFILE_STEP = 8      # Every n-th pixel column is sampled for the row profile
+BOX_SNAP_TOLERANCE = SPARK_BOX_HEIGHT // 4
+
+
 def detect_boxes(column_img):
+    """
+    Splits a spark column into (y1, y2) boxes. The first box starts at the first non-white
+    pixel of the middle pixel column. Box ends are snapped to the white separator rows found
+    in the row profile when one lies within BOX_SNAP_TOLERANCE of the expected box height;
+    otherwise fixed SPARK_BOX_HEIGHT steps are used, as before. Nothing is emitted below the last row
+    with content, so blank trailing boxes are not returned.
+    """
     h, w = column_img.shape[:2]
-    gray = cv2.cvtColor(column_img, cv2.COLOR_BGR2GRAY)
-    mid_x = w // 2
+    if h == 0 or w == 0:
+        return []
 
-    y_start = next((y for y in range(h) if gray[y, mid_x] < 200), 0)
+    mid_x = w // 2
+    mid_gray = cv2.cvtColor(column_img[:, mid_x:mid_x + 1], cv2.COLOR_BGR2GRAY)[:, 0]
+    dark = mid_gray < BOX_BACKGROUND_MIN
+    y_start = int(np.argmax(dark)) if dark.any() else 0
+
+    # A row is a separator when every sampled pixel is background-white in all channels.
+    sampled = column_img[:, ::BOX_PROFILE_STEP]
+    separator = sampled.min(axis=(1, 2)) >= BOX_BACKGROUND_MIN
+    content_rows = np.flatnonzero(~separator)
+    if content_rows.size == 0 or content_rows[-1] < y_start:
+        return []
+    last_content = int(content_rows[-1])
+
+    edges = np.flatnonzero(np.diff(np.concatenate(([0], separator.astype(np.int8), [0]))))
+    gap_starts, gap_ends = edges[0::2], edges[1::2]
+    # Separators are thin; longer white runs are empty space, not a boundary between boxes.
+    thin = gap_ends - gap_starts <= BOX_SNAP_TOLERANCE
+    gap_starts, gap_ends = gap_starts[thin], gap_ends[thin]
 
-    # box_h = 88 # Removed, now using SPARK_BOX_HEIGHT
     boxes = []
     y = y_start
-
-    while y + SPARK_BOX_HEIGHT <= h: # Used SPARK_BOX_HEIGHT
-        boxes.append((y, y + SPARK_BOX_HEIGHT))
-        y += SPARK_BOX_HEIGHT
-
-    if h - y >= 40:  # only add if at least 40 pixels tall
+    while y + SPARK_BOX_HEIGHT <= h and y < last_content:
+        expected = y + SPARK_BOX_HEIGHT
+        # Nearest separator that starts around the expected end of the box.
+        i = np.searchsorted(gap_starts, expected - BOX_SNAP_TOLERANCE)
+        if i < len(gap_starts) and gap_starts[i] <= expected + BOX_SNAP_TOLERANCE:
+            boxes.append((y, int(gap_starts[i])))
+            y = int(gap_ends[i])
+        else:
+            boxes.append((y, expected))
+            y = expected
+
+    if h - y >= 40 and y < last_content:  # only add if at least 40 pixels tall
         boxes.append((y, h))
     return boxes
 
@@ -239,11 +314,58 @@ def count_yellow_stars(roi):
 
     num_labels, _, stats, _ = cv2.connectedComponentsWithStats(mask)
 
-    # Print all component areas
-    for i in range(1, num_labels):  # skip 0 (background)
-        area = stats[i, cv2.CC_STAT_AREA]
-
     # Count stars based on area
     stars = sum(1 for i in range(1, num_labels) if STAR_AREA_MIN < stats[i, cv2.CC_STAT_AREA] < STAR_AREA_MAX) # Used STAR_AREA_MIN, STAR_AREA_MAX
 
-    return min(stars, 3)
\ No newline at end of file
+    return min(stars, 3)
+
+
+def count_stars_by_box(img, col_w, column_boxes):
+    """
+    Counts the yellow stars of every spark box in a zone at once. `column_boxes` holds the
+    (y1, y2) boxes of the left and right column (split at `col_w`). The HSV conversion,
+    morphology and connected components run once on the whole zone; star components are
+    then assigned to boxes by their centroid. As in count_yellow_stars, only the lower 2/5
+    of each box, right of its first 40 px, is looked at. The morphology sees the pixels
+    around each strip rather than an image border, so a star cut by a strip edge can be
+    sized slightly differently; whole stars are counted the same (the benchmark checks
+    both functions agree on the synthetic corpus). Returns one array of per-box counts
+    (capped at 3) per column.
+    """
+    h, w = img.shape[:2]
+    if img.size == 0:
+        return [np.zeros(len(boxes), dtype=int) for boxes in column_boxes]
+
+    hsv = cv2.cvtColor(img, cv2.COLOR_BGR2HSV)
+    mask = cv2.inRange(hsv, YELLOW_STAR_HSV_LOWER, YELLOW_STAR_HSV_UPPER)
+    kernel = np.ones((3,3), np.uint8)
+    mask = cv2.morphologyEx(mask, cv2.MORPH_OPEN, kernel)
+    mask = cv2.morphologyEx(mask, cv2.MORPH_CLOSE, kernel)
+
+    # Keep only the star strip of every box; the strips are separate, so no component
+    # can span two boxes.
+    region = np.zeros((h, w), dtype=np.uint8)
+    for i, boxes in enumerate(column_boxes):
+        x1, x2 = (0, col_w) if i == 0 else (col_w, w)
+        for y1, y2 in boxes:
+            region[y1 + int((y2 - y1) * 3 / 5):y2, x1 + 40:x2] = 255
+    mask = cv2.bitwise_and(mask, region)
+
+    _, _, stats, centroids = cv2.connectedComponentsWithStats(mask)
+    areas = stats[1:, cv2.CC_STAT_AREA]
+    is_star = (areas > STAR_AREA_MIN) & (areas < STAR_AREA_MAX)
+    star_x, star_y = centroids[1:][is_star].T
+
+    counts = []
+    for i, boxes in enumerate(column_boxes):
+        if not boxes:
+            counts.append(np.zeros(0, dtype=int))
+            continue
+        in_column = star_x >= col_w if i == 1 else star_x < col_w
+        starts = np.array([y1 for y1, _ in boxes])
+        ends = np.array([y2 for _, y2 in boxes])
+        box_index = np.searchsorted(starts, star_y[in_column], side="right") - 1
+        valid = box_index >= 0
+        valid[valid] &= star_y[in_column][valid] < ends[box_index[valid]]
+        counts.append(np.minimum(np.bincount(box_index[valid], minlength=len(boxes)), 3))
+    return counts
@@ -2,12 +2,12 @@ import os
 import sys
 import re
 import cv2
-import time
-import glob
-import easyocr
+import numpy as np
 import json
+import perf
+from glyph_matcher import get_matcher
 from schema import init_schema, CharacterData, Stats, Rankings, Sparks # New imports
-from ocr_utils import normalize_name, normalize_skills
+from ocr_utils import normalize_name, normalize_skills, read_with_retry, DIGIT_ALLOWLIST
 from rankings import parse_rankings_by_color
 from tabs import detect_active_tab
 from image_utils import select_layout, crop_rois, load_image # New import
@@ -26,103 +26,331 @@ with open(CONFIG_PATH, 'r') as f:
     
 ROI_MOBILE = config["ROI_MOBILE"]
 SAVE_DEBUG_IMAGES = config["SAVE_DEBUG_IMAGES"]
-MIN_OCR_WIDTH = config["MIN_OCR_WIDTH"]
+SKILL_ROWS = config["SKILL_ROWS"]
 STAT_KEYS = config["STAT_KEYS"]
+SKILL_PANEL_OVERLAP = config["SKILL_PANEL_OVERLAP"]
 LOG_LEVEL = config["LOG_LEVEL"]
 LOG_FORMAT = config["LOG_FORMAT"]
 
 logger = logging.getLogger(__name__)
 
-# ------------------- Main Parsing Function -------------------
-def parse_umamusume(image_path, reader) -> Optional[CharacterData]:
-    t0 = time.perf_counter()
-    
-    img = load_image(image_path)
-    t1 = time.perf_counter()
-    if img is None:
-        logger.error(f"Could not read {image_path}") # Replaced raise ValueError
-        return None # Return None instead of raising error to allow other images to be processed
-    
-    active_tab = detect_active_tab(image_path)
-    t2 = time.perf_counter()
-    
-    if active_tab == "inspiration":
-        return None
-
-    layout = select_layout(img)
-    rois, _ = crop_rois(img, layout)
-    t3 = time.perf_counter()
-
-    character_data = init_schema()
-
-    # ---------- OCR: Name, Score, Stats ----------
-    roi_names = ["name", "score"] + STAT_KEYS # Used STAT_KEYS
-    ocr_rois = [rois[k] for k in roi_names]
-
+# ------------------- Helper: Header OCR -------------------
+def _ocr_header(rois, roi_names, image_path, reader):
+    """
+    OCRs the name, score and stat ROIs through the retry ladder. Returns the joined text per
+    ROI and whether every ROI produced text with a confidence of at least 0.7.
+    """
     stacked_text = []
-    for roi, roi_name in zip(ocr_rois, roi_names):
-        text_results = reader.readtext(roi)
+    confident = True
+    name_matcher = get_matcher("names")
+    for roi_name in roi_names:
+        roi = rois[roi_name]
+        if roi_name == "name" and name_matcher is not None:
+            with perf.span("parse_umamusume.glyph_match"):
+                label, _ = name_matcher.match(roi)
+            if label:
+                stacked_text.append(label)
+                continue
+
+        # Score and stats are numbers; restricting the recognizer to digits avoids "O" for "0".
+        ocr_kwargs = {} if roi_name == "name" else {"allowlist": DIGIT_ALLOWLIST}
+        with perf.span("parse_umamusume.ocr_header"):
+            text_results = read_with_retry(reader, roi, **ocr_kwargs)
         if not text_results:
             stacked_text.append("")
+            confident = False
             continue
         
         full_text_parts = []
         for (bbox, text, confidence) in text_results:
             full_text_parts.append(text)
             if confidence < 0.7:
+                confident = False
                 logger.warning(f"  [STATS WARNING] Low confidence ({confidence:.2f}) for text: '{text}' in ROI: '{roi_name}'")
         
         full_text = " ".join(full_text_parts)
         stacked_text.append(full_text)
+        if roi_name == "name" and name_matcher is not None:
+            name_matcher.harvest(roi, full_text, min(conf for (_, _, conf) in text_results))
 
         if SAVE_DEBUG_IMAGES:
             cv2.imwrite(f"debug_{os.path.basename(image_path).split('.')[0]}_{full_text}.png", roi)
+    return stacked_text, confident
+
+def _header_matches(reference_rois, rois):
+    """True if every header ROI is pixel-identical to the stored reference ROI."""
+    if not reference_rois:
+        return False
+    return all(k in rois and np.array_equal(ref, rois[k]) for k, ref in reference_rois.items())
+
+# ------------------- Helper: Skill Panel Overlap -------------------
+def _panel_signature(panel):
+    """Grayscale panel squeezed to a few columns; one row of the result describes one pixel row."""
+    gray = cv2.cvtColor(panel, cv2.COLOR_BGR2GRAY)
+    columns = SKILL_PANEL_OVERLAP["SIGNATURE_COLUMNS"]
+    return cv2.resize(gray, (columns, gray.shape[0]), interpolation=cv2.INTER_AREA).astype(np.int16)
+
+def _find_scroll_offset(previous, current):
+    """
+    Finds the scroll offset `d` between two skill panel signatures, such that row r of
+    `current` shows what row r + d of `previous` showed. Positive means the list was
+    scrolled down. Offsets are screened cheaply on the 1-D row profiles first and only the
+    plausible ones are verified on the full signatures. Returns None when the panels do not
+    overlap by at least MIN_OVERLAP_ROWS, or when the best offset is not clearly better
+    (MAX_RUNNER_UP_RATIO) than the best one more than RUNNER_UP_EXCLUSION_ROWS away.
+    """
+    h = current.shape[0]
+    if previous.shape != current.shape:
+        return None
+    min_overlap = min(SKILL_PANEL_OVERLAP["MIN_OVERLAP_ROWS"], h)
+
+    def overlap_diff(prev, cur, d):
+        return np.abs(prev[max(d, 0):h + min(d, 0)] - cur[max(-d, 0):h - max(d, 0)]).mean()
+
+    profile_prev, profile_cur = previous.mean(axis=1), current.mean(axis=1)
+    offsets = np.arange(-(h - min_overlap), h - min_overlap + 1)
+    coarse = np.array([overlap_diff(profile_prev, profile_cur, d) for d in offsets])
+
+    # The profile difference never exceeds the full one, so only offsets whose profiles are
+    # within MAX_MEAN_DIFF can match. Skill rows have near-identical profiles, so that can
+    # be every row pitch; up to CANDIDATES of them are verified, best profile first.
+    order = np.argsort(coarse, kind="stable")
+    order = order[coarse[order] <= SKILL_PANEL_OVERLAP["MAX_MEAN_DIFF"]][:SKILL_PANEL_OVERLAP["CANDIDATES"]]
+    # Lower bounds of every offset's full difference; exact for the verified ones.
+    diffs = coarse.copy()
+    for i in order:
+        diffs[i] = overlap_diff(previous, current, int(offsets[i]))
+    if order.size == 0:
+        return None
+
+    best = min(order, key=lambda i: (diffs[i], abs(offsets[i])))
+    best_diff, best_offset = diffs[best], int(offsets[best])
+    if best_diff > SKILL_PANEL_OVERLAP["MAX_MEAN_DIFF"]:
+        return None
+
+    # Skill rows look alike, so a shift by a whole row pitch can score almost as well. The
+    # best offset is only trusted if it is clearly better than any offset further away.
+    far = np.abs(offsets - best_offset) > SKILL_PANEL_OVERLAP["RUNNER_UP_EXCLUSION_ROWS"]
+    if far.any():
+        runner_up = diffs[far].min()
+        if not best_diff < SKILL_PANEL_OVERLAP["MAX_RUNNER_UP_RATIO"] * runner_up:
+            perf.count("skill_panel_ambiguous_offsets")
+            logger.debug(f"Ambiguous skill panel offset {best_offset} (diff {best_diff:.2f}, runner-up {runner_up:.2f}); reading the whole panel.")
+            return None
+    return best_offset
+
+def _new_skill_rows(skills_roi, folder_context):
+    """
+    Returns the part of the skills panel that was not visible in the folder's previous
+    skills screenshot, or None when nothing new is shown. The crop edge starts MARGIN_ROWS
+    inside the old panel and is then moved into the nearest gap between skill rows, so no
+    row is ever cut in half.
+    """
+    signature = _panel_signature(skills_roi)
+    previous = folder_context.get("skills_signature")
+    folder_context["skills_signature"] = signature
+    if previous is None:
+        return skills_roi
+
+    offset = _find_scroll_offset(previous, signature)
+    if offset is None:
+        return skills_roi
+
+    h = skills_roi.shape[0]
+    margin = SKILL_PANEL_OVERLAP["MARGIN_ROWS"]
+    if offset == 0:
+        perf.count("skill_panels_skipped")
+        return None
+    if abs(offset) + margin >= h:
+        return skills_roi
+
+    rows = _skill_row_spans(_binarize_skills(skills_roi))
+    if offset > 0:
+        start = _row_gap_above(rows, h - offset - margin)
+        perf.count("skill_panel_rows_skipped", start)
+        return skills_roi[start:]
+    end = _row_gap_below(rows, -offset + margin, h)
+    perf.count("skill_panel_rows_skipped", h - end)
+    return skills_roi[:end]
+
+# ------------------- Helper: Skill Rows -------------------
+def _segment_rows(bw_column):
+    """
+    Splits a binarized column of the skills panel into text rows using its horizontal
+    projection profile (dark pixels per row). Returns a list of (y1, y2) spans.
+    """
+    ink = np.count_nonzero(bw_column == 0, axis=1) >= SKILL_ROWS["MIN_INK_PIXELS"]
+    edges = np.diff(np.concatenate(([0], ink.astype(np.int8), [0])))
+    starts, ends = np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)
 
-    # Extract name, score, stats
-    name = stacked_text[0] if stacked_text else ""
-    score = int(re.sub(r"\D", "", stacked_text[1]) if len(stacked_text) > 1 else "0")
-    stats_dict = {}
-    for i, k in enumerate(STAT_KEYS): # Used STAT_KEYS
-        stats_dict[k] = int(re.sub(r"\D", "", stacked_text[i+2]) or 0) if len(stacked_text) > i+2 else 0
+    rows = []
+    for y1, y2 in zip(starts, ends):
+        if rows and y1 - rows[-1][1] <= SKILL_ROWS["MAX_ROW_GAP"]:
+            rows[-1][1] = y2  # Same row: the gap is inside a line of text.
+        else:
+            rows.append([y1, y2])
+    return [(int(y1), int(y2)) for y1, y2 in rows if y2 - y1 >= SKILL_ROWS["MIN_ROW_HEIGHT"]]
 
-    character_data.name = normalize_name(name)
-    character_data.score = score
-    if any(stats_dict.values()):
-        character_data.stats = Stats(**stats_dict)
+def _binarize_skills(skills_roi):
+    gray = cv2.cvtColor(skills_roi, cv2.COLOR_BGR2GRAY)
+    _, bw = cv2.threshold(gray, 150, 255, cv2.THRESH_BINARY)
+    return bw
+
+def _skill_columns(w):
+    """Column spans, trimmed by the same margins the stacked-halves layout used to cut off."""
+    return [(0, w // 2 - 94), (w // 2 + 74, w)]
+
+def _skill_row_spans(bw):
+    """(y1, y2) of every skill row in either column, sorted top to bottom."""
+    return sorted(row for x1, x2 in _skill_columns(bw.shape[1]) for row in _segment_rows(bw[:, x1:x2]))
+
+def _row_gap_above(rows, y):
+    """Moves `y` up until no row spans it, then pads it into the gap above (at most PADDING rows)."""
+    moved = True
+    while moved:
+        moved = False
+        for y1, y2 in rows:
+            if y1 < y < y2:
+                y, moved = y1, True
+    gap_top = max([y2 for _, y2 in rows if y2 <= y], default=0)
+    return max(gap_top, y - SKILL_ROWS["PADDING"])
+
+def _row_gap_below(rows, y, h):
+    """Moves `y` down until no row spans it, then pads it into the gap below (at most PADDING rows)."""
+    moved = True
+    while moved:
+        moved = False
+        for y1, y2 in rows:
+            if y1 < y < y2:
+                y, moved = y2, True
+    gap_bottom = min([y1 for y1, _ in rows if y1 >= y], default=h)
+    return min(gap_bottom, y + SKILL_ROWS["PADDING"])
+
+def _results_by_box(boxes, results):
+    """
+    Pairs recognize() results with the [x1, x2, y1, y2] boxes they were read from. EasyOCR
+    may return them sorted by position rather than in input order, so each result goes to
+    the box whose top-left corner is closest to its own. Boxes without a result get None.
+    """
+    by_box = [None] * len(boxes)
+    for (bbox, text, confidence) in results:
+        x, y = bbox[0]
+        i = min(range(len(boxes)), key=lambda k: abs(boxes[k][0] - x) + abs(boxes[k][2] - y))
+        by_box[i] = (text, confidence)
+    return by_box
+
+def _read_skills(skills_roi, reader):
+    """
+    Reads the two-column skills panel. Both columns are segmented into skill rows, and the
+    rows are passed to the recognizer as boxes, so the text detector never runs and every
+    skill comes back with its own text and confidence. Returns a list of (text, confidence)
+    in row order, left column first.
+    """
+    h, w = skills_roi.shape[:2]
+    bw = _binarize_skills(skills_roi)
+
+    pad = SKILL_ROWS["PADDING"]
+    boxes = []
+    for x1, x2 in _skill_columns(w):
+        for y1, y2 in _segment_rows(bw[:, x1:x2]):
+            boxes.append([x1, x2, max(0, y1 - pad), min(h, y2 + pad)])
+    if not boxes:
+        return []
+
+    # Rows the glyph matcher recognizes skip OCR; the rest go to the recognizer.
+    skills = [None] * len(boxes)
+    skill_matcher = get_matcher("skills")
+    if skill_matcher is not None:
+        with perf.span("parse_umamusume.glyph_match"):
+            for i, (x1, x2, y1, y2) in enumerate(boxes):
+                label, score = skill_matcher.match(bw[y1:y2, x1:x2])
+                if label:
+                    skills[i] = (label, score)
+    ocr_indices = [i for i, skill in enumerate(skills) if skill is None]
+    if not ocr_indices:
+        return skills
+
+    ocr_boxes = [boxes[i] for i in ocr_indices]
+    results = reader.recognize(bw, horizontal_list=ocr_boxes, free_list=[], detail=1)
+    for i, result in zip(ocr_indices, _results_by_box(ocr_boxes, results)):
+        if result is None:
+            continue
+        text, confidence = result
+        if confidence < 0.6:
+            logger.warning(f"  [SKILL WARNING] Low confidence ({confidence:.2f}) for skill: '{text}'")
+        skills[i] = (text, confidence)
+        if skill_matcher is not None:
+            x1, x2, y1, y2 = boxes[i]
+            skill_matcher.harvest(bw[y1:y2, x1:x2], re.sub(r'Lvl.*', '', text), confidence)
+    return [skill for skill in skills if skill is not None]
+
+# ------------------- Main Parsing Function -------------------
+def parse_umamusume(image_path, reader, folder_context=None) -> Optional[CharacterData]:
+    """
+    Parses one skills/stats screenshot. `folder_context` is an optional dict shared by all
+    screenshots of one folder: once a header has been read confidently its ROIs are kept
+    there, and later screenshots with a pixel-identical header skip the header OCR and
+    only return rankings and skills (name, score and stats are left empty). The skills
+    panel is compared against the previous one as well, and only rows revealed by
+    scrolling are OCR'd.
+    """
+    with perf.span("parse_umamusume.decode"):
+        img = load_image(image_path)
+    if img is None:
+        logger.error(f"Could not read {image_path}") # Replaced raise ValueError
+        return None # Return None instead of raising error to allow other images to be processed
+    
+    with perf.span("parse_umamusume.detect_active_tab"):
+        active_tab = detect_active_tab(image_path)
+    
+    if active_tab == "inspiration":
+        return None
+
+    with perf.span("parse_umamusume.crop_rois"):
+        layout = select_layout(img)
+        rois, _ = crop_rois(img, layout)
+
+    character_data = init_schema()
+
+    # ---------- OCR: Name, Score, Stats ----------
+    roi_names = ["name", "score"] + STAT_KEYS # Used STAT_KEYS
+
+    if folder_context is not None and _header_matches(folder_context.get("header_rois"), rois):
+        perf.count("header_ocr_skipped")
+        logger.debug(f"Header of {os.path.basename(image_path)} matches an earlier screenshot; skipping header OCR.")
+    else:
+        stacked_text, confident = _ocr_header(rois, roi_names, image_path, reader)
+
+        # Extract name, score, stats
+        name = stacked_text[0] if stacked_text else ""
+        score = int(re.sub(r"\D", "", stacked_text[1]) if len(stacked_text) > 1 else "0")
+        stats_dict = {}
+        for i, k in enumerate(STAT_KEYS): # Used STAT_KEYS
+            stats_dict[k] = int(re.sub(r"\D", "", stacked_text[i+2]) or 0) if len(stacked_text) > i+2 else 0
+
+        character_data.name = normalize_name(name)
+        character_data.score = score
+        if any(stats_dict.values()):
+            character_data.stats = Stats(**stats_dict)
+
+        if folder_context is not None and confident and character_data.name:
+            folder_context["header_rois"] = {k: rois[k].copy() for k in roi_names}
 
     # ---------- OCR: Rankings ----------
     if "rankings" in rois:
-        rankings_data = parse_rankings_by_color(rois["rankings"])
+        with perf.span("parse_umamusume.rankings"):
+            rankings_data = parse_rankings_by_color(rois["rankings"])
         character_data.rankings = Rankings(**rankings_data)
 
     # ---------- OCR: Skills ----------
-    if active_tab == "skills" and "skills" in rois:
-        skills_roi = rois["skills"]
-        h, w = skills_roi.shape[:2]
-        
-        left_half = skills_roi[:, :w//2][:, :-94]
-        right_half = skills_roi[:, w//2:][:, 74:]
-
-        min_width = min(left_half.shape[1], right_half.shape[1])
-        stacked_skills = cv2.vconcat([left_half[:, :min_width], right_half[:, :min_width]])
+    skills_roi = rois.get("skills") if active_tab == "skills" else None
+    if skills_roi is not None and folder_context is not None:
+        with perf.span("parse_umamusume.skill_overlap"):
+            skills_roi = _new_skill_rows(skills_roi, folder_context)
 
-        scale_factor = max(MIN_OCR_WIDTH / stacked_skills.shape[1], 1)
-        if scale_factor > 1:
-            new_w = int(stacked_skills.shape[1] / scale_factor)
-            new_h = int(stacked_skills.shape[0] / scale_factor)
-            stacked_skills = cv2.resize(stacked_skills, (new_w, new_h), interpolation=cv2.INTER_AREA)
-
-        gray = cv2.cvtColor(stacked_skills, cv2.COLOR_BGR2GRAY)
-        _, bw = cv2.threshold(gray, 150, 255, cv2.THRESH_BINARY)
-        
-        # Get detailed results for confidence checking
-        detailed_results = reader.readtext(bw)
-        for (bbox, text, confidence) in detailed_results:
-            if confidence < 0.6:
-                logger.warning(f"  [SKILL WARNING] Low confidence ({confidence:.2f}) for word: '{text}'")
-
-        # Get paragraph results for easier normalization
-        skills_text_list = reader.readtext(bw, detail=0, paragraph=True)
-        character_data.skills = normalize_skills(skills_text_list)
+    if skills_roi is not None:
+        with perf.span("parse_umamusume.ocr_skills"):
+            skills = _read_skills(skills_roi, reader)
+        character_data.skills = normalize_skills([text for text, _ in skills])
     
     return character_data
\ No newline at end of file
@@ -0,0 +1,94 @@
+import os
+import ast
+import sys
+import json
+import glob
+import importlib
+import unittest
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+sys.path.insert(0, SRC_DIR)
+
+with open(os.path.join(SRC_DIR, "config.json"), "r") as f:
+    CONFIG = json.load(f)
+
+
+def _string_key(node):
+    """The key of `x["KEY"]`, or None for any other subscript."""
+    if isinstance(node, ast.Subscript) and isinstance(node.slice, ast.Constant) and isinstance(node.slice.value, str):
+        return node.slice.value
+    return None
+
+
+def _config_path(node, sections):
+    """
+    The config.json path a subscript chain reads, e.g. ["SCAN_SERVER", "PORT"] for both
+    config["SCAN_SERVER"]["PORT"] and SERVER_CONFIG["PORT"] after
+    SERVER_CONFIG = config["SCAN_SERVER"]. Returns None if the chain doesn't start at config.
+    """
+    keys = []
+    while _string_key(node) is not None:
+        keys.insert(0, _string_key(node))
+        node = node.value
+    if not keys or not isinstance(node, ast.Name):
+        return None
+    if node.id == "config":
+        return keys
+    if node.id in sections:
+        return sections[node.id] + keys
+    return None
+
+
+def _missing_config_keys(path):
+    with open(path, "r", encoding="utf-8") as f:
+        tree = ast.parse(f.read(), path)
+
+    # Module-level aliases such as SPARK_ROI_CONFIG = config["SPARK_ROI_DETECTION"].
+    sections = {}
+    for node in tree.body:
+        if isinstance(node, ast.Assign) and len(node.targets) == 1 and isinstance(node.targets[0], ast.Name):
+            keys = _config_path(node.value, sections)
+            if keys:
+                sections[node.targets[0].id] = keys
+
+    missing = []
+    for node in ast.walk(tree):
+        if not isinstance(node, ast.Subscript) or not isinstance(node.ctx, ast.Load):
+            continue
+        keys = _config_path(node, sections)
+        if not keys:
+            continue
+        value = CONFIG
+        for key in keys:
+            if not isinstance(value, dict):
+                break
+            if key not in value:
+                missing.append(f"{os.path.basename(path)}:{node.lineno} {'.'.join(keys)}")
+                break
+            value = value[key]
+    return missing
+
+
+class ConfigKeysTest(unittest.TestCase):
+    """Every config.json key read by a module exists, so no entry point fails at import."""
+
+    def test_all_config_reads_exist(self):
+        missing = []
+        for path in sorted(glob.glob(os.path.join(SRC_DIR, "*.py"))):
+            missing.extend(_missing_config_keys(path))
+        self.assertEqual(missing, [])
+
+
+class ImportMainTest(unittest.TestCase):
+    def test_import_main(self):
+        for dependency in ("numpy", "cv2", "pandas", "PIL", "torch", "easyocr", "tqdm"):
+            try:
+                importlib.import_module(dependency)
+            except ImportError:
+                self.skipTest(f"{dependency} is not installed")
+        main = importlib.import_module("main")
+        self.assertGreaterEqual(main.SPARK_ROI_DETECTION_WORKERS, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
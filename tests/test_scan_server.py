@@ -0,0 +1,154 @@
+import os
+import sys
+import json
+import time
+import base64
+import shutil
+import tempfile
+import threading
+import unittest
+import urllib.request
+import urllib.error
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+import scan_server  # noqa: E402
+
+
+def _post_job(base_url, files):
+    """Posts a job and returns (status, payload, headers), including error responses."""
+    body = json.dumps({"files": {name: base64.b64encode(data).decode("ascii") for name, data in files.items()}})
+    request = urllib.request.Request(f"{base_url}/jobs", data=body.encode("utf-8"),
+                                     headers={"Content-Type": "application/json"})
+    try:
+        with urllib.request.urlopen(request) as response:
+            return response.status, json.loads(response.read()), response.headers
+    except urllib.error.HTTPError as e:
+        return e.code, json.loads(e.read() or b"{}"), e.headers
+
+
+class ScanServerTest(unittest.TestCase):
+    """Runs the real HTTP server on a free port with the OCR scan replaced by a stub."""
+
+    def setUp(self):
+        self.jobs_folder = tempfile.mkdtemp()
+        self.release = threading.Event()
+        self.scanned = []
+        self.running = 0
+        self.max_running = 0
+        self.idle_reports = []
+        self.counter_lock = threading.Lock()
+        self.httpd = None
+
+    def _start_server(self, queue_size=1, num_workers=1):
+        def fake_scan(folder_path):
+            with self.counter_lock:
+                self.scanned.append(sorted(os.listdir(folder_path)))
+                self.running += 1
+                self.max_running = max(self.max_running, self.running)
+            try:
+                self.release.wait(timeout=10)
+                return {"name": "Stub Runner", "files": sorted(os.listdir(folder_path))}
+            finally:
+                with self.counter_lock:
+                    self.running -= 1
+
+        self.httpd, self.service = scan_server.create_server(
+            fake_scan, "127.0.0.1", 0, self.jobs_folder, queue_size=queue_size, num_workers=num_workers,
+            on_idle=lambda job_ids: self.idle_reports.append((sorted(job_ids), self.running)))
+        self.service.start()
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+        host, port = self.httpd.server_address[:2]
+        self.base_url = f"http://{host}:{port}"
+
+    def tearDown(self):
+        self.release.set()
+        if self.httpd is not None:
+            self.httpd.shutdown()
+            self.httpd.server_close()
+            self.service.stop()
+        shutil.rmtree(self.jobs_folder, ignore_errors=True)
+
+    def _wait_for_status(self, job_id, wanted, timeout=5):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            status, payload = scan_server._request_json(f"{self.base_url}/jobs/{job_id}")
+            self.assertEqual(status, 200)
+            if payload["status"] == wanted:
+                return payload
+            time.sleep(0.02)
+        self.fail(f"Job {job_id} never reached status {wanted!r}.")
+
+    def _wait_for_idle_reports(self, count, timeout=5):
+        # A job is marked done just before the service checks whether it went idle.
+        deadline = time.monotonic() + timeout
+        while len(self.idle_reports) < count and time.monotonic() < deadline:
+            time.sleep(0.02)
+        return self.idle_reports
+
+    def test_submit_poll_and_back_pressure(self):
+        self._start_server()
+        status, first, headers = _post_job(self.base_url, {"a.png": b"one", "b.png": b"two"})
+        self.assertEqual(status, 202)
+        self.assertEqual(first["files"], 2)
+        self.assertEqual(headers["Location"], f"/jobs/{first['job_id']}")
+
+        # The only worker is now blocked inside the stub, so the next job fills the queue.
+        self._wait_for_status(first["job_id"], "running")
+        status, result = scan_server._request_json(f"{self.base_url}/jobs/{first['job_id']}/result")
+        self.assertEqual(status, 409)
+        self.assertEqual(result["status"], "running")
+
+        status, second, _ = _post_job(self.base_url, {"c.png": b"three"})
+        self.assertEqual(status, 202)
+        self.assertEqual(second["status"], "queued")
+
+        status, payload, headers = _post_job(self.base_url, {"d.png": b"four"})
+        self.assertEqual(status, 503)
+        self.assertEqual(headers["Retry-After"], "5")
+        self.assertIn("error", payload)
+
+        self.release.set()
+        result = scan_server.wait_for_result(self.base_url, first["job_id"], poll_interval=0.02, timeout=5)
+        self.assertEqual(result, {"name": "Stub Runner", "files": ["a.png", "b.png"]})
+        done = self._wait_for_status(second["job_id"], "done")
+        self.assertIsNotNone(done["finished"])
+        self.assertEqual(self.scanned, [["a.png", "b.png"], ["c.png"]])
+        # A single worker is idle after every job, so every job gets its own report.
+        self.assertEqual(self._wait_for_idle_reports(2), [([first["job_id"]], 0), ([second["job_id"]], 0)])
+
+    def test_concurrent_jobs_keep_their_own_results(self):
+        self._start_server(queue_size=2, num_workers=2)
+        job_ids = {}
+        for name in ("a.png", "b.png"):
+            status, job, _ = _post_job(self.base_url, {name: name.encode("ascii")})
+            self.assertEqual(status, 202)
+            job_ids[name] = job["job_id"]
+
+        # Both jobs are inside the scan at the same time before either is released.
+        for job_id in job_ids.values():
+            self._wait_for_status(job_id, "running")
+        self.assertEqual(self.max_running, 2)
+
+        self.release.set()
+        for name, job_id in job_ids.items():
+            result = scan_server.wait_for_result(self.base_url, job_id, poll_interval=0.02, timeout=5)
+            self.assertEqual(result, {"name": "Stub Runner", "files": [name]})
+        status, health = scan_server._request_json(f"{self.base_url}/health")
+        self.assertEqual(status, 200)
+        self.assertEqual(health["jobs"], {"done": 2})
+        # Stats are reported once, after both jobs, and never while one is still running.
+        self.assertEqual(self._wait_for_idle_reports(1), [(sorted(job_ids.values()), 0)])
+
+    def test_unknown_job_and_invalid_payload(self):
+        self._start_server()
+        status, _ = scan_server._request_json(f"{self.base_url}/jobs/missing")
+        self.assertEqual(status, 404)
+        status, payload, _ = _post_job(self.base_url, {"notes.txt": b"text"})
+        self.assertEqual(status, 400)
+        self.assertIn("Unsupported file type", payload["error"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,68 @@
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+try:
+    import numpy as np
+    import umamusume_parser
+except ImportError as e:  # The OCR stack is not installed.
+    umamusume_parser = None
+    IMPORT_ERROR = str(e)
+
+ROW_PITCH = 40
+PANEL_HEIGHT = 400
+
+
+def _skill_list(num_rows, seed=0):
+    """
+    A long, scrollable skill list: every row has the same label bar, and only a small mark
+    whose position differs from row to row tells the rows apart.
+    """
+    rng = np.random.default_rng(seed)
+    img = np.full((num_rows * ROW_PITCH, 240, 3), 250, dtype=np.uint8)
+    for i in range(num_rows):
+        y = i * ROW_PITCH
+        img[y + 10:y + 26, 20:200] = 120
+        x = int(rng.integers(24, 180))
+        img[y + 12:y + 24, x:x + 12] = 20
+    return img
+
+
+@unittest.skipIf(umamusume_parser is None, "umamusume_parser dependencies are not installed")
+class ScrollOffsetTest(unittest.TestCase):
+    def setUp(self):
+        self.skill_list = _skill_list(40)
+        self.first = self.skill_list[:PANEL_HEIGHT]
+
+    def _offset(self, previous_panel, current_panel):
+        return umamusume_parser._find_scroll_offset(umamusume_parser._panel_signature(previous_panel),
+                                                    umamusume_parser._panel_signature(current_panel))
+
+    def test_overlapping_panels_give_the_scroll_offset(self):
+        for scroll in (ROW_PITCH * 3, 137, -ROW_PITCH * 2):
+            start = ROW_PITCH * 10
+            previous = self.skill_list[start:start + PANEL_HEIGHT]
+            current = self.skill_list[start + scroll:start + scroll + PANEL_HEIGHT]
+            self.assertEqual(self._offset(previous, current), scroll)
+
+    def test_panels_without_overlap_are_not_matched(self):
+        # Same layout, different rows: shifts by a row pitch look alike and must be rejected.
+        other = self.skill_list[PANEL_HEIGHT * 2:PANEL_HEIGHT * 3]
+        self.assertIsNone(self._offset(self.first, other))
+
+    def test_new_rows_are_cut_at_a_row_gap(self):
+        folder_context = {}
+        self.assertIs(umamusume_parser._new_skill_rows(self.first, folder_context), self.first)
+        scrolled = self.skill_list[137:137 + PANEL_HEIGHT]
+        new_rows = umamusume_parser._new_skill_rows(scrolled, folder_context)
+        self.assertIsNotNone(new_rows)
+        # The crop starts in the gap above a row, never inside a row's label bar.
+        start_in_row = (137 + PANEL_HEIGHT - new_rows.shape[0]) % ROW_PITCH
+        self.assertFalse(10 < start_in_row < 26, start_in_row)
+        self.assertLess(new_rows.shape[0], PANEL_HEIGHT)
+
+
+if __name__ == "__main__":
+    unittest.main()